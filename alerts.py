@@ -0,0 +1,359 @@
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+from core import IslandGroups, Products, ISLAND_GROUPS, config
+from metrics import metrics
+from routes import RouteEngine
+
+ALERT_SETTINGS = config.get("alert_settings", {})
+METRICS = ["$Profit", "$/Pound", "$/Item"]
+FIELDS = {"supply": "supply", "buy": "buy_price", "sell": "sell_price"}
+OPERATORS = {
+    ">": lambda value, threshold: value > threshold,
+    ">=": lambda value, threshold: value >= threshold,
+    "<": lambda value, threshold: value < threshold,
+    "<=": lambda value, threshold: value <= threshold
+}
+
+_CONDITION = r"(?P<op><=|>=|<|>)\s*(?P<threshold>-?\d+(?:\.\d+)?)"
+ROUTE_RULE = re.compile(r"^\s*(?P<product>.+?)\s+from\s+(?P<starts>.+?)\s+to\s+(?P<ends>.+?)\s+(?:with\s+)?"
+                        r"(?P<metric>\$Profit|\$/Pound|\$/Item)\s*" + _CONDITION + r"\s*$", re.IGNORECASE)
+CELL_RULE = re.compile(r"^\s*(?P<product>.+?)\s+(?P<field>supply|buy|sell)\s+at\s+(?P<market>.+?)\s*"
+                       + _CONDITION + r"\s*$", re.IGNORECASE)
+
+
+def _product(name):
+    for product in Products.NAMES:
+        if product.lower() == name.strip().lower():
+            return product
+    raise ValueError(f"Unknown product: {name.strip()}")
+
+
+def _market(name):
+    for market in (island for islands in ISLAND_GROUPS.values() for island in islands):
+        if market.lower() == name.strip().lower():
+            return market
+    raise ValueError(f"Unknown market: {name.strip()}")
+
+
+def _places(text):
+    """Market names for a comma separated list of markets and island groups; None for "any"/"all"."""
+    names = set()
+    for place in text.split(","):
+        place = re.sub(r"^(any|all)\s+|\s+markets?$", "", place.strip(), flags=re.IGNORECASE)
+        if place.lower() in ("any", "all", ""):
+            return None
+        try:
+            names.add(_market(place))
+        except ValueError:
+            for group in IslandGroups.resolve([place]):
+                names.update(ISLAND_GROUPS[group])
+    return frozenset(names)
+
+
+def parse_rule(text):
+    """
+    Parses one watchlist rule.
+
+    Route rules watch the best route of a product between two sets of
+    markets: "<product> from <places> to <places> [with] <metric> <op> <value>",
+    where places are market names, island groups or "any", separated by
+    commas, and metric is $Profit, $/Pound or $/Item. Cell rules watch one
+    product at one market: "<product> <supply|buy|sell> at <market> <op> <value>".
+
+        Gold from any Al'Ankh market to Fire Fish Lagoon with $Profit > 5000
+        Truffles supply at Oasis < 2
+
+    Raises:
+        ValueError: The text matches neither form or names something unknown.
+    """
+    match = ROUTE_RULE.match(text)
+    if match:
+        metric = next(name for name in METRICS if name.lower() == match["metric"].lower())
+        return RouteRule(text.strip(), _product(match["product"]), metric, match["op"], float(match["threshold"]),
+                         _places(match["starts"]), _places(match["ends"]))
+    match = CELL_RULE.match(text)
+    if match:
+        return CellRule(text.strip(), _product(match["product"]), match["field"].lower(), match["op"],
+                        float(match["threshold"]), _market(match["market"]))
+    raise ValueError(f"Can't parse alert rule: {text!r}")
+
+
+class Rule:
+    """
+    State shared by every rule kind: the condition, and whether it may fire.
+
+    A rule fires when its condition turns true and is then disarmed until
+    the value moves back past the threshold by the hysteresis band, so a
+    value hovering around the threshold alerts once.
+    """
+    def __init__(self, text, product, op, threshold):
+        self.text = text
+        self.product = product
+        self.column = Products.COLUMNS[product]
+        self.op = op
+        self.threshold = threshold
+        self.value = None
+        self.armed = True
+        self.pending = False      # True but held back by the rate limits
+        self.last_fired = float("-inf")
+
+    def holds(self, value):
+        return OPERATORS[self.op](value, self.threshold)
+
+    def rearms(self, value, hysteresis):
+        band = hysteresis * max(abs(self.threshold), 1.0)
+        if self.op in (">", ">="):
+            return value <= self.threshold - band
+        return value >= self.threshold + band
+
+    def cells(self):
+        """(market row, product column) cells the value depends on; valid after bind()."""
+        raise NotImplementedError
+
+    def bind(self, markets):
+        raise NotImplementedError
+
+    def evaluate(self, supplies, markets, player, rows=None):
+        """Value for this tick; `rows` are the changed market rows among cells(), None for all."""
+        raise NotImplementedError
+
+    def details(self, markets, player):
+        """Fields describing the current value for an alert."""
+        raise NotImplementedError
+
+
+class RouteRule(Rule):
+    """
+    The best route of one product from any of `starts` to any of `ends`.
+
+    Keeps the metric of every (start, end) pair; a changed supply only
+    re-prices the pairs of its market's row or column, through a one
+    product RouteEngine with the same math as the route table.
+    """
+    def __init__(self, text, product, metric, op, threshold, starts=None, ends=None):
+        super().__init__(text, product, op, threshold)
+        self.metric = metric
+        self.starts = starts
+        self.ends = ends
+        self.engine = RouteEngine({product: Products.DATA[product]})
+        self._values = np.empty((0, 0))
+
+    def bind(self, markets):
+        self._start_rows = [row for row, m in enumerate(markets) if self.starts is None or m.name in self.starts]
+        self._end_rows = [row for row, m in enumerate(markets) if self.ends is None or m.name in self.ends]
+        self._start_pos = {row: i for i, row in enumerate(self._start_rows)}
+        self._end_pos = {row: i for i, row in enumerate(self._end_rows)}
+        self._values = np.full((len(self._start_rows), len(self._end_rows)), -np.inf)
+
+    def cells(self):
+        return [(row, self.column) for row in sorted(set(self._start_rows) | set(self._end_rows))]
+
+    def evaluate(self, supplies, markets, player, rows=None):
+        if rows is None:
+            self._values[:] = self._pairs(supplies, markets, player, self._start_rows, self._end_rows)
+        else:
+            starts = [row for row in rows if row in self._start_pos]
+            ends = [row for row in rows if row in self._end_pos]
+            if starts:
+                self._values[[self._start_pos[row] for row in starts], :] = \
+                    self._pairs(supplies, markets, player, starts, self._end_rows)
+            if ends:
+                self._values[:, [self._end_pos[row] for row in ends]] = \
+                    self._pairs(supplies, markets, player, self._start_rows, ends)
+        return float(self._values.max()) if self._values.size else -np.inf
+
+    def _pairs(self, supplies, markets, player, start_rows, end_rows):
+        """Metric of each (start row, end row) pair; -inf where nothing can be traded."""
+        column = [self.column]
+        limits = np.array([markets[row].limit for row in start_rows], dtype=float)
+        _, qty, total_buy, total_sell = self.engine.trades(supplies[start_rows][:, column],
+                                                           supplies[end_rows][:, column], limits, player)
+        qty, profit = qty[..., 0], (total_sell - total_buy)[..., 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.metric == "$Profit":
+                values = profit.astype(float)
+            elif self.metric == "$/Pound":
+                values = np.round(profit / (self.engine.weights[0] * qty), 1)
+            else:
+                values = np.round(profit / qty, 1)
+        same = np.array(start_rows)[:, None] == np.array(end_rows)[None, :]
+        return np.where((qty > 0) & ~same, values, -np.inf)
+
+    def details(self, markets, player):
+        if not self._values.size or self._values.max() == -np.inf:
+            return {"Product": self.product}
+        s, e = np.unravel_index(np.argmax(self._values), self._values.shape)
+        start, end = markets[self._start_rows[s]], markets[self._end_rows[e]]
+        supply = lambda market: np.array([[market.supplies[self.column]]], dtype=float)
+        amnt, qty, total_buy, total_sell = self.engine.trades(supply(start), supply(end),
+                                                              np.array([start.limit], dtype=float), player)
+        return self.engine.route(start.name, end.name, 0, int(qty[0, 0, 0]), int(amnt[0, 0]),
+                                 total_buy[0, 0, 0], total_sell[0, 0, 0])
+
+
+class CellRule(Rule):
+    """Supply, buy price or sell price of one product at one market."""
+    def __init__(self, text, product, field, op, threshold, market):
+        super().__init__(text, product, op, threshold)
+        self.field = field
+        self.market = market
+        self._row = None
+
+    def bind(self, markets):
+        self._row = next((row for row, m in enumerate(markets) if m.name == self.market), None)
+
+    def cells(self):
+        return [] if self._row is None else [(self._row, self.column)]
+
+    def evaluate(self, supplies, markets, player, rows=None):
+        if self._row is None:
+            return float("nan")   # Never holds, never re-arms
+        return float(getattr(markets[self._row].products[self.column], FIELDS[self.field]))
+
+    def details(self, markets, player):
+        return {"Market": self.market, "Product": self.product, self.field: self.value}
+
+
+class AlertEngine:
+    """
+    Evaluates watchlist rules incrementally, tick by tick.
+
+    Rules are indexed by the (market, product) cells they read. Each update
+    compares the new supplies with the previous tick's and re-evaluates
+    only the rules behind the changed cells, and route rules only the
+    market pairs those cells touch, so the cost follows changed cells times
+    matching rules rather than the size of the route table. New markets or
+    player settings re-evaluate everything once.
+
+    A rule fires when its condition turns true (see Rule for the hysteresis
+    band). Firing is rate limited per rule (`cooldown` seconds) and overall
+    (`max_per_minute`); a rule held back by either fires as soon as it is
+    allowed if it still holds. Alerts collect in `events` for drain(), which
+    may be called from another thread than update().
+    """
+    def __init__(self, rules, hysteresis=0.05, cooldown=300, max_per_minute=6, clock=time.time):
+        self.rules = list(rules)
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.max_per_minute = max_per_minute
+        self.clock = clock
+        self.events = deque(maxlen=1000)
+        self.stats = {"cells_changed": 0, "rules_evaluated": 0, "fired": 0, "suppressed": 0}
+        self.tick = 0
+        self._names = None
+        self._settings = None
+        self._supplies = None
+        self._index = {}       # (market row, product column) -> rules reading it
+        self._sent = deque()   # Times of the alerts of the last minute
+
+    def update(self, markets, player):
+        """
+        Re-evaluates the rules affected by this tick's supply changes.
+
+        Args:
+            markets (list[Market]): Markets with fresh supplies (and prices).
+            player (Player): Settings the route rules are priced with.
+
+        Returns:
+            list[dict]: Alerts fired by this tick (also queued for drain()).
+        """
+        supplies = np.array([m.supplies for m in markets], dtype=float)
+        names = [m.name for m in markets]
+        settings = (player.principal, player.conversion_rate, player.mass_limit, player.volume_limit)
+        if names != self._names or settings != self._settings:
+            self._bind(markets)
+            self._names, self._settings = names, settings
+            dirty = dict.fromkeys(self.rules)
+        else:
+            changed = np.argwhere(supplies != self._supplies).tolist()
+            self.stats["cells_changed"] += len(changed)
+            metrics.count("alert_cells_changed", len(changed))
+            dirty = {}
+            for row, column in changed:
+                for rule in self._index.get((row, column), ()):
+                    dirty.setdefault(rule, set()).add(row)
+        self._supplies = supplies
+
+        now = self.clock()
+        fired = []
+        for rule, rows in dirty.items():
+            rule.value = rule.evaluate(supplies, markets, player, None if rows is None else sorted(rows))
+            self._check(rule, now, markets, player, fired)
+        for rule in self.rules:
+            if rule.pending and rule not in dirty:
+                self._check(rule, now, markets, player, fired)
+        self.stats["rules_evaluated"] += len(dirty)
+        metrics.count("alert_rules_evaluated", len(dirty))
+        self.tick += 1
+        return fired
+
+    def _bind(self, markets):
+        self._index = {}
+        for rule in self.rules:
+            rule.bind(markets)
+            for cell in rule.cells():
+                self._index.setdefault(cell, []).append(rule)
+
+    def _check(self, rule, now, markets, player, fired):
+        if not rule.armed:
+            if rule.rearms(rule.value, self.hysteresis):
+                rule.armed = True
+            return
+        if not rule.holds(rule.value):
+            rule.pending = False
+            return
+        while self._sent and now - self._sent[0] >= 60:
+            self._sent.popleft()
+        if now - rule.last_fired < self.cooldown or len(self._sent) >= self.max_per_minute:
+            if not rule.pending:
+                self.stats["suppressed"] += 1
+                metrics.count("alerts_suppressed")
+            rule.pending = True
+            return
+        rule.armed, rule.pending, rule.last_fired = False, False, now
+        self._sent.append(now)
+        event = {"event": "alert", "tick": self.tick, "time": round(now, 3), "rule": rule.text,
+                 "value": rule.value if np.isfinite(rule.value) else None, "threshold": rule.threshold, **rule.details(markets, player)}
+        self.events.append(event)
+        fired.append(event)
+        self.stats["fired"] += 1
+        metrics.count("alerts_fired")
+
+    def drain(self):
+        """Alerts fired since the last call, oldest first."""
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+
+def format_alert(event):
+    """One line describing an alert, for the console and the GUI."""
+    if "Start Market" in event:
+        return (f"{event['Product']}: {event['Start Market']} → {event['End Market']} "
+                f"({event['Qnty']}) $Profit {event['$Profit']}, $/Pound {event['$/Pound']}, "
+                f"$/Item {event['$/Item']} — {event['rule']}")
+    return f"{event['Product']} at {event.get('Market', '?')}: {event['value']:g} — {event['rule']}"
+
+
+def create_alert_engine(rules=()):
+    """
+    AlertEngine for alert_settings.rules plus `rules`, or None without rules.
+
+    `rules` may be texts or parsed Rule objects. Rules that don't parse are
+    reported and skipped.
+    """
+    parsed = []
+    for text in list(ALERT_SETTINGS.get("rules", [])) + list(rules):
+        try:
+            parsed.append(text if isinstance(text, Rule) else parse_rule(text))
+        except ValueError as e:
+            print(f"Error in alert rule: {e}")
+    if not parsed:
+        return None
+    return AlertEngine(parsed, ALERT_SETTINGS.get("hysteresis", 0.05), ALERT_SETTINGS.get("cooldown", 300),
+                       ALERT_SETTINGS.get("max_per_minute", 6))
@@ -0,0 +1,423 @@
+import ctypes
+import ctypes.util
+import errno
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+from scanner import Region
+
+IOV_MAX = 1024   # iovecs per process_vm_readv call (Linux UIO_MAXIOV)
+SNAPSHOT_MAGIC = b"SWSNAP1\n"
+BACKENDS = ["auto", "pymem", "vm_readv", "procmem", "snapshot"]
+
+
+class ProcessNotFound(Exception):
+    """Raised when the game process (or snapshot file) can't be opened."""
+
+
+class MemoryReadError(Exception):
+    """Raised when a range can't be read from the process."""
+
+
+class MemoryBackend:
+    """
+    Reads another process's memory; the interface the rest of the project uses.
+
+    Subclasses implement read_bytes() and regions(). Typed reads, batched
+    read_many() and pattern_scan_all() are built on those two, so a backend
+    only overrides them when it can do better (read_many in one syscall).
+    Offers the subset of the pymem.Pymem API this project calls, so a
+    backend can be passed anywhere a `pm` is expected.
+    """
+    process_id = None
+    process_handle = None
+
+    def read_bytes(self, address, length):
+        raise NotImplementedError
+
+    def regions(self):
+        """Readable regions that may hold game objects, in ascending order."""
+        raise NotImplementedError
+
+    def read_many(self, requests):
+        """
+        Reads several ranges.
+
+        Args:
+            requests (list[tuple[int, int]]): (address, length) pairs.
+
+        Returns:
+            list[bytes or None]: One entry per request, None where the range
+            couldn't be read.
+        """
+        results = []
+        for address, length in requests:
+            try:
+                results.append(self.read_bytes(address, length))
+            except Exception:
+                results.append(None)
+        return results
+
+    def read_int(self, address):
+        return struct.unpack('<i', self.read_bytes(address, 4))[0]
+
+    def read_long(self, address):
+        return struct.unpack('<l', self.read_bytes(address, 4))[0]
+
+    def read_float(self, address):
+        return struct.unpack('<f', self.read_bytes(address, 4))[0]
+
+    def read_longlong(self, address):
+        return struct.unpack('<q', self.read_bytes(address, 8))[0]
+
+    def pattern_scan_all(self, pattern, return_multiple=False):
+        """Regex search over every region, like pymem.Pymem.pattern_scan_all."""
+        regex = re.compile(pattern, re.DOTALL)
+        found = []
+        for base, size in self.regions():
+            try:
+                data = self.read_bytes(base, size)
+            except Exception:
+                continue
+            for match in regex.finditer(data):
+                if not return_multiple:
+                    return base + match.start()
+                found.append(base + match.start())
+        return found if return_multiple else None
+
+    def module_base(self, module_name):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# =============================================================================
+# Windows
+# =============================================================================
+
+class PymemBackend(MemoryBackend):
+    """pymem on Windows: one ReadProcessMemory per range."""
+    def __init__(self, process_name):
+        import pymem
+        try:
+            self.pm = pymem.Pymem(process_name)
+        except pymem.exception.ProcessNotFound as e:
+            raise ProcessNotFound(f"{process_name} is not running") from e
+        self.process_id = self.pm.process_id
+        self.process_handle = self.pm.process_handle
+
+    def read_bytes(self, address, length):
+        return self.pm.read_bytes(address, length)
+
+    def read_longlong(self, address):
+        return self.pm.read_longlong(address)
+
+    def regions(self):
+        from scanner import list_regions
+        return list_regions(self.pm)
+
+    def pattern_scan_all(self, pattern, return_multiple=False):
+        return self.pm.pattern_scan_all(pattern, return_multiple=return_multiple)
+
+    def module_base(self, module_name):
+        import pymem.process
+        return pymem.process.module_from_name(self.process_handle, module_name).lpBaseOfDll
+
+    def close(self):
+        self.pm.close_process()
+
+
+# =============================================================================
+# Linux (the game under Proton/Wine is a regular process)
+# =============================================================================
+
+def find_pid(process_name):
+    """
+    PID of the first process whose name or command line mentions `process_name`.
+
+    Under Proton the game shows up as "Sailwind.exe" in /proc/<pid>/comm, or
+    with the Windows path of the executable in its command line.
+    """
+    wanted = process_name.lower()
+    for entry in sorted(os.listdir("/proc"), key=lambda name: (not name.isdigit(), name)):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{entry}/comm", "r") as file:
+                comm = file.read().strip().lower()
+            with open(f"/proc/{entry}/cmdline", "rb") as file:
+                args = file.read().split(b"\0")
+        except OSError:
+            continue
+        program = args[0].decode(errors="ignore").replace("\\", "/").rsplit("/", 1)[-1].lower() if args else ""
+        if comm == wanted[:15] or program == wanted:
+            return int(entry)
+    raise ProcessNotFound(f"{process_name} is not running")
+
+
+def read_maps(pid):
+    """
+    Parses /proc/<pid>/maps.
+
+    Returns:
+        list[tuple[int, int, str, str]]: (start, end, permissions, path) per mapping.
+    """
+    mappings = []
+    with open(f"/proc/{pid}/maps", "r") as file:
+        for line in file:
+            fields = line.split(maxsplit=5)
+            start, end = (int(value, 16) for value in fields[0].split("-"))
+            mappings.append((start, end, fields[1], fields[5].strip() if len(fields) > 5 else ""))
+    return mappings
+
+
+def heap_regions(mappings):
+    """
+    Readable, private, anonymous mappings: where Wine puts the Windows heap.
+
+    The Linux counterpart of scanner.list_regions' private committed regions;
+    file-backed images and kernel pages ([vvar], [vdso]) are skipped.
+    """
+    return [Region(start, end - start) for start, end, perms, path in mappings
+            if perms[0] == "r" and perms[3] == "p" and path in ("", "[heap]")]
+
+
+class LinuxBackend(MemoryBackend):
+    """Shared /proc plumbing for the Linux backends."""
+    def __init__(self, process):
+        if isinstance(process, str) and process.isdigit():
+            process = int(process)
+        self.process_id = process if isinstance(process, int) else find_pid(process)
+        self.process_handle = self.process_id
+        if not os.path.exists(f"/proc/{self.process_id}"):
+            raise ProcessNotFound(f"No process with PID {self.process_id}")
+
+    def regions(self):
+        return heap_regions(read_maps(self.process_id))
+
+    def module_base(self, module_name):
+        """Lowest mapping of a file named `module_name` (case-insensitive), like Windows module bases."""
+        wanted = module_name.lower()
+        bases = [start for start, _, _, path in read_maps(self.process_id)
+                 if path.replace("\\", "/").rsplit("/", 1)[-1].lower() == wanted]
+        if not bases:
+            raise MemoryReadError(f"Module {module_name} not found")
+        return min(bases)
+
+
+_libc = None
+
+
+def _process_vm_readv():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        _libc.process_vm_readv.restype = ctypes.c_ssize_t
+        # struct iovec arrays are passed as flat (base, length) size_t pairs
+        _libc.process_vm_readv.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_ulong,
+                                           ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong]
+    return _libc.process_vm_readv
+
+
+class VmReadvBackend(LinuxBackend):
+    """
+    process_vm_readv(2): up to IOV_MAX ranges per syscall, straight into one buffer.
+
+    Needs the same permission as ptrace (same user and ptrace_scope 0, or
+    CAP_SYS_PTRACE). A range that can't be read ends a call early; it is
+    reported as None and the call resumes after it.
+    """
+    def __init__(self, process):
+        super().__init__(process)
+        self.syscalls = 0
+        self._readv = _process_vm_readv()
+        self._lock = threading.Lock()
+        # Per thread, since the scanner reads from several: the last batch
+        # and its (remote iovecs, their address, buffer, local iovec)
+        self._layouts = threading.local()
+
+    def read_bytes(self, address, length):
+        data = self.read_many([(address, length)])[0]
+        if data is None:
+            raise MemoryReadError(f"Could not read memory at: {address}, length: {length}")
+        return data
+
+    def read_many(self, requests):
+        results = [None] * len(requests)
+        first = 0
+        while first < len(requests):
+            batch = requests[first:first + IOV_MAX]
+            read, buffer = self._read_batch(batch)
+            if read < 0:
+                code = ctypes.get_errno()
+                if code != errno.EFAULT:  # EFAULT: the first range is unmapped, skip it
+                    raise MemoryReadError(f"process_vm_readv failed: {os.strerror(code)}")
+                read = 0
+            # Complete ranges come back in order; the first short one failed
+            data = buffer.raw
+            offset, done = 0, 0
+            for address, length in batch:
+                if offset + length > read:
+                    break
+                results[first + done] = data[offset:offset + length]
+                offset += length
+                done += 1
+            first += done if done == len(batch) else done + 1
+        return results
+
+    def _read_batch(self, batch):
+        # Polling asks for the same ranges every tick, so the iovecs and the
+        # buffer of the thread's last batch are reused
+        layout = getattr(self._layouts, "last", None)
+        if layout is None or layout[0] != batch:
+            remote = np.array(batch, dtype=np.uintp).reshape(-1, 2)
+            total = int(remote[:, 1].sum())
+            buffer = ctypes.create_string_buffer(total)
+            # The kernel fills the local side in order, so one local iovec
+            # covers every remote range
+            local = (ctypes.c_size_t * 2)(ctypes.addressof(buffer), total)
+            layout = self._layouts.last = (list(batch), (remote, remote.ctypes.data, buffer, local))
+        remote, remote_address, buffer, local = layout[1]
+        read = self._readv(self.process_id, local, 1, remote_address, len(remote), 0)
+        with self._lock:
+            self.syscalls += 1
+        return read, buffer
+
+
+class ProcMemBackend(LinuxBackend):
+    """/proc/<pid>/mem with pread: one syscall per range, for kernels or sandboxes without process_vm_readv."""
+    def __init__(self, process):
+        super().__init__(process)
+        try:
+            self._fd = os.open(f"/proc/{self.process_id}/mem", os.O_RDONLY)
+        except OSError as e:
+            raise ProcessNotFound(f"Can't open the memory of PID {self.process_id}: {e}") from e
+
+    def read_bytes(self, address, length):
+        try:
+            data = os.pread(self._fd, length, address)
+        except OSError as e:
+            raise MemoryReadError(f"Could not read memory at: {address}, length: {length}: {e}") from e
+        if len(data) != length:
+            raise MemoryReadError(f"Could not read memory at: {address}, length: {length}")
+        return data
+
+    def close(self):
+        os.close(self._fd)
+
+
+# =============================================================================
+# Snapshot files
+# =============================================================================
+
+def save_snapshot(pm, path, regions=None):
+    """
+    Writes the readable regions of a process to a file SnapshotBackend can open.
+
+    Layout: SNAPSHOT_MAGIC, one JSON header line ({"process_id", "regions":
+    [[base, size], ...]}), then the bytes of every region back to back.
+
+    Args:
+        pm (MemoryBackend or pymem.Pymem): The process to copy.
+        path (str): File to write.
+        regions (list[Region] or None): Regions to copy, default all of pm's.
+
+    Returns:
+        int: Bytes of memory written.
+    """
+    from scanner import list_regions
+    kept, blobs = [], []
+    for base, size in (list_regions(pm) if regions is None else regions):
+        try:
+            blobs.append(pm.read_bytes(base, size))
+        except Exception:
+            continue
+        kept.append([base, size])
+    header = {"process_id": pm.process_id, "regions": kept}
+    with open(path, "wb") as file:
+        file.write(SNAPSHOT_MAGIC)
+        file.write(json.dumps(header).encode("utf-8") + b"\n")
+        for blob in blobs:
+            file.write(blob)
+    return sum(size for _, size in kept)
+
+
+class SnapshotBackend(MemoryBackend):
+    """A save_snapshot() file, memory-mapped; reads never leave the file."""
+    def __init__(self, path):
+        try:
+            self._file = open(path, "rb")
+        except OSError as e:
+            raise ProcessNotFound(f"Can't open snapshot {path}: {e}") from e
+        if self._file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            self._file.close()
+            raise ProcessNotFound(f"{path} is not a memory snapshot")
+        header = json.loads(self._file.readline())
+        data_start = self._file.tell()
+        self.process_id = header.get("process_id")
+        self._regions = [Region(base, size) for base, size in header["regions"]]
+        self._starts = [region.base for region in self._regions]
+        self._offsets = []
+        offset = data_start
+        for region in self._regions:
+            self._offsets.append(offset)
+            offset += region.size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_bytes(self, address, length):
+        i = bisect_right(self._starts, address) - 1
+        if i < 0 or address + length > self._regions[i].base + self._regions[i].size:
+            raise MemoryReadError(f"Could not read memory at: {address}, length: {length}")
+        start = self._offsets[i] + address - self._regions[i].base
+        return self._data[start:start + length]
+
+    def regions(self):
+        return list(self._regions)
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+
+def open_process(process, backend="auto"):
+    """
+    Attaches to the game with the requested backend.
+
+    Args:
+        process (str or int): Process name, or PID on Linux; for "snapshot",
+            the snapshot file.
+        backend (str): One of BACKENDS. "auto" picks pymem on Windows and
+            process_vm_readv (falling back to /proc/<pid>/mem) elsewhere.
+
+    Returns:
+        MemoryBackend: The attached backend.
+
+    Raises:
+        ProcessNotFound: The process isn't running or can't be opened.
+    """
+    if backend == "auto":
+        backend = "pymem" if sys.platform == "win32" else "vm_readv"
+    if backend == "pymem":
+        return PymemBackend(process)
+    if backend == "snapshot":
+        return SnapshotBackend(process)
+    if backend == "procmem":
+        return ProcMemBackend(process)
+    if backend == "vm_readv":
+        pm = VmReadvBackend(process)
+        try:
+            pm.read_many([(region.base, 1) for region in pm.regions()[:1]])
+        except MemoryReadError as e:
+            print(f"Error using process_vm_readv ({e}), falling back to /proc/{pm.process_id}/mem")
+            return ProcMemBackend(pm.process_id)
+        return pm
+    raise ValueError(f"Unknown memory backend: {backend}")
@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import core
+from core import IslandGroups, Products, Player
+from fakeproc import build_process, scaled_groups
+from market_cache import MarketCache
+from snapshot import SUPPLY_ARRAY_OFFSET, SUPPLY_DATA_OFFSET
+import scanner
+
+DEFAULT_OUTPUT = "bench_output.json"
+
+
+def timed(func, repeat, setup=None):
+    """Runs func `repeat` times (after `setup`, untimed) and returns the run times in seconds."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - started)
+    return times, result
+
+
+def summarize(times, **extra):
+    times_ms = sorted(t * 1000 for t in times)
+    return {
+        "runs": len(times_ms),
+        "min_ms": round(times_ms[0], 3),
+        "median_ms": round(statistics.median(times_ms), 3),
+        "mean_ms": round(statistics.fmean(times_ms), 3),
+        "p95_ms": round(times_ms[min(len(times_ms) - 1, int(len(times_ms) * 0.95))], 3),
+        **extra
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(scale=1, image_mb=64, repeat=20, scan_repeat=3, seed=0):
+    """
+    Times the polling pipeline against a synthetic game process.
+
+    Args:
+        scale (int): Copies of the 29 markets.
+        image_mb (int): Size of the process image to scan.
+        repeat (int): Runs of each per-tick benchmark.
+        scan_repeat (int): Runs of the (slow) memory scan benchmarks.
+        seed (int): Seed of the generated image.
+
+    Returns:
+        dict: "meta" (commit, versions, scale, benchmarks skipped and why)
+        and "results", one entry per benchmark with min/median/mean/p95 in
+        milliseconds.
+    """
+    fake, bases = build_process(scale, image_mb, seed)
+    rng = random.Random(seed)
+    player = Player()
+    groups = list(IslandGroups.GROUPS)
+    results = {}
+    skipped = {}
+    saved_groups, saved_cache, saved_count = IslandGroups.GROUPS, core.market_cache, core.MARKET_COUNT
+
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        # The copies are real markets as far as the pipeline is concerned, so
+        # the cache (which only keeps complete sets) covers them too
+        IslandGroups.GROUPS, core.MARKET_COUNT = scaled_groups(scale), len(bases)
+        cache_path = os.path.join(directory, "market_cache.json")
+        try:
+            times, found = timed(lambda: scanner.scan(fake), scan_repeat)
+            results["scan"] = summarize(times, matches=len(found[0]), mib=round(found[1]["bytes"] / 2**20, 1))
+
+            def cold_cache():
+                core.market_cache = MarketCache(cache_path)
+                if os.path.exists(cache_path):
+                    os.remove(cache_path)
+            times, markets = timed(lambda: core.scan_markets(fake), scan_repeat, setup=cold_cache)
+            results["find_markets"] = summarize(times, markets=len(markets))
+            if len(markets) == core.MARKET_COUNT:
+                core.market_cache = MarketCache(cache_path)
+                times, _ = timed(lambda: core.scan_markets(fake), repeat)
+                results["find_markets_cached"] = summarize(times)
+            else:
+                skipped["find_markets_cached"] = f"found {len(markets)} of {core.MARKET_COUNT} markets, nothing cached"
+
+            def update():
+                core.update_markets(markets, player.conversion_rate)
+            fake.reset_counters()
+            times, _ = timed(update, repeat)
+            results["update_products"] = summarize(times, reads_per_tick=fake.reads // repeat)
+
+            def change_one_market():
+                supply_array = fake.read_longlong(rng.choice(bases) + SUPPLY_ARRAY_OFFSET)
+                fake.write_float(supply_array + SUPPLY_DATA_OFFSET + 4 * rng.randrange(len(Products.NAMES)),
+                                 rng.uniform(0, 120))
+                update()
+            times, routes = timed(lambda: core.generate_trade_routes(groups, groups, player, markets), repeat,
+                                  setup=core.route_cache.invalidate)
+            results["generate_trade_routes"] = summarize(times, routes=len(routes))
+            times, _ = timed(lambda: core.generate_trade_routes(groups, groups, player, markets), repeat,
+                             setup=change_one_market)
+            results["generate_trade_routes_one_changed"] = summarize(times)
+
+            times, _ = timed(lambda: sorted(routes, key=lambda x: (x["Start Market"], -x["$Profit"])), repeat)
+            results["sort_routes"] = summarize(times)
+
+            def tick():
+                address = fake.read_longlong(rng.choice(bases) + SUPPLY_ARRAY_OFFSET) + SUPPLY_DATA_OFFSET
+                fake.write_float(address, rng.uniform(0, 120))
+                return core.compute_routes(markets, groups, groups, player)
+            times, _ = timed(tick, repeat)
+            results["compute_routes_tick"] = summarize(times)
+        finally:
+            IslandGroups.GROUPS, core.market_cache, core.MARKET_COUNT = saved_groups, saved_cache, saved_count
+            core.route_cache.invalidate()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "scale": scale,
+            "markets": len(bases),
+            "products": len(Products.NAMES),
+            "image_mb": image_mb,
+            "repeat": repeat,
+            "skipped": skipped
+        },
+        "results": results
+    }
+
+
+def compare(report, baseline):
+    """Prints median times against a previous report."""
+    for key in ("scale", "image_mb"):
+        if baseline.get("meta", {}).get(key) != report["meta"][key]:
+            print(f"Note: the baseline was run with {key}={baseline.get('meta', {}).get(key)}, "
+                  f"this run with {key}={report['meta'][key]}")
+    print(f"{'benchmark':36} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            print(f"{name:36} {'-':>12} {result['median_ms']:>10.3f}ms {'new':>8}")
+            continue
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        print(f"{name:36} {old['median_ms']:>10.3f}ms {result['median_ms']:>10.3f}ms {change:>+7.1f}%")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark market finding, polling and route generation "
+                                                 "against a synthetic game process.")
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the 29 markets (default: 1)")
+    parser.add_argument("--image-mb", type=int, default=64, help="Process image size to scan (default: 64)")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per benchmark (default: 20)")
+    parser.add_argument("--scan-repeat", type=int, default=3, help="Runs of the scan benchmarks (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help=f"JSON results file (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--compare", metavar="BASELINE", help="Print the change against an earlier results file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args.scale, args.image_mb, args.repeat, args.scan_repeat, args.seed)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            compare(report, json.load(file))
+    else:
+        for name, result in report["results"].items():
+            print(f"{name:36} median {result['median_ms']:>10.3f}ms  p95 {result['p95_ms']:>10.3f}ms")
+    for name, reason in report["meta"]["skipped"].items():
+        print(f"{name:36} skipped: {reason}")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import numpy as np
+
+PAIR_CHUNK = 64  # (start, end) pairs optimized per array batch
+
+
+class CargoOptimizer:
+    """
+    Picks a mixed cargo for each (start, end) market pair.
+
+    Every unit of every product is an item: its profit is the per-unit sell
+    price at the end market minus the per-unit buy price at the start,
+    straight from the game's price formula, and it uses mass, volume and
+    principal. Units of a product are bought in order and at most
+    min(available, spread) of them, like single routes.
+
+    Resources that the pair could never exhaust are dropped; the others
+    are normalized to the player's limits and summed into one surrogate
+    cost. Units are ranked by profit per cost (made non-increasing within a
+    product, so the ranking respects the unit order) and taken greedily,
+    skipping units that no longer fit. The best single-product cargo is
+    the fallback, so the result is never worse than the route table.
+
+    The surrogate relaxation also gives a proven upper bound: for any
+    density d >= 0, no cargo beats d * (resources used) + the best prefix
+    of (profit - d * cost) per product. It is evaluated at the density of
+    the first unit that didn't fit and reported as "$Bound".
+    """
+    def __init__(self, engine, pair_chunk=PAIR_CHUNK):
+        self.engine = engine
+        self.pair_chunk = pair_chunk
+
+    def optimize(self, start_markets, end_markets, player):
+        """
+        Best mixed cargo for every start x end market pair.
+
+        Args:
+            start_markets (list[Market]): Markets to buy from.
+            end_markets (list[Market]): Markets to sell at.
+            player (Player): Principal, currency, mass and volume limits;
+                only pairs above min_profit are returned.
+
+        Returns:
+            list[dict]: Per pair: "Start Market", "End Market", "Cargo" (one
+            entry per product with "Product", "Qnty", "$_Buy", "$_Sell" and
+            "$Profit"), the cargo totals "$_Buy", "$_Sell", "$Profit", its
+            "Mass" and "Volume", and "$Bound", an upper bound on any cargo's
+            profit for the pair. Ordered by start market, then end market.
+        """
+        if not start_markets or not end_markets:
+            return []
+        engine = self.engine
+        start_supply = np.array([m.supplies for m in start_markets], dtype=float)
+        end_supply = np.array([m.supplies for m in end_markets], dtype=float)
+        start_limit = np.array([m.limit for m in start_markets], dtype=float)
+
+        # Unit caps and per-unit prices, as deep as the largest cap
+        amnt = engine.available(start_supply, start_limit)
+        spread = np.floor(np.abs(start_supply[:, None, :] - end_supply[None, :, :]) / 2)
+        cap = np.minimum(np.minimum(amnt, engine.cargo(player))[:, None, :], spread).astype(np.intp)
+        np.maximum(cap, 0, out=cap)
+        depth = int(cap.max())
+        buy, peak = engine.buy_curve(start_supply, player.conversion_rate, depth)
+        sell = engine.sell_curve(end_supply, player.conversion_rate, depth)
+
+        # No cargo holds more of a product than the principal buys on its own
+        affordable = (peak <= player.principal).sum(axis=-1) - 1
+        np.minimum(cap, affordable[:, None, :], out=cap)
+        depth = int(cap.max())
+        buy, sell = buy[..., :depth + 1], sell[..., :depth + 1]
+        buy_unit, sell_unit = np.diff(buy, axis=-1), np.diff(sell, axis=-1)
+
+        # Single-product baseline: the route table's best row for each pair
+        _, single_qty, single_buy, single_sell = engine.trades(start_supply, end_supply, start_limit, player)
+        single = np.where(single_qty > 0, single_sell - single_buy, -np.inf)
+
+        limits = np.array([player.mass_limit, player.volume_limit, player.principal], dtype=float)
+        pairs = [(s, e) for s in range(len(start_markets)) for e in range(len(end_markets))
+                 if start_markets[s] is not end_markets[e]]
+        plans = []
+        for first in range(0, len(pairs) if depth else 0, self.pair_chunk):
+            s, e = (np.array(index) for index in zip(*pairs[first:first + self.pair_chunk]))
+            qty, bound = self._greedy(buy_unit[s], sell_unit[e], cap[s, e], limits)
+            p = np.arange(buy.shape[1])
+            greedy_buy = buy[s[:, None], p, qty]
+            greedy_sell = sell[e[:, None], p, qty]
+            greedy = (greedy_sell - greedy_buy).sum(axis=1)
+            for i in range(len(s)):
+                best = int(single[s[i], e[i]].argmax())
+                if single[s[i], e[i], best] > greedy[i]:
+                    cargo = {best: (int(single_qty[s[i], e[i], best]), single_buy[s[i], e[i], best],
+                                    single_sell[s[i], e[i], best])}
+                else:
+                    cargo = {j: (int(qty[i, j]), greedy_buy[i, j], greedy_sell[i, j]) for j in np.flatnonzero(qty[i])}
+                plan = self._plan(start_markets[s[i]], end_markets[e[i]], cargo, amnt[s[i]], bound[i])
+                if plan["Cargo"] and plan["$Profit"] > player.min_profit:
+                    plans.append(plan)
+        return plans
+
+    def _greedy(self, buy_unit, sell_unit, cap, limits):
+        """
+        Greedy cargo and surrogate upper bound for a batch of pairs.
+
+        Args:
+            buy_unit (numpy.ndarray): (pairs, products, depth) unit buy prices.
+            sell_unit (numpy.ndarray): (pairs, products, depth) unit sell prices.
+            cap (numpy.ndarray): (pairs, products) unit caps.
+            limits (numpy.ndarray): Mass, volume and principal.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Units per product (pairs,
+            products) and the profit bound per pair.
+        """
+        n_pairs, n_products, depth = buy_unit.shape
+        engine = self.engine
+        usable = np.arange(depth) < cap[..., None]
+        profit = np.where(usable, sell_unit - buy_unit, 0)
+
+        # Resource use per unit, as a fraction of the player's limits: mass and
+        # volume per product, principal per unit
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per_product = np.nan_to_num(np.stack([engine._weight, engine._volume], axis=-1) / limits[:2],
+                                        nan=0, posinf=np.inf)
+            principal_use = np.where(usable, np.maximum(buy_unit, 0) / limits[2], 0)
+
+        # Resources even the whole positive-profit supply can't exhaust don't bind
+        wanted = usable & (profit > 0)
+        binding = np.column_stack([wanted.sum(axis=-1) @ per_product,
+                                   np.where(wanted, principal_use, 0).sum(axis=(1, 2))]) > 1
+        cost = np.where(binding[:, 2, None, None], principal_use, 0)
+        for resource in range(2):
+            cost = cost + np.where(binding[:, resource, None, None], per_product[:, resource, None], 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            density = np.where(cost > 0, profit / cost, np.inf)
+        density = np.where(wanted, density, -np.inf)
+        density = np.minimum.accumulate(density, axis=-1)
+
+        # Rank the units; any prefix of the ranking keeps each product's unit order
+        order = np.argsort(-density.reshape(n_pairs, -1), axis=1, kind="stable")
+        ranked = np.take_along_axis(density.reshape(n_pairs, -1), order, axis=1)
+        length = int((ranked > -np.inf).sum(axis=1).max())
+        order, ranked = order[:, :length], ranked[:, :length]
+        ranked_product = order // depth
+        ranked_use = np.concatenate([per_product[ranked_product],
+                                     np.take_along_axis(principal_use.reshape(n_pairs, -1), order, axis=1)[..., None]],
+                                    axis=-1)
+
+        # Take the longest prefix that fits; the first unit that doesn't blocks
+        # the rest of its product, and the remaining units get another pass
+        rows = np.arange(n_pairs)
+        grid, position = np.indices((n_pairs, length))
+        candidate = ranked > -np.inf
+        taken = np.zeros_like(candidate)
+        used = np.zeros((n_pairs, 3))
+        critical = np.zeros(n_pairs)
+        rejected = np.zeros(n_pairs, dtype=bool)
+        while length:
+            total = used[:, None, :] + np.cumsum(np.where(candidate[..., None], ranked_use, 0), axis=1)
+            over = candidate & (total > 1 + 1e-9).any(axis=-1)
+            stuck = over.any(axis=1)
+            first = np.where(stuck, over.argmax(axis=1), length)
+            accept = candidate & (np.arange(length) < first[:, None])
+            taken |= accept
+            used += np.where(accept[..., None], ranked_use, 0).sum(axis=1)
+            candidate &= ~accept
+            if not stuck.any():
+                break
+            new = stuck & ~rejected
+            critical[new] = ranked[rows[new], first[new]]
+            rejected |= stuck
+            # The unit that overflowed, and every unit that alone no longer fits
+            # (capacity only shrinks), block the rest of their product
+            miss = candidate & (used[:, None, :] + ranked_use > 1 + 1e-9).any(axis=-1)
+            miss[rows[stuck], first[stuck]] = True
+            blocked_from = np.full((n_pairs, n_products), length)
+            np.minimum.at(blocked_from, (grid[miss], ranked_product[miss]), position[miss])
+            candidate &= position < blocked_from[rows[:, None], ranked_product]
+        qty = np.bincount((rows[:, None] * n_products + ranked_product)[taken],
+                          minlength=n_pairs * n_products).reshape(n_pairs, n_products)
+
+        # Surrogate dual: d * (binding resources) + best prefix of profit - d * cost
+        critical = np.where(np.isfinite(critical), np.maximum(critical, 0), 0)
+        with np.errstate(invalid="ignore"):
+            reduced = np.where(usable, np.where(np.isfinite(cost), profit - critical[:, None, None] * cost, -np.inf), 0)
+        best_prefix = np.maximum(np.cumsum(reduced, axis=-1).max(axis=-1), 0).sum(axis=1)
+        bound = critical * binding.sum(axis=1) + best_prefix
+        return qty, bound
+
+    def _plan(self, start, end, cargo, available, bound):
+        engine = self.engine
+        rows = []
+        for product, (quantity, total_buy, total_sell) in sorted(cargo.items()):
+            rows.append({
+                "Product": engine.names[product],
+                "Qnty": f"{quantity}/{int(available[product])}",
+                "$_Buy": int(total_buy),
+                "$_Sell": int(total_sell),
+                "$Profit": int(total_sell - total_buy)
+            })
+        units = {engine.names[product]: quantity for product, (quantity, _, _) in cargo.items()}
+        return {
+            "Start Market": start.name,
+            "End Market": end.name,
+            "Cargo": rows,
+            "$_Buy": sum(row["$_Buy"] for row in rows),
+            "$_Sell": sum(row["$_Sell"] for row in rows),
+            "$Profit": sum(row["$Profit"] for row in rows),
+            "Mass": round(sum(engine.weights[engine.names.index(name)] * q for name, q in units.items()), 1),
+            "Volume": round(sum(engine.volumes[engine.names.index(name)] * q for name, q in units.items()), 1),
+            "$Bound": int(np.floor(bound + 1e-6))
+        }
@@ -0,0 +1,26 @@
+from core import IslandGroups, Player
+
+
+def resolve_groups(names):
+    """IslandGroups.resolve for command line options: unknown names exit with the error."""
+    try:
+        return IslandGroups.resolve(names)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+def add_player_arguments(parser):
+    """Player settings options, defaulting to player_settings in config.json."""
+    player = Player()
+    parser.add_argument("--principal", type=float, default=player.principal)
+    parser.add_argument("--conversion-rate", type=float, default=player.conversion_rate)
+    parser.add_argument("--mass-limit", type=float, default=player.mass_limit)
+    parser.add_argument("--volume-limit", type=float, default=player.volume_limit)
+    parser.add_argument("--min-profit", type=float, default=player.min_profit)
+
+
+def player_from_args(args):
+    """The Player described by the add_player_arguments options."""
+    player = Player()
+    player.update(args.principal, args.conversion_rate, args.mass_limit, args.volume_limit, args.min_profit)
+    return player
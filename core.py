@@ -0,0 +1,515 @@
+import json
+import math
+import time
+from memhack import read_game_memory
+from snapshot import (supply_block_address, read_supply_block, read_supply_blocks, read_market_name,
+                      SIGNATURE_OFFSET)
+from market_cache import MarketCache
+import scanner
+from pricing import PriceTable, calc_sell_price
+from routes import RouteEngine, RouteCache
+from planner import ChainPlanner
+from cargo import CargoOptimizer
+from recorder import SupplyRecorder
+from ranking import TopK
+from metrics import metrics, MetricsServer
+from scheduler import PollScheduler
+
+# Load config file
+with open("config.json", "r") as file:
+    config = json.load(file)
+
+# Load data from config
+PRODUCTS_DATA = config["products"]
+ISLAND_GROUPS = config["island_groups"]
+PLAYER_SETTINGS = config["player_settings"]
+TABLE_SETTINGS = config.get("table_settings", {})
+HISTORY_SETTINGS = config.get("history_settings", {})
+METRICS_SETTINGS = config.get("metrics_settings", {})
+MEMORY_SETTINGS = config.get("memory_settings", {})
+SHARED_SETTINGS = config.get("shared_settings", {})
+POLL_SETTINGS = config.get("poll_settings", {})
+
+# Use loaded data
+class Products:
+    DATA = PRODUCTS_DATA
+    NAMES = list(DATA.keys())
+    COLUMNS = {name: column for column, name in enumerate(NAMES)}  # Product name -> supply array column
+
+class IslandGroups:
+    GROUPS = ISLAND_GROUPS
+    _index = (None, {})  # (GROUPS it was built from, market name -> group)
+
+    @classmethod
+    def get_group(cls, market_name):
+        groups, index = cls._index
+        if groups is not cls.GROUPS:
+            # Rebuilt when GROUPS is replaced; the first group listing a market wins
+            index = {island: group for group, islands in reversed(list(cls.GROUPS.items())) for island in islands}
+            cls._index = (cls.GROUPS, index)
+        return index.get(market_name)
+
+    @classmethod
+    def resolve(cls, names):
+        """Maps short names ("Al'Ankh") or "all" to the island_groups keys in config.json."""
+        if not names or any(name.lower() == "all" for name in names):
+            return list(cls.GROUPS)
+        groups = []
+        for name in names:
+            matches = [g for g in cls.GROUPS
+                       if g.lower() == name.lower() or g.split(" (Group")[0].lower() == name.lower()]
+            if not matches:
+                raise ValueError(f"Unknown island group: {name}")
+            groups.extend(matches)
+        return groups
+
+MARKET_COUNT = 29
+
+route_cache = RouteCache(RouteEngine(Products.DATA))
+chain_planner = ChainPlanner(route_cache.engine)
+cargo_optimizer = CargoOptimizer(route_cache.engine)
+market_cache = MarketCache()
+known_markets = {}   # (process id, base) -> Market from the last scan, reused by the next one
+selections = {}      # (markets, start groups, end groups) -> (start markets, end markets)
+selections_groups = None  # The IslandGroups.GROUPS `selections` were made with
+metrics.enabled = METRICS_SETTINGS.get("enabled", False)
+metrics.window = METRICS_SETTINGS.get("window", metrics.window)
+
+def create_recorder():
+    """SupplyRecorder configured from history_settings, or None if history is disabled."""
+    if not HISTORY_SETTINGS.get("enabled", False):
+        return None
+    return SupplyRecorder(
+        directory=HISTORY_SETTINGS.get("directory", "history"),
+        ring_size=HISTORY_SETTINGS.get("ring_size", 720),
+        batch_size=HISTORY_SETTINGS.get("batch_size", 12),
+        max_file_bytes=HISTORY_SETTINGS.get("max_file_mb", 32) * 2**20,
+        max_files=HISTORY_SETTINGS.get("max_files", 4)
+    )
+
+def create_scheduler(adaptive=None):
+    """
+    PollScheduler configured from poll_settings, or None for a fixed tick reading every market.
+
+    Args:
+        adaptive (bool or None): Overrides poll_settings.adaptive.
+    """
+    if not (POLL_SETTINGS.get("adaptive", False) if adaptive is None else adaptive):
+        return None
+    return PollScheduler(
+        min_interval=POLL_SETTINGS.get("min_interval", 2),
+        selected_max_interval=POLL_SETTINGS.get("selected_max_interval", 5),
+        max_interval=POLL_SETTINGS.get("max_interval", 60),
+        max_reads_per_second=POLL_SETTINGS.get("max_reads_per_second", 6)
+    )
+
+def start_metrics_server(port=None):
+    """
+    Serves the pipeline metrics on localhost in Prometheus text format.
+
+    Args:
+        port (int or None): Port to listen on, default metrics_settings.port.
+
+    Returns:
+        MetricsServer or None: The running server, or None if no port is
+        configured or it couldn't be bound.
+    """
+    port = METRICS_SETTINGS.get("port", 0) if port is None else port
+    if not port:
+        return None
+    metrics.enabled = True
+    server = MetricsServer(metrics, port)
+    return server if server.start() else None
+
+# =============================================================================
+# Core Classes
+# =============================================================================
+
+class Product:
+    """
+    Represents a product and its pricing/supply calculations.
+
+    A view on one column of its market's supply array: supply, prices and
+    the cumulative price table are derived from the market's current
+    supplies and conversion rate when asked for, so a refresh only swaps
+    the market's array and no per-product work happens until the scalar
+    helpers are used.
+    """
+    __slots__ = ("market", "column", "name", "volume", "weight", "raw_price", "_prices")
+
+    def __init__(self, market, column):
+        self.market = market
+        self.column = column
+        self.name = Products.NAMES[column]
+        self.volume, self.weight, self.raw_price = Products.DATA[self.name]
+        self._prices = (None, None)
+
+    @property
+    def supply(self):
+        return self.market.supplies[self.column]
+
+    @property
+    def supply_address(self):
+        return self.market.supply_address + self.column * 4
+
+    @property
+    def limit(self):
+        return self.market.limit
+
+    @property
+    def amnt(self):
+        return max(0, math.floor(self.supply - self.limit + 1))
+
+    @property
+    def base_price(self):
+        return self.raw_price * self.market.conversion_rate
+
+    @property
+    def sell_price(self):
+        return self.calc_sell_price(self.supply)
+
+    @property
+    def buy_price(self):
+        return math.ceil(self.sell_price * 1.023)
+
+    @property
+    def prices(self):
+        # One table per (supply, price) snapshot, shared by every route using it
+        key = (self.supply, self.base_price, self.limit)
+        if self._prices[0] != key:
+            self._prices = (key, PriceTable(self.base_price, self.supply, self.amnt))
+        return self._prices[1]
+
+    def calc_sell_price(self, supply):
+        return calc_sell_price(self.base_price, supply)
+
+    def calculate_buy_mult(self, quantity):
+        return self.prices.buy_total(quantity)
+
+    def calculate_sell_mult(self, quantity):
+        return self.prices.sell_total(quantity)
+
+    def max_quantity(self, player, quantity_type="principal"):
+        if quantity_type == "mass":
+            return math.floor(player.mass_limit / self.weight)
+        elif quantity_type == "volume":
+            return math.floor(player.volume_limit / self.volume)
+        elif quantity_type == "principal":
+            return self.prices.max_affordable(player.principal)
+
+    def max_quantity_mass(self, player):
+        return self.max_quantity(player, "mass")
+
+    def max_quantity_volume(self, player):
+        return self.max_quantity(player, "volume")
+
+    def max_quantity_principal(self, player):
+        return self.max_quantity(player, "principal")
+
+class Market:
+    """Represents a market in the game."""
+    def __init__(self, pm, base):
+        self.pm = pm
+        self.base = base
+        self.name = self._get_market_name()
+        self.index = read_game_memory(pm, pm.read_longlong(base + 0x38) + 0x58, 'int')
+        self.group = IslandGroups.get_group(self.name)
+        self.conversion_rate = 311
+        self.products = self._init_products()
+
+    def _get_market_name(self):
+        return read_market_name(self.pm, self.base)
+
+    def _init_products(self):
+        self.refresh()
+        return [Product(self, column) for column in range(len(Products.NAMES))]
+
+    def refresh(self):
+        """Re-reads the limit, the supply array pointer and the supplies (after a re-scan)."""
+        self.limit = read_game_memory(self.pm, self.base + 0x4C, 'float')
+        self.supply_address = supply_block_address(self.pm, self.base)
+        supplies = read_supply_block(self.pm, self.supply_address, len(Products.NAMES))
+        self.supplies = supplies
+        self.fingerprint = hash(supplies.tobytes())
+
+    def product(self, name):
+        """The product called `name`, or None."""
+        column = Products.COLUMNS.get(name)
+        return None if column is None else self.products[column]
+
+    def update_products(self, conversion_rate):
+        self.apply_supplies(self.read_supplies(), conversion_rate)
+
+    def read_supplies(self):
+        # One read for the whole supply array instead of one per product
+        return read_supply_block(self.pm, self.supply_address, len(self.products))
+
+    def apply_supplies(self, supplies, conversion_rate):
+        """Takes supplies returned by read_supplies(); the products reprice from them lazily."""
+        if supplies is None:
+            return
+        self.supplies = supplies
+        self.fingerprint = hash(supplies.tobytes())
+        self.conversion_rate = conversion_rate
+
+    def export(self):
+        """Name, limit and product supplies as plain JSON types."""
+        return {
+            "name": self.name,
+            "limit": float(self.limit),
+            "products": dict(zip(Products.NAMES, map(float, self.supplies)))
+        }
+
+class Player:
+    def __init__(self):
+        self.principal = PLAYER_SETTINGS["principal"]
+        self.conversion_rate = PLAYER_SETTINGS["conversion_rate"]
+        self.mass_limit = PLAYER_SETTINGS["mass_limit"]
+        self.volume_limit = PLAYER_SETTINGS["volume_limit"]
+        self.min_profit = PLAYER_SETTINGS["min_profit"]
+
+    def update(self, principal, conversion_rate, mass_limit, volume_limit, min_profit):
+        self.principal = principal
+        self.conversion_rate = conversion_rate
+        self.mass_limit = mass_limit
+        self.volume_limit = volume_limit
+        self.min_profit = min_profit
+
+    def __repr__(self):
+        # Print float values without decimals
+        return (f"Player:\n Principal: {self.principal:.0f}\n Currency: {self.conversion_rate}\n "
+                f"Mass: {self.mass_limit:.0f}\n Volume: {self.volume_limit:.0f}")
+
+# =============================================================================
+# Helper Functions
+# =============================================================================
+
+def scan_markets(pm, recorder=None):
+    """
+    Locate all markets, reusing cached addresses when they still check out.
+    Returns the markets found; a full set starts a new file in `recorder`.
+    """
+    if hasattr(pm, "markets"):
+        # A shared.Subscriber hands out the markets its publisher found; nothing to scan
+        markets = pm.markets()
+        selections.clear()
+        if recorder and len(markets) == MARKET_COUNT:
+            recorder.start([m.name for m in markets], Products.NAMES, [m.limit for m in markets])
+        return markets
+    # Cached addresses from the last scan of this game process are re-checked
+    # first; the full memory scan only runs if any market is missing.
+    bases, stale = market_cache.load(pm)
+    if len(bases) == MARKET_COUNT:
+        print('♻️ Reusing cached market addresses')
+    else:
+        print(f'🔍 Scanning for Markets... ({len(bases)} cached, {stale} stale)')
+        with metrics.stage("scan"):
+            found, stats = scanner.scan(pm)
+        metrics.count("reads", stats["chunks"])
+        metrics.count("bytes_read", stats["bytes"])
+        print(f"   {stats['regions']} regions, {stats['bytes'] / 2**20:.0f} MiB in {stats['total_time']:.2f}s "
+              f"(list {stats['list_time']:.2f}s, read {stats['read_time']:.2f}s, match {stats['match_time']:.2f}s)")
+        found = [addr - SIGNATURE_OFFSET for addr in found]
+        bases = sorted(set(bases).union(found))
+    markets = [reuse_market(pm, base) or Market(pm, base) for base in bases]
+    known_markets.clear()
+    known_markets.update(((pm.process_id, m.base), m) for m in markets)
+    selections.clear()
+    if len(markets) == MARKET_COUNT:
+        market_cache.save(pm, markets)
+        if recorder:
+            recorder.start([m.name for m in markets], Products.NAMES, [m.limit for m in markets])
+    return markets
+
+def reuse_market(pm, base):
+    """
+    The Market at `base` from the previous scan, refreshed, or None.
+
+    Only the name is checked (it is what tells markets apart); the supply
+    array pointer and limit are re-read, the product views are kept.
+    """
+    market = known_markets.get((pm.process_id, base))
+    if market is None or read_market_name(pm, base) != market.name:
+        return None
+    market.pm = pm
+    market.group = IslandGroups.get_group(market.name)
+    market.refresh()
+    return market
+
+def select_markets(markets, start_groups, end_groups):
+    """
+    Start and end markets of a group selection, memoized per selection.
+
+    A repeated selection of the same markets is a dict hit, so a refresh
+    compares no names. The memo is dropped when IslandGroups.GROUPS is
+    replaced, and a new selection looks the markets' groups up again.
+    """
+    global selections_groups
+    if selections_groups is not IslandGroups.GROUPS:
+        selections.clear()
+        selections_groups = IslandGroups.GROUPS
+    key = (tuple(markets), tuple(start_groups), tuple(end_groups))
+    selection = selections.get(key)
+    if selection is None:
+        if len(selections) >= 64:
+            selections.clear()
+        start_groups, end_groups = set(start_groups), set(end_groups)
+        for market in markets:
+            market.group = IslandGroups.get_group(market.name)
+        selection = ([m for m in markets if m.group in start_groups], [m for m in markets if m.group in end_groups])
+        selections[key] = selection
+    return selection
+
+def update_markets(markets, conversion_rate):
+    """
+    Reads every market's supplies and reprices its products.
+
+    Markets attached to the same process are read with one batched call
+    (read_supply_blocks), so a tick costs a handful of syscalls on backends
+    with read_many.
+    """
+    with metrics.stage("read"):
+        supplies = {}
+        by_process = {}
+        stats = {"reads": 0, "bytes": 0}
+        for market in markets:
+            by_process.setdefault(id(market.pm), []).append(market)
+        for group in by_process.values():
+            blocks = read_supply_blocks(group[0].pm, [m.supply_address for m in group], len(Products.NAMES), stats)
+            supplies.update(zip(map(id, group), blocks))
+    metrics.count("reads", stats["reads"])
+    metrics.count("bytes_read", stats["bytes"])
+    with metrics.stage("pricing"):
+        for market in markets:
+            market.apply_supplies(supplies[id(market)], conversion_rate)
+
+def export_markets(markets, timestamp=None):
+    """One snapshot of every market's products, in the format replay.load_dump reads."""
+    return {
+        "time": time.time() if timestamp is None else timestamp,
+        "markets": [market.export() for market in markets]
+    }
+
+def calculate_trade_metrics(start_market, end_market, product, player):
+    start_product = start_market.product(product.name)
+    end_product = end_market.product(product.name)
+    if not start_product or not end_product:
+        return None
+    max_qty = min(
+        start_product.max_quantity(player, "principal"),
+        start_product.max_quantity(player, "mass"),
+        start_product.max_quantity(player, "volume"),
+        math.floor((abs(start_product.supply - end_product.supply) / 2))
+    )
+    if max_qty == 0:
+        return None
+    total_buy_price = start_product.calculate_buy_mult(max_qty)
+    total_sell_price = end_product.calculate_sell_mult(max_qty)
+    profit = total_sell_price - total_buy_price
+    profit_per_pound = profit / (start_product.weight * max_qty) if start_product.weight else 0
+    profit_per_item = profit / max_qty if max_qty else 0
+    return {
+        "Start Market": start_market.name,
+        "End Market": end_market.name,
+        "Product": product.name,
+        "Qnty": f"{max_qty}/{start_product.amnt}",
+        "$_Buy": total_buy_price,
+        "$_Sell": total_sell_price,
+        "$Profit": profit,
+        "$/Pound": round(profit_per_pound, 1),
+        "$/Item": round(profit_per_item, 1)
+    }
+
+def generate_trade_routes(start_groups, end_groups, player, markets):
+    start_markets, end_markets = select_markets(markets, start_groups, end_groups)
+    with metrics.stage("routes"):
+        routes = route_cache.generate(start_markets, end_markets, player)
+    metrics.count("routes_evaluated", route_cache.stats["recomputed"] * len(Products.NAMES))
+    metrics.count("routes_emitted", len(routes))
+    return routes
+
+def rank_trade_routes(start_groups, end_groups, player, markets, sort_key="$Profit", top=50, per_start=False):
+    """
+    The best `top` routes by `sort_key`, without building or sorting the full table.
+
+    Args:
+        start_groups (list[str]): Island groups to buy in.
+        end_groups (list[str]): Island groups to sell in.
+        player (Player): Principal, currency, cargo limits and min_profit.
+        markets (list[Market]): Markets with fresh supplies.
+        sort_key (str): One of ranking.SORT_KEYS.
+        top (int): Routes to keep (per start market with per_start).
+        per_start (bool): Rank each start market separately; the result is
+            grouped by start market name.
+
+    Returns:
+        list[dict]: Route rows, best first.
+    """
+    start_markets, end_markets = select_markets(markets, start_groups, end_groups)
+    ranking = TopK(top, [sort_key], per_start)
+    with metrics.stage("routes"):
+        pushed = route_cache.rank(start_markets, end_markets, player, ranking)
+    metrics.count("routes_evaluated", route_cache.stats["recomputed"] * len(Products.NAMES))
+    metrics.count("routes_ranked", pushed)
+    with metrics.stage("rank"):
+        routes = ranking.ranked(sort_key)
+    metrics.count("routes_emitted", len(routes))
+    return routes
+
+def generate_trade_chains(start_groups, end_groups, player, markets, hops=3, top=10):
+    """Best multi-hop chains starting in start_groups, with every leg ending in end_groups."""
+    start_markets, end_markets = select_markets(markets, start_groups, end_groups)
+    return chain_planner.plan(start_markets, end_markets, player, hops, top)
+
+def generate_cargo_plans(start_groups, end_groups, player, markets):
+    """Best mixed cargo for every start/end market pair of the selected groups."""
+    start_markets, end_markets = select_markets(markets, start_groups, end_groups)
+    return cargo_optimizer.optimize(start_markets, end_markets, player)
+
+def poll_markets(markets, start_groups, end_groups, player, recorder=None, publisher=None, alerts=None,
+                 scheduler=None):
+    """
+    Read fresh supplies and record and publish them, without building routes.
+
+    A shared.SnapshotPublisher in `publisher` gets every tick, and an
+    alerts.AlertEngine in `alerts` re-checks the rules its changed supplies
+    affect. With a scheduler.PollScheduler only the markets it finds due
+    among the selected groups are read.
+    """
+    if scheduler:
+        start_markets, end_markets = select_markets(markets, start_groups, end_groups)
+        due = scheduler.due(markets, start_markets + end_markets)
+        update_markets(due, player.conversion_rate)
+        scheduler.observe(due)
+        for market in markets:
+            market.conversion_rate = player.conversion_rate  # Markets not read this tick still reprice
+    else:
+        update_markets(markets, player.conversion_rate)
+    if recorder and recorder.market_names == [m.name for m in markets]:
+        with metrics.stage("record"):
+            recorder.append([m.supplies for m in markets])
+    if publisher:
+        with metrics.stage("publish"):
+            publisher.publish(markets)
+    if alerts:
+        with metrics.stage("alerts"):
+            alerts.update(markets, player)
+
+def compute_routes(markets, start_groups, end_groups, player, recorder=None, sort_key="$Profit", top=0,
+                   per_start=True, publisher=None, alerts=None, scheduler=None):
+    """
+    Read fresh supplies, record and publish them and build the sorted route table.
+
+    Routes are ordered by `sort_key`, best first, within each start market
+    (per_start) or overall. With `top`, only the best `top` routes (per start
+    market) are kept, through rank_trade_routes. The other arguments are
+    passed on to poll_markets.
+    """
+    poll_markets(markets, start_groups, end_groups, player, recorder, publisher, alerts, scheduler)
+    if top:
+        return rank_trade_routes(start_groups, end_groups, player, markets, sort_key, top, per_start)
+    routes = generate_trade_routes(start_groups, end_groups, player, markets)
+    with metrics.stage("sort"):
+        if per_start:
+            return sorted(routes, key=lambda x: (x["Start Market"], -x[sort_key]))
+        return sorted(routes, key=lambda x: -x[sort_key])
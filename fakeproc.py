@@ -0,0 +1,189 @@
+import os
+import random
+import re
+import struct
+
+from core import IslandGroups, Products
+from scanner import Region
+from snapshot import (SUPPLY_ARRAY_OFFSET, NAME_OBJECT_OFFSET, LIMIT_OFFSET,
+                      SIGNATURE_OFFSET, SUPPLY_DATA_OFFSET)
+
+
+class FakeMemoryError(Exception):
+    """Raised when reading outside the fake process image."""
+
+
+class FakeProcess:
+    """
+    Minimal stand-in for pymem.Pymem backed by an in-memory image.
+
+    Only implements the read/write calls this project uses. Every read is
+    counted so callers can compare how many cross-process reads a code path
+    would issue against the real game.
+    """
+    def __init__(self, base_address=0x10000000, size=0x10000, process_id=None):
+        self.process_id = os.getpid() if process_id is None else process_id
+        self.process_handle = self.process_id
+        self.base_address = base_address
+        self.image = bytearray(size)
+        self._next_free = base_address
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.reads = 0
+        self.bytes_read = 0
+        self.scans = 0
+
+    # -------------------------------------------------------------------------
+    # Image building
+    # -------------------------------------------------------------------------
+
+    def alloc(self, size, align=8):
+        """Reserves `size` bytes in the image and returns their address."""
+        address = (self._next_free + align - 1) // align * align
+        end = address + size - self.base_address
+        if end > len(self.image):
+            self.image.extend(bytes(end - len(self.image)))
+        self._next_free = address + size
+        return address
+
+    def write_bytes(self, address, data, length=None):
+        data = bytes(data)[:length]
+        offset = self._offset(address, len(data))
+        self.image[offset:offset + len(data)] = data
+
+    def write_int(self, address, value):
+        self.write_bytes(address, struct.pack('<i', value))
+
+    def write_float(self, address, value):
+        self.write_bytes(address, struct.pack('<f', value))
+
+    def write_longlong(self, address, value):
+        self.write_bytes(address, struct.pack('<q', value))
+
+    # -------------------------------------------------------------------------
+    # pymem-compatible reads
+    # -------------------------------------------------------------------------
+
+    def _offset(self, address, length):
+        offset = address - self.base_address
+        if offset < 0 or offset + length > len(self.image):
+            raise FakeMemoryError(f"Could not read memory at: {address}, length: {length}")
+        return offset
+
+    def read_bytes(self, address, length):
+        offset = self._offset(address, length)
+        self.reads += 1
+        self.bytes_read += length
+        return bytes(self.image[offset:offset + length])
+
+    def read_many(self, requests):
+        """Reads several ranges, counted as one read like one process_vm_readv call."""
+        results = []
+        for address, length in requests:
+            try:
+                offset = self._offset(address, length)
+            except FakeMemoryError:
+                results.append(None)
+                continue
+            self.bytes_read += length
+            results.append(bytes(self.image[offset:offset + length]))
+        self.reads += 1
+        return results
+
+    def read_int(self, address):
+        return struct.unpack('<i', self.read_bytes(address, 4))[0]
+
+    def read_long(self, address):
+        return struct.unpack('<l', self.read_bytes(address, 4))[0]
+
+    def read_float(self, address):
+        return struct.unpack('<f', self.read_bytes(address, 4))[0]
+
+    def read_longlong(self, address):
+        return struct.unpack('<q', self.read_bytes(address, 8))[0]
+
+    def regions(self):
+        return [Region(self.base_address, len(self.image))]
+
+    def pattern_scan_all(self, pattern, return_multiple=False):
+        self.scans += 1
+        found = [self.base_address + match.start()
+                 for match in re.finditer(pattern, self.image, re.DOTALL)]
+        if return_multiple:
+            return found
+        return found[0] if found else None
+
+
+def add_market(fake, name, index, limit, supplies):
+    """
+    Lays out a market object in a FakeProcess the way the game does.
+
+    Args:
+        fake (FakeProcess): The image to write into.
+        name (str): Market name, stored as a managed UTF-16 string.
+        index (int): Island index stored on the island object.
+        limit (float): Minimum supply the market keeps.
+        supplies (list[float]): Supply of every product, in config order.
+
+    Returns:
+        int: The market's base address.
+    """
+    # Managed string: length at +0x10, UTF-16 characters from +0x14
+    encoded = name.encode('utf-16-le')
+    string = fake.alloc(0x14 + len(encoded))
+    fake.write_int(string + 0x10, len(name))
+    fake.write_bytes(string + 0x14, encoded)
+
+    island = fake.alloc(0x60)
+    fake.write_longlong(island + 0x18, string)
+    fake.write_int(island + 0x58, index)
+
+    supply_array = fake.alloc(SUPPLY_DATA_OFFSET + 4 * len(supplies))
+    fake.write_bytes(supply_array + SUPPLY_DATA_OFFSET, struct.pack(f'<{len(supplies)}f', *supplies))
+
+    base = fake.alloc(0x68)
+    fake.write_longlong(base + SUPPLY_ARRAY_OFFSET, supply_array)
+    fake.write_longlong(base + NAME_OBJECT_OFFSET, island)
+    fake.write_float(base + LIMIT_OFFSET, limit)
+    # Scan signature; its first two bytes overlap the upper half of the limit float
+    fake.write_bytes(base + SIGNATURE_OFFSET + 2,
+                     b"\x00\x00\x80\x3F\x00\x00\x00\x42\x01\x00\x00\x00\x6F\x12\x83\x3A\x00\x00\x80\x3F")
+    return base
+
+
+def market_names(scale):
+    """Config market names, repeated `scale` times with " #2", " #3", ... suffixes."""
+    names = [name for islands in IslandGroups.GROUPS.values() for name in islands]
+    return [name if copy == 1 else f"{name} #{copy}" for copy in range(1, scale + 1) for name in names]
+
+
+def scaled_groups(scale):
+    """island_groups with the copies of each market added to its group."""
+    return {group: [name if copy == 1 else f"{name} #{copy}" for copy in range(1, scale + 1) for name in islands]
+            for group, islands in IslandGroups.GROUPS.items()}
+
+
+def build_process(scale=1, image_mb=64, seed=0):
+    """
+    A FakeProcess with 29 * scale markets spread over `image_mb` MiB of noise.
+
+    Markets use the game's layout (supply array at +0x20, island object at
+    +0x38, limit at +0x4C, scan signature at +0x4E), so the scanner and
+    Market read them exactly like the real thing.
+
+    Returns:
+        tuple[FakeProcess, list[int]]: The process and the market bases.
+    """
+    rng = random.Random(seed)
+    names = market_names(scale)
+    size = image_mb * 2**20
+    fake = FakeProcess(size=size)
+    fake.image[:] = rng.randbytes(size)
+    gap = size // (len(names) + 1)
+    bases = []
+    for index, name in enumerate(names):
+        fake.alloc(rng.randrange(gap // 2, gap))
+        supplies = [rng.choice([rng.uniform(0, 40), rng.uniform(40, 120), 0.5]) for _ in Products.NAMES]
+        bases.append(add_market(fake, name, index % 29, 1.0, supplies))
+    return fake, bases
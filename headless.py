@@ -0,0 +1,198 @@
+import time
+
+STARTED = time.perf_counter()  # Before the heavy imports, for the cold start measurement
+
+import argparse
+import contextlib
+import json
+import sys
+
+from alerts import create_alert_engine, format_alert, parse_rule
+from backends import BACKENDS, ProcessNotFound, open_process, save_snapshot
+from cli import add_player_arguments, player_from_args, resolve_groups
+from ranking import SORT_KEYS, top_routes
+from shared import SHARED_NAME, Subscriber, create_publisher
+from core import (MARKET_COUNT, MEMORY_SETTINGS, scan_markets, poll_markets, compute_routes, create_recorder, create_scheduler, export_markets,
+                  generate_trade_chains, generate_cargo_plans, start_metrics_server)
+
+STARTUP_BUDGET = 1.5  # Seconds to the first routes, with cached market addresses
+
+
+def resolve_rules(texts):
+    try:
+        return [parse_rule(text) for text in texts]
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream ranked Sailwind trade routes as NDJSON without the GUI.")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls (default: 5)")
+    parser.add_argument("--once", action="store_true", help="Poll once, print the routes and exit")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Poll each market on its own schedule (poll_settings) instead of every --interval; "
+                             "emits whenever a market was due")
+    parser.add_argument("-o", "--output", help="Append to this file instead of writing to stdout")
+    parser.add_argument("--start", nargs="+", default=["Al'Ankh"], metavar="GROUP",
+                        help="Start island groups, or 'all' (default: Al'Ankh)")
+    parser.add_argument("--end", nargs="+", default=["all"], metavar="GROUP",
+                        help="End island groups, or 'all' (default: all)")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="$Profit", help="Ranking column (default: $Profit)")
+    parser.add_argument("--top", type=int, default=0, help="Only emit the best N routes per poll (default: all)")
+    parser.add_argument("--per-start", action="store_true",
+                        help="Rank each start market separately (--top N per start market)")
+    parser.add_argument("--hops", type=int, default=1,
+                        help="Emit multi-hop chains of up to this many legs instead of routes (default: 1)")
+    parser.add_argument("--mixed", action="store_true",
+                        help="Emit the best mixed cargo per market pair instead of single-product routes")
+    add_player_arguments(parser)
+    parser.add_argument("--alert", action="append", default=[], metavar="RULE",
+                        help="Watch a condition, e.g. \"Gold from Al'Ankh to Fire Fish Lagoon $Profit > 5000\" "
+                             "or \"Truffles supply at Oasis < 2\" (repeatable; adds to alert_settings.rules)")
+    parser.add_argument("--alerts-output", metavar="FILE",
+                        help="Append alert events (NDJSON) to FILE instead of the routes output")
+    parser.add_argument("--dump", help="Also append every tick's market supplies to this file (NDJSON, for replay.py)")
+    parser.add_argument("--process", default=MEMORY_SETTINGS.get("process", "Sailwind.exe"),
+                        help="Game process name, PID (Linux) or snapshot file (--backend snapshot)")
+    parser.add_argument("--backend", choices=BACKENDS, default=MEMORY_SETTINGS.get("backend", "auto"),
+                        help="Memory reader (default: memory_settings.backend, auto = pymem on Windows, "
+                             "process_vm_readv on Linux)")
+    parser.add_argument("--save-snapshot", metavar="FILE",
+                        help="Copy the game's heap regions to FILE for --backend snapshot, then exit")
+    parser.add_argument("--publish", nargs="?", const=SHARED_NAME, metavar="NAME",
+                        help=f"Publish every tick to shared memory NAME for other watchers (default name: {SHARED_NAME}; "
+                             "off unless given or shared_settings.publish is set)")
+    parser.add_argument("--subscribe", nargs="?", const=SHARED_NAME, metavar="NAME",
+                        help="Read the ticks another watcher publishes instead of the game; "
+                             "emits once per new tick and ignores --interval")
+    parser.add_argument("--no-history", action="store_true", help="Don't record supply history")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve per-stage timings at http://127.0.0.1:PORT/metrics (default: metrics_settings.port)")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET,
+                        help=f"Warn if the first output takes longer than this many seconds (default: {STARTUP_BUDGET})")
+    return parser.parse_args(argv)
+
+
+def rank(routes, sort_key, top=0):
+    if top:
+        return top_routes(routes, sort_key, top)
+    return sorted(routes, key=lambda route: -route[sort_key])
+
+
+def write_routes(out, tick, routes):
+    now = round(time.time(), 3)
+    for position, route in enumerate(routes, 1):
+        out.write(json.dumps({"tick": tick, "time": now, "rank": position, **route}, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def write_alerts(out, events):
+    for event in events:
+        print(f"🔔 {format_alert(event)}")
+        out.write(json.dumps(event, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    player = player_from_args(args)
+    start_groups, end_groups = resolve_groups(args.start), resolve_groups(args.end)
+    recorder = None if args.no_history else create_recorder()
+    rules = resolve_rules(args.alert)
+
+    stdout = sys.stdout
+    # Progress messages from the core go to stderr; stdout only carries NDJSON
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            pm = Subscriber(args.subscribe) if args.subscribe else open_process(args.process, args.backend)
+        except ProcessNotFound as e:
+            print(f"Error: {e}. Please start the game and try again.")
+            return 1
+        if args.subscribe and not pm.wait(0, timeout=max(30.0, 3 * args.interval)):
+            print(f"Error: nothing published to '{args.subscribe}' yet")
+            return 1
+        if args.save_snapshot:
+            size = save_snapshot(pm, args.save_snapshot)
+            print(f"Saved {size / 2**20:.0f} MiB of process memory to {args.save_snapshot}")
+            return 0
+
+        metrics_server = start_metrics_server(args.metrics_port)
+        publisher = create_publisher(args.publish)
+        alert_engine = create_alert_engine(rules)
+        scheduler = create_scheduler(True) if args.adaptive else None
+        out = open(args.output, "a", encoding="utf-8") if args.output else stdout
+        dump = open(args.dump, "a", encoding="utf-8") if args.dump else None
+        alerts_out = open(args.alerts_output, "a", encoding="utf-8") if args.alerts_output else out
+        markets = []
+        tick = 0
+        try:
+            markets = scan_markets(pm, recorder)
+            if len(markets) != MARKET_COUNT:
+                print(f'⚠️ Found {len(markets)} markets. Exiting...')
+                return 1
+            while True:
+                polled = time.monotonic()
+                if args.subscribe:
+                    sequence = pm.sequence
+                    if pm.meta is not pm.refresh_meta():
+                        markets = scan_markets(pm, recorder)  # The publisher re-scanned
+                if args.mixed or args.hops > 1:
+                    # Only the cargo plans or chains are emitted, so no route table is built
+                    poll_markets(markets, start_groups, end_groups, player, recorder, publisher, alert_engine,
+                                 scheduler)
+                    if args.mixed:
+                        plans = generate_cargo_plans(start_groups, end_groups, player, markets)
+                        write_routes(out, tick, rank(plans, "$Profit", args.top))
+                    else:
+                        write_routes(out, tick, generate_trade_chains(start_groups, end_groups, player, markets,
+                                                                      args.hops, args.top or 10))
+                else:
+                    # Bounded top-N ranking unless every route is wanted
+                    write_routes(out, tick, compute_routes(markets, start_groups, end_groups, player, recorder,
+                                                           args.sort, args.top, args.per_start, publisher,
+                                                           alert_engine, scheduler))
+                if alert_engine:
+                    write_alerts(alerts_out, alert_engine.drain())
+                if dump:
+                    dump.write(json.dumps(export_markets(markets), ensure_ascii=False) + "\n")
+                    dump.flush()
+                if tick == 0:
+                    elapsed = time.perf_counter() - STARTED
+                    status = "within" if elapsed <= args.budget else "OVER"
+                    print(f"First output after {elapsed * 1000:.0f} ms ({status} the {args.budget:.1f}s budget)")
+                tick += 1
+                if args.once:
+                    break
+                if args.subscribe:
+                    pm.wait(sequence)
+                elif scheduler:
+                    time.sleep(max(scheduler.until_next_due(), 0.05))
+                else:
+                    time.sleep(max(0.0, args.interval - (time.monotonic() - polled)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if recorder:
+                recorder.close()
+            if out is not stdout:
+                out.close()
+            if dump:
+                dump.close()
+            if alerts_out is not out:
+                alerts_out.close()
+            if metrics_server:
+                metrics_server.stop()
+            if publisher:
+                publisher.close()
+            if scheduler:
+                report = scheduler.report()
+                stalest = max(report["markets"].items(), key=lambda item: item[1]["staleness"], default=None)
+                print(f"Adaptive polling: {report['reads']} market reads, "
+                      f"{report['average_reads_per_second']:.2f}/s ({len(markets) / args.interval:.2f}/s "
+                      f"with a fixed {args.interval:g}s tick), {report['deferred']} deferred by the budget"
+                      + (f", stalest {stalest[0]} {stalest[1]['staleness']:.0f}s" if stalest else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
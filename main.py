@@ -1,232 +1,62 @@
 import tkinter as tk
 import ctypes
 import os
-import struct
-import math
-import pymem
-import json
+import copy
 from tkinter import ttk
 from PIL import Image, ImageTk
-from memhack import read_game_memory
-
-# Load config file
-with open("config.json", "r") as file:
-    config = json.load(file)
-
-# Load data from config
-PRODUCTS_DATA = config["products"]
-ISLAND_GROUPS = config["island_groups"]
-PLAYER_SETTINGS = config["player_settings"]
-
-# Use loaded data
-class Products:
-    DATA = PRODUCTS_DATA
-    NAMES = list(DATA.keys())
-
-class IslandGroups:
-    GROUPS = ISLAND_GROUPS
-
-    @classmethod
-    def get_group(cls, market_name):
-        for group, islands in cls.GROUPS.items():
-            if market_name in islands:
-                return group
-        return None
+from alerts import create_alert_engine, format_alert
+from backends import open_process, ProcessNotFound
+from core import (Player, MARKET_COUNT, TABLE_SETTINGS, MEMORY_SETTINGS, SHARED_SETTINGS, scan_markets,
+                  compute_routes, create_recorder, create_scheduler, start_metrics_server)
+from metrics import metrics, format_stats
+from ranking import SORT_KEYS
+from sampler import Sampler
+from shared import SHARED_NAME, Subscriber, create_publisher
+from table import RouteTable
+
+recorder = create_recorder()
+metrics_server = start_metrics_server()
+publisher = create_publisher()
+alert_engine = create_alert_engine()
+scheduler = create_scheduler()
+toasts = []
 
 # =============================================================================
-# Core Classes
+# GUI Helper Functions
 # =============================================================================
 
-class Product:
-    """Represents a product and its pricing/supply calculations."""
-    def __init__(self, name, supply_address, pm, limit):
-        self.name = name
-        self.supply_address = supply_address
-        self.pm = pm
-        self.limit = limit
-        self.volume, self.weight, self.raw_price = Products.DATA[name]
-        self.update_product()
-
-    def update_product(self, conversion_rate=311):
-        self.supply = read_game_memory(self.pm, self.supply_address, 'float')
-        self.amnt = max(0, math.floor(self.supply - self.limit + 1))
-        self.base_price = self.raw_price * conversion_rate
-        self.sell_price = self.calc_sell_price(self.supply)
-        self.buy_price = math.ceil(self.sell_price * 1.023)
-        
-    def calc_sell_price(self, supply):
-        V = self.base_price
-        coeff = 0.38 if supply > 0.5 else -1.68
-        price = (coeff * V / 10000) * (supply ** 2) - (abs(coeff) * V / 50) * supply + V
-        return math.ceil(price)
-
-    def calculate_buy_mult(self, quantity):
-        total = sum(math.ceil(self.calc_sell_price(self.supply - i) * 1.023)
-                    for i in range(quantity))
-        return total
-
-    def calculate_sell_mult(self, quantity):
-        total = sum(math.ceil(self.calc_sell_price(self.supply + i))
-                    for i in range(quantity))
-        return total
-
-    def max_quantity(self, player, quantity_type="principal"):
-        if quantity_type == "mass":
-            return math.floor(player.mass_limit / self.weight)
-        elif quantity_type == "volume":
-            return math.floor(player.volume_limit / self.volume)
-        elif quantity_type == "principal":
-            i, total_cost = 0, 0
-            while i < self.amnt:
-                cost = math.ceil(self.calc_sell_price(self.supply - i) * 1.023)
-                total_cost += cost
-                if total_cost > player.principal:
-                    break
-                i += 1
-            return i
-
-    def max_quantity_mass(self, player):
-        return self.max_quantity(player, "mass")
-
-    def max_quantity_volume(self, player):
-        return self.max_quantity(player, "volume")
-
-    def max_quantity_principal(self, player):
-        return self.max_quantity(player, "principal")
-
-class Market:
-    """Represents a market in the game."""
-    def __init__(self, pm, base):
-        self.pm = pm
-        self.base = base
-        self.name = self._get_market_name()
-        self.index = read_game_memory(pm, pm.read_longlong(base + 0x38) + 0x58, 'int')
-        self.limit = read_game_memory(pm, base + 0x4C, 'float')
-        self.products = self._init_products()
-
-    def _get_market_name(self):
-        try:
-            addr_ptr = self.pm.read_longlong(self.base + 0x38)
-            addr = self.pm.read_longlong(addr_ptr + 0x18)
-            length = struct.unpack("<I", self.pm.read_bytes(addr + 0x10, 4))[0]
-            raw = self.pm.read_bytes(addr + 0x14, length * 2)
-            return raw[::2][:length].decode('utf-8', errors='ignore')
-        except Exception:
-            return "Unknown Market"
-
-    def _init_products(self):
-        base_addr = self.pm.read_longlong(self.base + 0x20) + 0x24
-        return [Product(name, base_addr + i * 4, self.pm, self.limit)
-                for i, name in enumerate(Products.NAMES)]
-
-    def update_products(self, conversion_rate):
-        for product in self.products:
-            product.update_product(conversion_rate)
-
-class Player:
-    def __init__(self):
-        self.principal = PLAYER_SETTINGS["principal"]
-        self.conversion_rate = PLAYER_SETTINGS["conversion_rate"]
-        self.mass_limit = PLAYER_SETTINGS["mass_limit"]
-        self.volume_limit = PLAYER_SETTINGS["volume_limit"]
-        self.min_profit = PLAYER_SETTINGS["min_profit"]
-
-    def update(self, principal, conversion_rate, mass_limit, volume_limit, min_profit):
-        self.principal = principal
-        self.conversion_rate = conversion_rate
-        self.mass_limit = mass_limit
-        self.volume_limit = volume_limit
-        self.min_profit = min_profit
-
-    def __repr__(self):
-        # Print float values without decimals
-        return (f"Player:\n Principal: {self.principal:.0f}\n Currency: {self.conversion_rate}\n "
-                f"Mass: {self.mass_limit:.0f}\n Volume: {self.volume_limit:.0f}")
-
-# =============================================================================
-# Helper Functions
-# =============================================================================
+def update_values():
+    try:
+        player.update(**{key: float(var.get()) for key, var in {
+            "principal": player_principal_var, "conversion_rate": conversion_rate_var,
+            "mass_limit": weight_limit_var, "volume_limit": volume_limit_var, "min_profit": min_profit_var
+        }.items()})
+        print("Updated", player)
+    except ValueError:
+        print("Invalid input! Please enter numeric values.")
 
 def find_markets(pm, status_label, root, markets, update_chart_button):
     """
-    Scan memory for market addresses using a specified pattern.
+    Scan memory for market addresses in the background.
     Updates the GUI status label with results.
     """
     status_label.config(text="🔍 Scanning for Markets...")
-    root.update_idletasks()
-    print('🔍 Scanning for Markets...')
-    PATTERN = rb"..\x00\x00\x80\x3F\x00\x00.\x42.\x00\x00\x00\x6F\x12\x83\x3A\x00\x00\x80\x3F"
-    markets.clear()
-    markets.extend([Market(pm, addr - 0x4E) for addr in pm.pattern_scan_all(PATTERN, return_multiple=True)])
-    
-    if len(markets) != 29:
+    sampler.cancel("routes")
+    sampler.submit("scan", scan_markets, pm, recorder,
+                   callback=lambda found: on_markets_found(found, status_label, markets))
+
+def on_markets_found(found, status_label, markets):
+    markets[:] = found
+    if len(markets) != MARKET_COUNT:
         print(f'⚠️ Found {len(markets)} markets. Exiting...')
         status_label.config(text="⚠️ Error: Market scan failed")
-        return []
-    
+        return
+
     print(f'✅ Found {len(markets)} markets.')
     status_label.config(text=f"✅ Found {len(markets)} markets.")
     for market in markets:
         print(f"{hex(market.base)}  {market.index:02} {market.name}")
     update_chart()
-    return markets
-
-def calculate_trade_metrics(start_market, end_market, product, player):
-    start_product = next((p for p in start_market.products if p.name == product.name), None)
-    end_product = next((p for p in end_market.products if p.name == product.name), None)
-    if not start_product or not end_product:
-        return None
-    max_qty = min(
-        start_product.max_quantity(player, "principal"),
-        start_product.max_quantity(player, "mass"),
-        start_product.max_quantity(player, "volume"),
-        math.floor((abs(start_product.supply - end_product.supply) / 2))
-    )
-    if max_qty == 0:
-        return None
-    total_buy_price = start_product.calculate_buy_mult(max_qty)
-    total_sell_price = end_product.calculate_sell_mult(max_qty)
-    profit = total_sell_price - total_buy_price
-    profit_per_pound = profit / (start_product.weight * max_qty) if start_product.weight else 0
-    profit_per_item = profit / max_qty if max_qty else 0
-    return {
-        "Start Market": start_market.name,
-        "End Market": end_market.name,
-        "Product": product.name,
-        "Qnty": f"{max_qty}/{start_product.amnt}",
-        "$_Buy": total_buy_price,
-        "$_Sell": total_sell_price,
-        "$Profit": profit,
-        "$/Pound": round(profit_per_pound, 1),
-        "$/Item": round(profit_per_item, 1)
-    }
-
-def generate_trade_routes(start_groups, end_groups, player, markets):
-    trade_routes = []
-    start_markets = [m for m in markets if IslandGroups.get_group(m.name) in start_groups]
-    end_markets = [m for m in markets if IslandGroups.get_group(m.name) in end_groups]
-    for start_market in start_markets:
-        for end_market in end_markets:
-            if start_market != end_market:
-                for product in start_market.products:
-                    metrics = calculate_trade_metrics(start_market, end_market, product, player)
-                    if metrics and metrics["$Profit"] > player.min_profit:
-                        trade_routes.append(metrics)
-    return trade_routes
-
-# =============================================================================
-# GUI Helper Functions
-# =============================================================================
-
-def update_values():
-    try:
-        player.update(**{key: float(var.get()) for key, var in {
-            "principal": player_principal_var, "conversion_rate": conversion_rate_var,
-            "mass_limit": weight_limit_var, "volume_limit": volume_limit_var, "min_profit": min_profit_var
-        }.items()})
-        print("Updated", player)
-    except ValueError:
-        print("Invalid input! Please enter numeric values.")
 
 def update_chart():
     start_groups = [f"{name} (Group {idx+1})" for idx, name in enumerate(island_names)
@@ -234,21 +64,94 @@ def update_chart():
     end_groups = [f"{name} (Group {idx+1})" for idx, name in enumerate(island_names)
                   if end_group_vars[name].get() == 1]
 
-    for market in markets:
-        market.update_products(player.conversion_rate)
+    # Memory reads and route generation run on the sampler thread; a newer
+    # request replaces one that hasn't finished yet.
+    sampler.submit("routes", compute_routes, list(markets), start_groups, end_groups, copy.copy(player),
+                   recorder, sort_key_var.get(), top_var.get(), per_start_var.get(), publisher,
+                   alert_engine, scheduler, callback=show_routes)
+
+def show_routes(trade_routes):
+    # Only rows that appeared, disappeared, changed or moved touch the treeview
+    with metrics.stage("render"):
+        stats = route_table.render(trade_routes, sort_key_var.get())
+    for key, rows in stats.items():
+        metrics.count(f"rows_{key}", rows)
+    if alert_engine:
+        show_alerts(alert_engine.drain())
+
+def show_alerts(events):
+    # Alerts fire on the sampler thread; they surface here on the next table update
+    for event in events:
+        text = format_alert(event)
+        print(f"🔔 {text}")
+        status_label.config(text=f"🔔 {text}")
+        root.bell()
+        show_toast(text)
+
+def show_toast(text, duration=8000):
+    """A borderless note in the bottom-right corner of the screen that closes itself."""
+    toast = tk.Toplevel(root)
+    toast.wm_overrideredirect(True)
+    toast.attributes("-topmost", True)
+    toast.wm_geometry(f"-20-{60 + 50 * len(toasts)}")
+    ttk.Label(toast, text=text, style='Tooltip.TLabel', padding=6, wraplength=360).pack()
+    toasts.append(toast)
+
+    def close():
+        toasts.remove(toast)
+        toast.destroy()
+
+    toast.after(duration, close)
+
+def set_sort_key(column):
+    sort_key_var.set(column)
+    update_headings()
+    update_chart()
+
+def update_headings():
+    """Marks the ranking column and its top-K in the table headers."""
+    for col in SORT_KEYS:
+        top = top_var.get()
+        label = f"{col} ▼{top if top else ''}" if col == sort_key_var.get() else col
+        tree.heading(col, text=label)
 
-    # Generate, sort, and insert trade routes into the treeview
-    trade_routes = sorted(generate_trade_routes(start_groups, end_groups, player, markets), 
-                          key=lambda x: (x["Start Market"], -x["$Profit"]))
-    
-    tree.delete(*tree.get_children())
-    for route in trade_routes:
-        tree.insert("", "end", values=[route[k] for k in ["Start Market", "End Market", "Product", 
-                                                         "Qnty", "$_Buy", "$_Sell", "$Profit", "$/Pound", "$/Item"]])
+def show_ranking_menu(event):
+    # Right-click on any header picks K and per-start ranking
+    if tree.identify_region(event.x, event.y) == "heading":
+        ranking_menu.tk_popup(event.x_root, event.y_root)
 
 def update_loop():
     update_chart()
-    root.after(5000, update_loop)
+    # Adaptive polling wakes when the next market is due, a fixed tick every 5 s
+    delay = min(max(scheduler.until_next_due(), 0.25), 5.0) if scheduler else 5.0
+    root.after(int(delay * 1000), update_loop)
+
+def follow_publisher(seen=0):
+    # A subscriber refreshes as soon as a new tick is published; checking the
+    # sequence number is one shared memory read, so it is polled every 100 ms
+    sequence = pm.sequence
+    if sequence != seen:
+        update_chart()
+    root.after(100, follow_publisher, sequence)
+
+def update_stats():
+    stats_label.config(text=format_stats(metrics.snapshot()))
+    root.after(1000, update_stats)
+
+def poll_sampler():
+    sampler.poll()
+    root.after(50, poll_sampler)
+
+def on_close():
+    # Let the sampler finish its job so buffered history reaches the disk
+    sampler.stop(timeout=5)
+    if recorder:
+        recorder.close()
+    if metrics_server:
+        metrics_server.stop()
+    if publisher:
+        publisher.close()
+    root.destroy()
 
 # Function to scroll 5 lines at a time
 def on_mouse_wheel(event, tree):
@@ -298,18 +201,24 @@ def create_group_checkboxes(parent, names, default_func, label_text):
 os.system('cls' if os.name == 'nt' else 'clear')
 print('=== Island Market Scanner ===')
 
-# Hook to Sailwind.exe
+# Hook to Sailwind.exe (pymem on Windows, process_vm_readv under Proton on Linux),
+# or to the ticks another instance publishes in shared memory
 try:
-    process_name = 'Sailwind.exe'
-    pm = pymem.Pymem(process_name)  # Try to attach to Sailwind.exe
-except pymem.exception.ProcessNotFound:
+    if SHARED_SETTINGS.get("subscribe", False):
+        process_name = "The publishing watcher"
+        pm = Subscriber(SHARED_SETTINGS.get("name", SHARED_NAME))
+    else:
+        process_name = MEMORY_SETTINGS.get("process", 'Sailwind.exe')
+        pm = open_process(process_name, MEMORY_SETTINGS.get("backend", "auto"))  # Try to attach to Sailwind.exe
+except ProcessNotFound:
     # If the game is not running, display an error and exit
     print(f"Error: {process_name} is not running. Please start the game and try again.")
     exit()
 
 # Set AppUserModelID for taskbar icon on Windows
-myappid = u'mycompany.myproduct.subproduct.version'
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
+if os.name == 'nt':
+    myappid = u'mycompany.myproduct.subproduct.version'
+    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
 
 # Main GUI Window
 root = tk.Tk()
@@ -341,6 +250,8 @@ button_frame.grid(row=0, column=0, sticky="ew", padx=5, pady=3)
 player = Player()
 print(player)  # Print player information for debugging
 markets = []
+sampler = Sampler()
+sampler.start()
 start_button = ttk.Button(button_frame, text="Scan For Markets", 
                           command=lambda: find_markets(pm, status_label, root, markets, update_chart_button))
 start_button.grid(row=0, column=0, sticky="w", padx=(0, 10))
@@ -452,6 +363,23 @@ for col in columns:
 
 tree.grid(row=0, column=0, sticky="nsew")
 
+# Ranking: click $Profit, $/Pound or $/Item to rank by it; right-click a header for K
+sort_key_var = tk.StringVar(value=TABLE_SETTINGS.get("sort_key", "$Profit"))
+top_var = tk.IntVar(value=TABLE_SETTINGS.get("top", 0))
+per_start_var = tk.BooleanVar(value=TABLE_SETTINGS.get("per_start", True))
+for col in SORT_KEYS:
+    tree.heading(col, command=lambda col=col: set_sort_key(col))
+
+ranking_menu = tk.Menu(root, tearoff=0)
+for top in (25, 50, 100, 250, 0):
+    ranking_menu.add_radiobutton(label=f"Top {top}" if top else "All routes", variable=top_var, value=top,
+                                 command=lambda: [update_headings(), update_chart()])
+ranking_menu.add_separator()
+ranking_menu.add_checkbutton(label="Per start market", variable=per_start_var, command=update_chart)
+tree.bind("<Button-3>", show_ranking_menu)
+update_headings()
+route_table = RouteTable(tree, limit=TABLE_SETTINGS.get("max_rows") or None)
+
 table_frame.grid_columnconfigure(0, weight=1)
 table_frame.grid_rowconfigure(0, weight=1)
 
@@ -460,7 +388,22 @@ tree.configure(yscroll=scrollbar.set)
 scrollbar.grid(row=0, column=1, sticky="ns")
 tree.bind("<MouseWheel>", lambda event: on_mouse_wheel(event, tree))
 
-# Automatic chart update every second
-root.after(5000, update_loop)
+# -------------------------------
+# Row 3: Pipeline Stats (metrics_settings.enabled)
+# -------------------------------
+if metrics.enabled:
+    stats_frame = ttk.LabelFrame(root, text="Stats", padding="5")
+    stats_frame.grid(row=3, column=0, sticky="ew", padx=10, pady=(0, 8))
+    stats_label = ttk.Label(stats_frame, text="", font=("Courier", 8), justify="left")
+    stats_label.grid(row=0, column=0, sticky="w")
+    root.after(1000, update_stats)
+
+# Automatic chart update on every published tick, or on the polling schedule
+if isinstance(pm, Subscriber):
+    root.after(100, follow_publisher)
+else:
+    root.after(5000, update_loop)
+root.after(50, poll_sampler)
+root.protocol("WM_DELETE_WINDOW", on_close)
 
 root.mainloop()
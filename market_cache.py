@@ -0,0 +1,89 @@
+import ctypes
+import json
+import os
+import re
+
+from snapshot import MARKET_PATTERN, MARKET_PATTERN_LENGTH, SIGNATURE_OFFSET, read_market_name
+
+CACHE_FILE = "market_cache.json"
+
+
+def process_start_time(pm):
+    """
+    Returns an opaque start time for the attached process, or None if unknown.
+
+    Together with the PID this tells a restarted game apart from the one the
+    cache was written for, even if Windows reuses the PID.
+    """
+    try:
+        if os.name == 'nt':
+            creation, exit_time, kernel, user = (ctypes.c_ulonglong() for _ in range(4))
+            if ctypes.windll.kernel32.GetProcessTimes(pm.process_handle, ctypes.byref(creation),
+                                                      ctypes.byref(exit_time), ctypes.byref(kernel),
+                                                      ctypes.byref(user)):
+                return creation.value
+            return None
+        with open(f"/proc/{pm.process_id}/stat", "r") as file:
+            # Field 22 (starttime); split after the parenthesised command name
+            return int(file.read().rsplit(")", 1)[1].split()[19])
+    except Exception:
+        return None
+
+
+def process_identity(pm):
+    return f"{pm.process_id}:{process_start_time(pm)}"
+
+
+def is_market(pm, base, name):
+    """Checks that `base` still holds the market `name` (scan signature and name)."""
+    try:
+        signature = pm.read_bytes(base + SIGNATURE_OFFSET, MARKET_PATTERN_LENGTH)
+    except Exception:
+        return False
+    return (re.fullmatch(MARKET_PATTERN, signature, re.DOTALL) is not None
+            and read_market_name(pm, base) == name)
+
+
+class MarketCache:
+    """
+    Market base addresses found by the last scan, persisted between runs.
+
+    Entries are only used for the process they were recorded for and every
+    address is re-checked before use, so a stale file never yields a wrong
+    market; it just means a full scan.
+    """
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+
+    def load(self, pm):
+        """
+        Returns the cached bases that still point at their market.
+
+        Args:
+            pm (pymem.Pymem): The attached game process.
+
+        Returns:
+            tuple[list[int], int]: Valid market bases and the number of cached
+            entries that failed the check.
+        """
+        try:
+            with open(self.path, "r") as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return [], 0
+        if cache.get("process") != process_identity(pm):
+            return [], 0
+        entries = cache.get("markets", {})
+        valid = [int(base, 16) for base, name in entries.items() if is_market(pm, int(base, 16), name)]
+        return valid, len(entries) - len(valid)
+
+    def save(self, pm, markets):
+        cache = {
+            "process": process_identity(pm),
+            "markets": {hex(market.base): market.name for market in markets}
+        }
+        try:
+            with open(self.path, "w") as file:
+                json.dump(cache, file, indent=4)
+        except OSError as e:
+            print(f"Error writing market cache: {e}")
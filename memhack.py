@@ -1,6 +1,11 @@
 import struct
-import pymem
-import pymem.process
+
+def module_base(pm, module_name):
+    """Load address of `module_name`, from the memory backend or through pymem."""
+    if hasattr(pm, "module_base"):
+        return pm.module_base(module_name)
+    import pymem.process
+    return pymem.process.module_from_name(pm.process_handle, module_name).lpBaseOfDll
 
 def get_address(pm, chain):
     """
@@ -19,8 +24,7 @@ def get_address(pm, chain):
     module_name, base_offset, offsets = chain
 
     try:
-        module_base = pymem.process.module_from_name(pm.process_handle, module_name).lpBaseOfDll
-        address = module_base + base_offset
+        address = module_base(pm, module_name) + base_offset
         for offset in offsets:
             address = pm.read_longlong(address) + offset  # Read 8-byte pointer at address
         return address
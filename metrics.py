@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WINDOW = 120           # Samples per stage kept for the rolling percentiles
+PREFIX = "sailwind"    # Prometheus metric name prefix
+
+_DISABLED = nullcontext()
+
+
+class Stage:
+    """Rolling window of one stage's durations, plus lifetime totals."""
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Timers and counters for the polling pipeline.
+
+    Stages ("read", "pricing", "routes", "sort", "render", ...) are timed
+    with `with metrics.stage(name):` and keep their last `window` durations
+    for p50/p95. Counters ("reads", "bytes_read", "routes_emitted", ...)
+    only ever go up; gauges ("reads_per_second", ...) hold the latest
+    value, optionally one per label set. While disabled, stage() hands out a shared no-op
+    context and count()/observe()/gauge() return straight away, so the
+    instrumentation can stay in the hot path. Safe to update from the
+    sampler thread while the GUI or the HTTP endpoint reads it.
+    """
+    def __init__(self, enabled=False, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}   # (name, ((label, value), ...)) -> value
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+            self.gauges = {}
+
+    def stage(self, name):
+        """Context manager timing one run of `name`."""
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = Stage(self.window)
+            stage.add(seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[name, tuple(sorted(labels.items()))] = value
+
+    def snapshot(self):
+        """
+        Current figures as plain types.
+
+        Returns:
+            dict: "stages" (name -> count, last_ms, p50_ms, p95_ms, total_s),
+            "counters" (name -> total) and "gauges" (name, or name{labels},
+            -> value), in first-seen order.
+        """
+        with self._lock:
+            stages = {name: (stage.count, stage.last, stage.total, list(stage.samples))
+                      for name, stage in self.stages.items()}
+            counters = dict(self.counters)
+            gauges = {_series(name, labels): value for (name, labels), value in self.gauges.items()}
+        result = {}
+        for name, (count, last, total, samples) in stages.items():
+            samples.sort()
+            result[name] = {
+                "count": count,
+                "last_ms": round(last * 1000, 3),
+                "p50_ms": round(_nearest(samples, 0.5) * 1000, 3),
+                "p95_ms": round(_nearest(samples, 0.95) * 1000, 3),
+                "total_s": round(total, 3)
+            }
+        return {"stages": result, "counters": counters, "gauges": gauges}
+
+    def prometheus(self):
+        """The figures in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            stages = {name: (stage.count, stage.total, sorted(stage.samples)) for name, stage in self.stages.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        lines = [f"# HELP {PREFIX}_stage_seconds Duration of each polling stage over the last {self.window} runs.",
+                 f"# TYPE {PREFIX}_stage_seconds summary"]
+        for name, (count, total, samples) in stages.items():
+            for q in (0.5, 0.95):
+                lines.append(f'{PREFIX}_stage_seconds{{stage="{name}",quantile="{q}"}} {_nearest(samples, q):.6f}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {count}')
+        for name, value in counters.items():
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            lines.append(f"{PREFIX}_{name}_total {value}")
+        typed = set()
+        for (name, labels), value in gauges.items():
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}_{name} gauge")
+                typed.add(name)
+            lines.append(f"{PREFIX}_{_series(name, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name, labels):
+    """name{label="value",...} for labelled gauges, the bare name otherwise."""
+    if not labels:
+        return name
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return name + "{" + ",".join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped)) + "}"
+
+
+def _nearest(ordered, q):
+    """Nearest-rank quantile of sorted samples (0 when empty)."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsServer:
+    """
+    Serves `metrics.prometheus()` at http://127.0.0.1:<port>/metrics.
+
+    Runs on a daemon thread and only binds to localhost.
+    """
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        self.metrics = metrics
+        self.address = (host, port)
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the console
+
+        try:
+            self._server = ThreadingHTTPServer(self.address, Handler)
+        except OSError as e:
+            print(f"Error starting metrics endpoint on port {self.address[1]}: {e}")
+            return False
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        print(f"📈 Metrics at http://{self.address[0]}:{self.address[1]}/metrics")
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def format_stats(snapshot):
+    """Fixed-width text for the GUI stats panel."""
+    lines = [f"{'stage':<10}{'p50 ms':>10}{'p95 ms':>10}{'last ms':>10}"]
+    for name, stage in snapshot["stages"].items():
+        lines.append(f"{name:<10}{stage['p50_ms']:>10.1f}{stage['p95_ms']:>10.1f}{stage['last_ms']:>10.1f}")
+    counters = [f"{name}={value:,}" for name, value in snapshot["counters"].items()]
+    # Labelled gauges (one per market) are left to the Prometheus endpoint
+    counters += [f"{name}={value:,}" for name, value in snapshot.get("gauges", {}).items() if "{" not in name]
+    for first in range(0, len(counters), 3):
+        lines.append("  ".join(counters[first:first + 3]))
+    return "\n".join(lines)
+
+
+metrics = Metrics()
@@ -0,0 +1,202 @@
+import numpy as np
+
+CHUNK_SIZE = 256     # Partial chains expanded per array batch
+BOUND_CHUNK = 1024   # Partial chains per bound computation (markets^2 cells each)
+
+
+class ChainPlanner:
+    """
+    Finds the most profitable multi-hop trade chains (A → B → C ...).
+
+    Each leg buys one product and sells it at the next market, where the
+    next leg buys again with the principal carried forward (principal +
+    profit of the legs so far). Legs follow the single-route rules: the
+    quantity is capped by supply, cargo, spread and principal, and a leg
+    must beat the player's min_profit. A chain visits a market at most once;
+    the supply changes a chain's own trades cause are not modelled.
+
+    The search is branch and bound over levels of partial chains. For every
+    market pair an upper bound of any leg's profit, whatever the principal,
+    comes from the cheapest buy and dearest sell unit price within reach;
+    a dynamic program over those bounds gives the most the remaining hops
+    could add. Partial chains are expanded best bound first, in batches, and
+    dropped as soon as their bound can't beat the N-th best chain found. The
+    result is exact unless more than `beam_width` partial chains survive a
+    level, in which case only the most promising are kept.
+    """
+    def __init__(self, engine, beam_width=20000, chunk_size=CHUNK_SIZE):
+        self.engine = engine
+        self.beam_width = beam_width
+        self.chunk_size = chunk_size
+
+    def plan(self, start_markets, end_markets, player, hops=3, top=10):
+        """
+        Searches chains of 1 to `hops` legs.
+
+        Args:
+            start_markets (list[Market]): Markets a chain may start at.
+            end_markets (list[Market]): Markets a leg may sell at (and the
+                next leg buy at).
+            player (Player): Starting principal, currency, cargo limits and
+                the min_profit every leg has to beat.
+            hops (int): Maximum legs per chain.
+            top (int): Number of chains to return.
+
+        Returns:
+            list[dict]: The best chains by total profit: "Route" (market names
+            joined by arrows), "Hops", "$Profit", "Principal" (at the end of
+            the chain) and "Legs", a list of route dicts in the shape of
+            calculate_trade_metrics.
+        """
+        markets = list({id(m): m for m in start_markets + end_markets}.values())
+        if not start_markets or not end_markets or hops < 1 or top < 1:
+            return []
+        engine = self.engine
+        supply = np.array([m.supplies for m in markets], dtype=float)
+        limit = np.array([m.limit for m in markets], dtype=float)
+        is_end = np.isin([id(m) for m in markets], [id(m) for m in end_markets])
+        n_markets, n_products = supply.shape
+
+        # Quantity caps without the principal limit; legs into a market that
+        # isn't an end, or staying in place, are never possible
+        amnt = engine.available(supply, limit)
+        spread = np.floor(np.abs(supply[:, None, :] - supply[None, :, :]) / 2)
+        cap = np.minimum(np.minimum(amnt, engine.cargo(player))[:, None, :], spread)
+        cap[:, ~is_end] = 0
+        cap[np.arange(n_markets), np.arange(n_markets)] = 0
+        depth = int(cap.max()) if cap.size else 0
+        if depth <= 0:
+            return []
+        cap = cap.astype(np.intp)
+        width = depth + 1
+        buy, peak = engine.buy_curve(supply, player.conversion_rate, depth)
+        sell = engine.sell_curve(supply, player.conversion_rate, depth)
+
+        # Admissible bounds. A leg never earns more than cap units at the best
+        # unit margin, nor more than the principal times the best sell/buy
+        # unit price ratio (a ratio of sums never beats the best ratio of
+        # terms). `loose[h]` is the most h legs could add at any principal.
+        sell_unit, buy_unit = np.diff(sell, axis=-1).max(axis=-1), np.diff(buy, axis=-1).min(axis=-1)
+        possible = cap > 0
+        leg_bound = np.where(possible, cap * np.maximum(sell_unit[None, :, :] - buy_unit[:, None, :], 0), 0).max(axis=-1)
+        leg_bound[leg_bound <= player.min_profit] = -np.inf
+        with np.errstate(divide="ignore"):
+            ratio = np.where(buy_unit > 0, 1 / buy_unit, np.inf)[:, None, :] * sell_unit[None, :, :] - 1
+        ratio = np.where(possible, np.maximum(ratio, 0), 0).max(axis=-1)
+        loose = [np.zeros(n_markets)]
+        for _ in range(hops):
+            loose.append(np.maximum(0, (leg_bound + loose[-1][None, :]).max(axis=1)))
+
+        def bound(m, principal, h):
+            """Most `h` more legs could add to chains at markets `m` with `principal`."""
+            if h == 0:
+                return np.zeros(len(m))
+            if h > 2:
+                return bound(m, principal, 2) + loose[h - 2].max()
+            leg = np.minimum(leg_bound[m], np.where(np.isinf(ratio[m]), np.inf, principal[:, None] * ratio[m]))
+            leg[leg <= player.min_profit] = -np.inf
+            if h == 2:
+                after = principal[:, None] + np.where(leg > -np.inf, leg, 0)
+                leg = leg + bound(np.tile(np.arange(n_markets), len(m)), after.ravel(), 1).reshape(leg.shape)
+            return np.maximum(0, leg.max(axis=1))
+
+        def optimistic(level, h):
+            return level["value"] + np.concatenate(
+                [bound(level["market"][i:i + BOUND_CHUNK], level["principal"][i:i + BOUND_CHUNK], h)
+                 for i in range(0, len(level["market"]), BOUND_CHUNK)] or [np.zeros(0)])
+
+        start_index = [markets.index(m) for m in {id(m): m for m in start_markets}.values()]
+        frontier = {
+            "index": np.arange(len(start_index)),
+            "market": np.array(start_index, dtype=np.intp),
+            "principal": np.full(len(start_index), float(player.principal)),
+            "value": np.zeros(len(start_index)),
+            "visited": np.eye(n_markets, dtype=bool)[start_index],
+        }
+        levels = {}   # hop -> arrays of every chain with that many legs, and the leg that ends it
+        best = np.zeros((0, 3))   # (value, hop, index in levels[hop]) of the best chains so far
+        threshold = -np.inf
+        p_offset = np.arange(n_products) * width
+        sell_offset = (np.arange(n_markets) * n_products * width)[:, None] + p_offset
+        for hop in range(1, hops + 1):
+            # Most promising partial chains first, so the threshold tightens early
+            upper = optimistic(frontier, hops - hop + 1)
+            order = np.argsort(-upper, kind="stable")
+            parts, count = [], 0
+            for first in range(0, len(order), self.chunk_size):
+                chunk = order[first:first + self.chunk_size]
+                chunk = chunk[upper[chunk] > threshold]
+                if not len(chunk):
+                    break
+                m = frontier["market"][chunk]
+                affordable = (peak[m] <= frontier["principal"][chunk, None, None]).sum(axis=-1) - 1
+                qty = np.maximum(np.minimum(cap[m], affordable[:, None, :]), 0)
+                total_buy = buy.take((m * n_products * width)[:, None, None] + p_offset + qty)
+                total_sell = sell.take(sell_offset + qty)
+                profit = total_sell - total_buy
+                valid = (qty > 0) & (profit > player.min_profit) & ~frontier["visited"][chunk][:, :, None]
+                profit = np.where(valid, profit, -np.inf)
+
+                # One product per leg: the most profitable one
+                product = profit.argmax(axis=-1)
+                leg_profit = np.take_along_axis(profit, product[..., None], axis=-1)[..., 0]
+                row, end = np.nonzero(leg_profit > -np.inf)
+                if not len(row):
+                    continue
+                p, source = product[row, end], chunk[row]
+                visited = frontier["visited"][source]
+                visited[np.arange(len(end)), end] = True
+                parts.append({
+                    "parent": frontier["index"][source],
+                    "market": end,
+                    "product": p,
+                    "qty": qty[row, end, p],
+                    "buy": total_buy[row, end, p],
+                    "sell": total_sell[row, end, p],
+                    "value": frontier["value"][source] + leg_profit[row, end],
+                    "principal": frontier["principal"][source] + leg_profit[row, end],
+                    "visited": visited,
+                })
+
+                # Every extension is itself a complete chain
+                found = np.column_stack([parts[-1]["value"], np.full(len(end), hop), count + np.arange(len(end))])
+                best = np.concatenate([best, found[found[:, 0] > threshold]])
+                count += len(end)
+                if len(best) >= top:
+                    best = best[np.argsort(-best[:, 0], kind="stable")[:top]]
+                    threshold = best[-1, 0]
+            if not parts:
+                break
+            levels[hop] = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+            # Only chains that could still make the top N are extended
+            if hop == hops:
+                break
+            upper = optimistic(levels[hop], hops - hop)
+            keep = np.flatnonzero(upper > threshold)
+            if len(keep) > self.beam_width:
+                keep = keep[np.argsort(-upper[keep], kind="stable")[:self.beam_width]]
+            frontier = {key: levels[hop][key][keep] for key in ("market", "principal", "value", "visited")}
+            frontier["index"] = keep
+
+        best = best[np.argsort(-best[:, 0], kind="stable")[:top]]
+        return [self._chain(markets, start_index, levels, amnt, int(hop), int(index)) for _, hop, index in best]
+
+    def _chain(self, markets, start_index, levels, amnt, hop, index):
+        legs, principal, profit = [], levels[hop]["principal"][index], levels[hop]["value"][index]
+        for h in range(hop, 0, -1):
+            leg = levels[h]
+            parent = leg["parent"][index]
+            source = levels[h - 1]["market"][parent] if h > 1 else start_index[parent]
+            end, product = leg["market"][index], leg["product"][index]
+            legs.append(self.engine.route(markets[source].name, markets[end].name, product, int(leg["qty"][index]),
+                                          int(amnt[source, product]), leg["buy"][index], leg["sell"][index]))
+            index = parent
+        legs.reverse()
+        return {
+            "Route": " → ".join([legs[0]["Start Market"]] + [leg["End Market"] for leg in legs]),
+            "Hops": hop,
+            "$Profit": int(profit),
+            "Principal": int(principal),
+            "Legs": legs
+        }
@@ -0,0 +1,65 @@
+import math
+from bisect import bisect_right
+
+BUY_MARKUP = 1.023  # Buy price is the sell price plus 2.3%
+
+
+def calc_sell_price(base_price, supply):
+    """Game formula for the price a market pays for one unit at `supply`."""
+    V = base_price
+    coeff = 0.38 if supply > 0.5 else -1.68
+    price = (coeff * V / 10000) * (supply ** 2) - (abs(coeff) * V / 50) * supply + V
+    return math.ceil(price)
+
+
+def calc_buy_price(base_price, supply):
+    """Price the player pays for one unit at `supply`."""
+    return math.ceil(calc_sell_price(base_price, supply) * BUY_MARKUP)
+
+
+class PriceTable:
+    """
+    Cumulative buy/sell costs of one product for one snapshot of its supply.
+
+    buy[k] is the cost of buying k units (supply, supply - 1, ...) and
+    sell[k] the revenue of selling k units (supply, supply + 1, ...). Both
+    arrays are grown on demand and reused by every route that touches the
+    product until the next update, so bulk totals are plain lookups.
+    """
+    def __init__(self, base_price, supply, amnt):
+        self.base_price = base_price
+        self.supply = supply
+        self.amnt = amnt
+        self._buy = [0]
+        self._buy_peak = [0]  # Running max of _buy, keeps the bisect exact
+        self._sell = [0]
+
+    def _grow_buy(self, quantity):
+        buy, peak = self._buy, self._buy_peak
+        for i in range(len(buy) - 1, quantity):
+            buy.append(buy[-1] + calc_buy_price(self.base_price, self.supply - i))
+            peak.append(max(peak[-1], buy[-1]))
+
+    def _grow_sell(self, quantity):
+        sell = self._sell
+        for i in range(len(sell) - 1, quantity):
+            sell.append(sell[-1] + calc_sell_price(self.base_price, self.supply + i))
+
+    def buy_total(self, quantity):
+        """Total cost of buying `quantity` units."""
+        if quantity >= len(self._buy):
+            self._grow_buy(quantity)
+        return self._buy[quantity]
+
+    def sell_total(self, quantity):
+        """Total revenue from selling `quantity` units."""
+        if quantity >= len(self._sell):
+            self._grow_sell(quantity)
+        return self._sell[quantity]
+
+    def max_affordable(self, principal):
+        """Most units (up to the available amount) whose total cost fits in `principal`."""
+        while len(self._buy) <= self.amnt and self._buy_peak[-1] <= principal:
+            self._grow_buy(min(self.amnt, 2 * len(self._buy)))
+        hi = min(len(self._buy_peak), self.amnt + 1)
+        return max(0, bisect_right(self._buy_peak, principal, 0, hi) - 1)
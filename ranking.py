@@ -0,0 +1,65 @@
+import heapq
+import itertools
+
+SORT_KEYS = ["$Profit", "$/Pound", "$/Item"]
+
+
+class TopK:
+    """
+    The best `k` routes by each sort key, kept while routes stream in.
+
+    Every key (and, with `per_start`, every start market) has a bounded
+    min-heap of at most k entries, so memory and the cost of ranking grow
+    with k rather than with the number of candidate routes. threshold()
+    tells a producer the value a route must beat to get in, which lets it
+    skip whole batches. Ties keep the route that arrived first, like a
+    stable sort of the full list would.
+    """
+    def __init__(self, k, keys=SORT_KEYS, per_start=False):
+        self.k = k
+        self.keys = list(keys)
+        self.per_start = per_start
+        self._heaps = {}   # (key, start market or None) -> [(value, -arrival, route)]
+        self._arrival = itertools.count()
+
+    def threshold(self, key, start=None):
+        """Value a route must exceed to enter the heap of `key` (and `start`)."""
+        heap = self._heaps.get((key, start if self.per_start else None))
+        return heap[0][0] if heap and len(heap) >= self.k else float("-inf")
+
+    def push(self, route):
+        arrival = -next(self._arrival)
+        start = route["Start Market"] if self.per_start else None
+        for key in self.keys:
+            heap = self._heaps.setdefault((key, start), [])
+            entry = (route[key], arrival, route)
+            if len(heap) < self.k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+    def extend(self, routes):
+        for route in routes:
+            self.push(route)
+
+    def ranked(self, key):
+        """
+        Routes of `key`'s heaps, best first.
+
+        With per_start, the start markets come in name order, each with its
+        own best k, like the table's default (Start Market, -$Profit) order.
+        """
+        if self.per_start:
+            starts = sorted(start for heap_key, start in self._heaps if heap_key == key)
+        else:
+            starts = [None]
+        return [route for start in starts
+                for _, _, route in sorted(self._heaps.get((key, start), []),
+                                          key=lambda entry: entry[:2], reverse=True)]
+
+
+def top_routes(routes, key, k, per_start=False):
+    """The best `k` of an iterable of routes by `key` (per start market with per_start)."""
+    ranking = TopK(k, [key], per_start)
+    ranking.extend(routes)
+    return ranking.ranked(key)
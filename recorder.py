@@ -0,0 +1,204 @@
+import glob
+import json
+import os
+import struct
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+MAGIC = b"SWSUPPLY"
+VERSION = 1
+HEADER_SIZE = 4096  # Fixed, so records stay at fixed offsets
+
+
+def record_dtype(n_markets, n_products):
+    """One tick: a float64 timestamp and the market x product float32 supply matrix."""
+    return np.dtype([("time", "<f8"), ("supply", "<f4", (n_markets, n_products))])
+
+
+def write_header(file, market_names, product_names, limits=None):
+    meta = {"markets": market_names, "products": product_names}
+    if limits is not None:
+        meta["limits"] = [float(limit) for limit in limits]
+    names = json.dumps(meta).encode("utf-8")
+    header = MAGIC + struct.pack("<IIII", VERSION, len(market_names), len(product_names), len(names)) + names
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Too many market/product names for the history header")
+    file.write(header.ljust(HEADER_SIZE, b"\x00"))
+
+
+def read_header(path):
+    """Returns (market_names, product_names) of a history file."""
+    meta = read_meta(path)
+    return meta["markets"], meta["products"]
+
+
+def read_meta(path):
+    """The header fields of a history file; "limits" is missing in files from older versions."""
+    with open(path, "rb") as file:
+        header = file.read(HEADER_SIZE)
+    if header[:8] != MAGIC:
+        raise ValueError(f"{path} is not a supply history file")
+    version, _, _, length = struct.unpack_from("<IIII", header, 8)
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported version {version}")
+    return json.loads(header[24:24 + length].decode("utf-8"))
+
+
+def open_history(path):
+    """
+    Memory-maps a history file without loading it.
+
+    Returns:
+        tuple[list[str], list[str], numpy.memmap or None]: Market names,
+        product names and the records (None if the file has no records yet).
+    """
+    market_names, product_names = read_header(path)
+    dtype = record_dtype(len(market_names), len(product_names))
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count <= 0:
+        return market_names, product_names, None
+    return market_names, product_names, np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+class SupplyRecorder:
+    """
+    Append-only history of every tick's market x product supply matrix.
+
+    Each tick is one fixed-width record (8 byte timestamp + 4 bytes per
+    market and product, about 7 KB for 29 x 61) in files under `directory`.
+    Ticks are kept in a ring buffer of the last `ring_size` ticks and written
+    to disk `batch_size` at a time, so the polling loop only pays for a copy.
+    A file is closed once it reaches `max_file_bytes` and only the newest
+    `max_files` files are kept (0 keeps them all). History queries memory-map the files and
+    only touch the records they need.
+    """
+    def __init__(self, directory="history", ring_size=720, batch_size=12,
+                 max_file_bytes=32 * 2**20, max_files=4):
+        self.directory = directory
+        self.ring_size = ring_size
+        self.batch_size = batch_size
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.market_names = None
+        self.product_names = None
+        self.limits = None
+        self._dtype = record_dtype(0, 0)
+        self._ring = np.zeros(0, dtype=self._dtype)  # Replaced by start(); latest() is empty until then
+        self._count = 0
+        self._path = None
+        self._pending = []
+
+    def start(self, market_names, product_names, limits=None):
+        """Begins recording a (new) set of markets; ticks go to a new file."""
+        self.flush()
+        self.market_names = list(market_names)
+        self.product_names = list(product_names)
+        self.limits = None if limits is None else list(limits)
+        self._dtype = record_dtype(len(self.market_names), len(self.product_names))
+        self._ring = np.zeros(self.ring_size, dtype=self._dtype)
+        self._count = 0
+        self._path = None
+
+    def append(self, supplies, timestamp=None):
+        """
+        Records one tick.
+
+        Args:
+            supplies (array-like): Market x product supplies, in start() order.
+            timestamp (float or None): Seconds since the epoch, default now.
+        """
+        if self.market_names is None:
+            raise RuntimeError("SupplyRecorder.start() must be called before append()")
+        record = self._ring[self._count % self.ring_size]
+        record["time"] = time.time() if timestamp is None else timestamp
+        record["supply"] = supplies
+        self._pending.append(record.copy())
+        self._count += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def latest(self, n=None):
+        """
+        The last `n` ticks from memory (default all in the ring), oldest first.
+
+        Returns:
+            numpy.ndarray: Records with "time" and "supply" fields; empty
+            before start() or the first append().
+        """
+        count = min(self._count, self.ring_size)
+        n = count if n is None else min(n, count)
+        idx = np.arange(self._count - n, self._count) % self.ring_size
+        return self._ring[idx]
+
+    def flush(self):
+        if not self._pending:
+            return
+        data = np.array(self._pending, dtype=self._dtype).tobytes()
+        self._pending.clear()
+        os.makedirs(self.directory, exist_ok=True)
+        if self._path is None or os.path.getsize(self._path) + len(data) > self.max_file_bytes:
+            self._roll_over()
+        with open(self._path, "ab") as file:
+            file.write(data)
+
+    def close(self):
+        self.flush()
+
+    def files(self):
+        """History files, oldest first."""
+        return sorted(glob.glob(os.path.join(self.directory, "supply-*.bin")))
+
+    def _roll_over(self):
+        files = self.files()
+        number = int(os.path.basename(files[-1])[7:-4]) + 1 if files else 1
+        self._path = os.path.join(self.directory, f"supply-{number:06}.bin")
+        with open(self._path, "wb") as file:
+            write_header(file, self.market_names, self.product_names, self.limits)
+        if self.max_files <= 0:
+            return
+        for old in self.files()[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError as e:  # Still mapped by a reader on Windows; retried next rollover
+                print(f"Error removing old history file: {e}")
+
+    def history(self, market, product, since=None, until=None):
+        """
+        Supply of one product at one market over a time range.
+
+        Args:
+            market (str): Market name, e.g. "Oasis".
+            product (str): Product name, e.g. "Gold".
+            since (float or None): Start time (epoch seconds), default the beginning.
+            until (float or None): End time (epoch seconds), default no end
+                (ticks not yet flushed to disk are included).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Timestamps and supplies.
+        """
+        since = -np.inf if since is None else since
+        until = np.inf if until is None else until
+        times, values = [], []
+        for path in self.files():
+            market_names, product_names, records = open_history(path)
+            if records is None or market not in market_names or product not in product_names:
+                continue
+            stamps = records["time"]
+            if stamps[-1] < since or stamps[0] > until:
+                continue
+            # bisect touches O(log n) records; np.searchsorted would copy the strided column
+            lo, hi = bisect_left(stamps, since), bisect_right(stamps, until)
+            m, p = market_names.index(market), product_names.index(product)
+            times.append(np.array(stamps[lo:hi]))
+            values.append(np.array(records["supply"][lo:hi, m, p]))
+        if self._pending and market in self.market_names and product in self.product_names:
+            pending = np.array(self._pending, dtype=self._dtype)
+            keep = (pending["time"] >= since) & (pending["time"] <= until)
+            times.append(pending["time"][keep])
+            values.append(pending["supply"][keep, self.market_names.index(market),
+                                            self.product_names.index(product)])
+        if not times:
+            return np.array([]), np.array([], dtype=np.float32)
+        return np.concatenate(times), np.concatenate(values)
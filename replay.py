@@ -0,0 +1,239 @@
+import argparse
+import json
+import sys
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from cli import add_player_arguments, player_from_args, resolve_groups
+from core import IslandGroups, Products
+from recorder import open_history, read_meta
+from routes import RouteEngine
+
+BATCH_SIZE = 4  # Ticks per array batch; larger batches mostly add memory traffic
+
+# times (T,), supplies (T, markets, products) in Products.NAMES order, limits (markets,)
+Session = namedtuple("Session", ["times", "supplies", "market_names", "limits"])
+
+
+def _product_columns(product_names, source):
+    missing = [name for name in Products.NAMES if name not in product_names]
+    if missing:
+        raise ValueError(f"{source} has no supplies for {', '.join(missing)}")
+    return [product_names.index(name) for name in Products.NAMES]
+
+
+def load_history(paths, limit=None):
+    """
+    Loads SupplyRecorder files into one session.
+
+    Files are joined in the given order; markets are matched by name, so
+    files from different scans of the same game can be mixed.
+
+    Args:
+        paths (list[str]): History files (supply-NNNNNN.bin).
+        limit (float or None): Market limit to use for every market. Needed
+            for files from versions that didn't record the limits.
+
+    Returns:
+        Session: The recorded ticks.
+    """
+    market_names, limits, times, supplies = None, None, [], []
+    for path in paths:
+        names, product_names, records = open_history(path)
+        if records is None:
+            continue
+        if market_names is None:
+            market_names = names
+            limits = read_meta(path).get("limits")
+        if sorted(names) != sorted(market_names):
+            print(f"Error loading {path}: it was recorded with a different set of markets")
+            continue
+        rows = [names.index(name) for name in market_names]
+        columns = _product_columns(product_names, path)
+        times.append(np.array(records["time"]))
+        supplies.append(np.array(records["supply"])[:, rows][:, :, columns])
+    if not times:
+        raise ValueError("No recorded ticks in the given files")
+    return _session(np.concatenate(times), np.concatenate(supplies), market_names, limits, limit)
+
+
+def load_dump(paths, limit=None):
+    """
+    Loads export_markets() snapshots into one session.
+
+    Each file holds one snapshot, a JSON list of them, or one per line
+    (NDJSON, as written by headless.py --dump).
+
+    Args:
+        paths (list[str]): Dump files.
+        limit (float or None): Market limit to use instead of the dumped ones.
+
+    Returns:
+        Session: The dumped ticks.
+    """
+    snapshots = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            text = file.read()
+        try:
+            data = json.loads(text)
+            snapshots.extend(data if isinstance(data, list) else [data])
+        except json.JSONDecodeError:
+            snapshots.extend(json.loads(line) for line in text.splitlines() if line.strip())
+    if not snapshots:
+        raise ValueError("No snapshots in the given files")
+
+    market_names = [market["name"] for market in snapshots[0]["markets"]]
+    limits = [market["limit"] for market in snapshots[0]["markets"]]
+    times, supplies = [], []
+    for snapshot in snapshots:
+        markets = {market["name"]: market["products"] for market in snapshot["markets"]}
+        if sorted(markets) != sorted(market_names):
+            print(f"Error loading snapshot at {snapshot.get('time')}: different set of markets")
+            continue
+        times.append(snapshot.get("time", len(times)))
+        supplies.append([[markets[name][product] for product in Products.NAMES] for name in market_names])
+    return _session(np.array(times, dtype=float), np.array(supplies, dtype=np.float32), market_names, limits, limit)
+
+
+def _session(times, supplies, market_names, limits, limit):
+    if limit is not None:
+        limits = [limit] * len(market_names)
+    if limits is None:
+        raise ValueError("The data has no market limits; pass one with --limit")
+    order = np.argsort(times, kind="stable")
+    return Session(times[order], supplies[order], list(market_names), np.array(limits, dtype=float))
+
+
+def load_session(paths, limit=None):
+    """History files (.bin) or JSON dumps, by extension."""
+    if all(path.endswith(".bin") for path in paths):
+        return load_history(paths, limit)
+    return load_dump(paths, limit)
+
+
+def backtest(session, player, start_groups=None, end_groups=None, engine=None, batch_size=BATCH_SIZE, top=10):
+    """
+    Replays a session through the route engine.
+
+    Every tick goes through the same pricing as the live table, with the
+    ticks stacked along an extra array dimension so a batch costs about as
+    much as one refresh. Ticks whose selected markets didn't change since
+    the previous tick reuse its result.
+
+    Args:
+        session (Session): Recorded ticks.
+        player (Player): Principal, currency, cargo limits and min_profit.
+        start_groups (list[str] or None): Start island groups, default all.
+        end_groups (list[str] or None): End island groups, default all.
+        engine (RouteEngine or None): Engine to use, default one for config.json.
+        batch_size (int): Ticks per batch; memory grows with it.
+        top (int): Number of most frequent best routes to report.
+
+    Returns:
+        dict: Session summary: tick counts, how often a route above
+        min_profit existed, the best route profit per tick (mean, median,
+        max), the routes that were best most often, and replay speed.
+    """
+    started = time.perf_counter()
+    engine = engine or RouteEngine(Products.DATA)
+    groups = [IslandGroups.get_group(name) for name in session.market_names]
+    starts = [i for i, group in enumerate(groups) if start_groups is None or group in start_groups]
+    ends = [i for i, group in enumerate(groups) if end_groups is None or group in end_groups]
+    n_ticks, n_products = len(session.times), len(Products.NAMES)
+
+    # Only ticks where a selected market changed need evaluating
+    selected = session.supplies[:, sorted(set(starts) | set(ends))]
+    changed = np.ones(n_ticks, dtype=bool)
+    changed[1:] = (selected[1:] != selected[:-1]).any(axis=(1, 2))
+    unique = np.flatnonzero(changed)
+
+    counts = np.zeros(len(unique), dtype=np.int64)
+    best_profit = np.full(len(unique), -np.inf)
+    best_cell = np.zeros((len(unique), 3), dtype=np.intp)
+    other_market = (np.array(starts)[:, None] != np.array(ends)[None, :])[None, :, :, None]
+    for first in range(0, len(unique) if starts and ends else 0, batch_size):
+        ticks = unique[first:first + batch_size]
+        batch = slice(first, first + len(ticks))
+        supplies = session.supplies[ticks].astype(float)
+        _, qty, total_buy, total_sell = engine.trades(supplies[:, starts], supplies[:, ends],
+                                                      session.limits[starts], player)
+        profit = total_sell - total_buy
+        keep = (qty > 0) & (profit > player.min_profit) & other_market
+        counts[batch] = keep.sum(axis=(1, 2, 3))
+        profit = np.where(keep, profit, -np.inf).reshape(len(ticks), -1)
+        best = profit.argmax(axis=1)
+        best_profit[batch] = profit[np.arange(len(ticks)), best]
+        best_cell[batch] = np.column_stack(np.unravel_index(best, (len(starts), len(ends), n_products)))
+
+    # Spread the evaluated ticks back over the ticks that repeated them
+    repeat = np.cumsum(changed) - 1
+    counts, best_profit, best_cell = counts[repeat], best_profit[repeat], best_cell[repeat]
+    with_routes = counts > 0
+    profits = best_profit[with_routes]
+
+    routes = Counter()
+    route_profits = {}
+    for (s, e, p), profit in zip(map(tuple, best_cell[with_routes].tolist()), profits.tolist()):
+        key = (session.market_names[starts[s]], session.market_names[ends[e]], Products.NAMES[p])
+        routes[key] += 1
+        route_profits.setdefault(key, []).append(profit)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "ticks": n_ticks,
+        "evaluated": len(unique),
+        "start": float(session.times[0]),
+        "end": float(session.times[-1]),
+        "player": {"principal": player.principal, "conversion_rate": player.conversion_rate,
+                   "mass_limit": player.mass_limit, "volume_limit": player.volume_limit,
+                   "min_profit": player.min_profit},
+        "ticks_with_routes": int(with_routes.sum()),
+        "routes_per_tick": round(float(counts.mean()), 2),
+        "best_profit": {
+            "mean": round(float(profits.mean()), 1) if profits.size else None,
+            "median": float(np.median(profits)) if profits.size else None,
+            "max": float(profits.max()) if profits.size else None
+        },
+        "best_routes": [{
+            "Start Market": start, "End Market": end, "Product": product,
+            "ticks": n, "share": round(n / n_ticks, 3),
+            "mean_profit": round(sum(route_profits[start, end, product]) / n, 1),
+            "max_profit": max(route_profits[start, end, product])
+        } for (start, end, product), n in routes.most_common(top)],
+        "elapsed": round(elapsed, 3),
+        "ticks_per_second": round(n_ticks / elapsed) if elapsed else None
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest player settings against recorded Sailwind market data.")
+    parser.add_argument("files", nargs="+", help="History files (history/supply-*.bin) or JSON/NDJSON dumps")
+    parser.add_argument("--start", nargs="+", default=["all"], metavar="GROUP",
+                        help="Start island groups, or 'all' (default: all)")
+    parser.add_argument("--end", nargs="+", default=["all"], metavar="GROUP",
+                        help="End island groups, or 'all' (default: all)")
+    add_player_arguments(parser)
+    parser.add_argument("--limit", type=float, help="Market limit for data that doesn't include it")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Ticks per batch (default: {BATCH_SIZE})")
+    parser.add_argument("--top", type=int, default=10, help="Most frequent best routes to list (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        session = load_session(args.files, args.limit)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading replay data: {e}", file=sys.stderr)
+        return 1
+    report = backtest(session, player_from_args(args), resolve_groups(args.start), resolve_groups(args.end),
+                      batch_size=args.batch_size, top=args.top)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
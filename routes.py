@@ -0,0 +1,249 @@
+import numpy as np
+
+from pricing import BUY_MARKUP
+from ranking import SORT_KEYS
+
+
+def sell_prices(base_prices, supplies):
+    """Vectorized calc_sell_price; `base_prices` broadcasts against `supplies`."""
+    V = base_prices
+    coeff = np.where(supplies > 0.5, 0.38, -1.68)
+    price = (coeff * V / 10000) * (supplies ** 2) - (np.abs(coeff) * V / 50) * supplies + V
+    return np.ceil(price)
+
+
+def _prefix(unit_prices):
+    """Cumulative sums along the last axis with a leading 0 column."""
+    prefix = np.zeros(unit_prices.shape[:-1] + (unit_prices.shape[-1] + 1,))
+    np.cumsum(unit_prices, axis=-1, out=prefix[..., 1:])
+    return prefix
+
+
+class RouteEngine:
+    """
+    Evaluates every (start market, end market, product) trade in one batch.
+
+    Supplies are stacked into market x product arrays and the per-unit price
+    curves into market x product x quantity arrays, so quantity limits,
+    buy/sell totals and profit for all cells come from a few array
+    operations. Results match calculate_trade_metrics exactly; row dicts are
+    only built for cells above the player's min_profit.
+    """
+    def __init__(self, products_data):
+        self.names = list(products_data)
+        self.volumes, self.weights, raw_prices = (list(col) for col in zip(*products_data.values()))
+        self._volume = np.array(self.volumes, dtype=float)
+        self._weight = np.array(self.weights, dtype=float)
+        self._raw_price = np.array(raw_prices, dtype=float)
+
+    def generate(self, start_markets, end_markets, player):
+        """
+        Computes the profitable single-product routes between two market lists.
+
+        Args:
+            start_markets (list[Market]): Markets to buy from.
+            end_markets (list[Market]): Markets to sell at.
+            player (Player): Principal, currency and cargo limits.
+
+        Returns:
+            list[dict]: Route rows in the same shape as calculate_trade_metrics,
+            ordered by start market, end market, then product.
+        """
+        return [route for _, _, route in self.evaluate(start_markets, end_markets, player)]
+
+    def available(self, supply, limit):
+        """Units a market sells before its supply reaches the limit; `limit` is (markets,)."""
+        return np.maximum(0, np.floor(supply - limit[:, None] + 1))
+
+    def cargo(self, player):
+        """Units of each product that fit in the hold by mass and by volume."""
+        return np.minimum(np.floor(player.mass_limit / self._weight),
+                          np.floor(player.volume_limit / self._volume))
+
+    def buy_curve(self, supply, conversion_rate, depth):
+        """
+        Cost of buying 0..depth units of every product.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: (..., products, depth + 1)
+            totals, and their running max for budget checks: the totals only
+            go down if a unit price is negative, where the running max keeps
+            the affordable count equal to the unit-by-unit loop.
+        """
+        base_prices = self._raw_price * conversion_rate
+        unit = np.ceil(sell_prices(base_prices[:, None], supply[..., None] - np.arange(depth)) * BUY_MARKUP)
+        buy = _prefix(unit)
+        peak = buy if not unit.size or unit.min() >= 0 else np.maximum.accumulate(buy, axis=-1)
+        return buy, peak
+
+    def sell_curve(self, supply, conversion_rate, depth):
+        """Revenue of selling 0..depth units of every product, (..., products, depth + 1)."""
+        base_prices = self._raw_price * conversion_rate
+        return _prefix(sell_prices(base_prices[:, None], supply[..., None] + np.arange(depth)))
+
+    def route(self, start_name, end_name, product, quantity, available, total_buy, total_sell):
+        """One route row, in the shape of calculate_trade_metrics."""
+        total_buy, total_sell = int(total_buy), int(total_sell)
+        profit = total_sell - total_buy
+        weight = self.weights[product]
+        profit_per_pound = profit / (weight * quantity) if weight else 0
+        return {
+            "Start Market": start_name,
+            "End Market": end_name,
+            "Product": self.names[product],
+            "Qnty": f"{quantity}/{available}",
+            "$_Buy": total_buy,
+            "$_Sell": total_sell,
+            "$Profit": profit,
+            "$/Pound": round(profit_per_pound, 1),
+            "$/Item": round(profit / quantity, 1)
+        }
+
+    def trades(self, start_supply, end_supply, start_limit, player):
+        """
+        Quantity and buy/sell totals of every (start, end, product) cell.
+
+        Supplies may carry leading batch dimensions (e.g. ticks of a replay);
+        they are evaluated independently, as if each were its own call.
+
+        Args:
+            start_supply (numpy.ndarray): (..., start markets, products) supplies.
+            end_supply (numpy.ndarray): (..., end markets, products) supplies.
+            start_limit (numpy.ndarray): (start markets,) market limits.
+            player (Player): Principal, currency and cargo limits.
+
+        Returns:
+            tuple[numpy.ndarray, ...]: Units available at the start (..., S, P),
+            and the traded quantity, total buy price and total sell price of
+            each cell (..., S, E, P).
+        """
+        # Quantity limits that don't depend on the price curve
+        amnt = self.available(start_supply, start_limit)
+        spread = np.floor(np.abs(start_supply[..., :, None, :] - end_supply[..., None, :, :]) / 2)
+        qty = np.minimum(np.minimum(amnt, self.cargo(player))[..., :, None, :], spread)
+        depth = max(int(qty.max()), 0) if qty.size else 0
+
+        # Price curves only need to be as deep as the largest possible trade
+        buy, peak = self.buy_curve(start_supply, player.conversion_rate, depth)
+        sell = self.sell_curve(end_supply, player.conversion_rate, depth)
+        affordable = (peak <= player.principal).sum(axis=-1) - 1
+        qty = np.minimum(qty, np.minimum(affordable, amnt)[..., :, None, :]).astype(np.intp)
+        np.maximum(qty, 0, out=qty)
+
+        # Gather the totals through flat offsets into the prefix arrays
+        batch = start_supply.shape[:-2]
+        n_starts, n_ends = start_supply.shape[-2], end_supply.shape[-2]
+        n_products, width = len(self.names), depth + 1
+        p_offset = np.arange(n_products) * width
+        start_rows = np.arange(int(np.prod(batch)) * n_starts).reshape(batch + (n_starts,)) * n_products * width
+        end_rows = np.arange(int(np.prod(batch)) * n_ends).reshape(batch + (n_ends,)) * n_products * width
+        total_buy = buy.take(start_rows[..., :, None, None] + p_offset + qty)
+        total_sell = sell.take(end_rows[..., None, :, None] + p_offset + qty)
+        return amnt, qty, total_buy, total_sell
+
+    def evaluate(self, start_markets, end_markets, player):
+        """Like generate, but returns (start index, end index, route) triples."""
+        if not start_markets or not end_markets:
+            return []
+        start_supply = np.array([m.supplies for m in start_markets], dtype=float)
+        end_supply = np.array([m.supplies for m in end_markets], dtype=float)
+        start_limit = np.array([m.limit for m in start_markets], dtype=float)
+        amnt, qty, total_buy, total_sell = self.trades(start_supply, end_supply, start_limit, player)
+        profit = total_sell - total_buy
+
+        start_ids = np.array([id(m) for m in start_markets])
+        end_ids = np.array([id(m) for m in end_markets])
+        keep = (qty > 0) & (profit > player.min_profit) & (start_ids[:, None] != end_ids[None, :])[:, :, None]
+
+        routes = []
+        available = amnt.astype(int).tolist()
+        cells = zip(*(idx.tolist() for idx in np.nonzero(keep)),
+                    qty[keep].tolist(), total_buy[keep].tolist(), total_sell[keep].tolist())
+        for s, e, p, max_qty, total_buy_price, total_sell_price in cells:
+            routes.append((s, e, self.route(start_markets[s].name, end_markets[e].name, p, max_qty,
+                                            available[s][p], total_buy_price, total_sell_price)))
+        return routes
+
+
+class RouteCache:
+    """
+    Keeps route results per (start, end) market pair between refreshes.
+
+    Each market carries a fingerprint of its raw supply bytes; only pairs that
+    touch a market whose fingerprint, limit or name changed are sent to the
+    engine again. A change of player settings or of the selected markets
+    drops everything. Markets are keyed by base address, so a re-scan of
+    the same game keeps the cache warm, and the name check catches another
+    island's market landing at a recycled address.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.stats = {"recomputed": 0, "reused": 0}
+        self.invalidate()
+
+    def invalidate(self):
+        self._settings = None
+        self._states = {}   # base -> (name, limit, fingerprint) the pairs were computed for
+        self._pairs = {}
+        self._best = {}   # pair -> best value of each sort key among its routes
+
+    def generate(self, start_markets, end_markets, player):
+        """Same result as RouteEngine.generate, recomputing only changed pairs."""
+        self._refresh(start_markets, end_markets, player)
+        return [route for start in start_markets for end in end_markets
+                for route in self._pairs[start.base, end.base]]
+
+    def rank(self, start_markets, end_markets, player, ranking):
+        """
+        Feeds the routes into a ranking.TopK instead of returning them all.
+
+        Pairs whose best value can't beat the current threshold of any key
+        are skipped without touching their routes, so once the heaps fill
+        up most pairs cost one comparison per key.
+
+        Returns:
+            int: Number of routes pushed into the ranking.
+        """
+        self._refresh(start_markets, end_markets, player)
+        pushed = 0
+        for start in start_markets:
+            for end in end_markets:
+                pair = (start.base, end.base)
+                best = self._best[pair]
+                if any(best[key] > ranking.threshold(key, start.name) for key in ranking.keys):
+                    ranking.extend(self._pairs[pair])
+                    pushed += len(self._pairs[pair])
+        return pushed
+
+    def _refresh(self, start_markets, end_markets, player):
+        settings = (player.principal, player.conversion_rate, player.mass_limit, player.volume_limit,
+                    player.min_profit, tuple(m.base for m in start_markets), tuple(m.base for m in end_markets))
+        if settings != self._settings:
+            self.invalidate()
+            self._settings = settings
+
+        states = {m.base: (m.name, m.limit, m.fingerprint) for m in start_markets + end_markets}
+        changed = {base for base, state in states.items() if self._states.get(base) != state}
+        dirty_starts = [m for m in start_markets if m.base in changed]
+        clean_starts = [m for m in start_markets if m.base not in changed]
+        dirty_ends = [m for m in end_markets if m.base in changed]
+
+        recomputed = 0
+        for starts, ends in ((dirty_starts, end_markets), (clean_starts, dirty_ends)):
+            if not starts or not ends:
+                continue
+            for start in starts:
+                for end in ends:
+                    self._pairs[start.base, end.base] = []
+            recomputed += len(starts) * len(ends)
+            for s, e, route in self.engine.evaluate(starts, ends, player):
+                self._pairs[starts[s].base, ends[e].base].append(route)
+            for start in starts:
+                for end in ends:
+                    routes = self._pairs[start.base, end.base]
+                    self._best[start.base, end.base] = {key: max((r[key] for r in routes), default=float("-inf"))
+                                                        for key in SORT_KEYS}
+
+        self._states.update(states)
+        self.stats = {"recomputed": recomputed,
+                      "reused": len(start_markets) * len(end_markets) - recomputed}
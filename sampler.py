@@ -0,0 +1,92 @@
+import queue
+import threading
+
+
+class Sampler:
+    """
+    Runs memory reads, scans and route generation on a background thread.
+
+    Work is submitted by kind ("scan", "routes", ...). Only the newest job of
+    each kind is kept: submitting again replaces a job that hasn't started
+    and makes the result of one that is running stale, so it is dropped.
+    Finished results wait in a queue until the GUI thread calls poll(), which
+    runs their callbacks there; nothing in here touches tkinter.
+    """
+    def __init__(self):
+        self.results = queue.Queue()
+        self._pending = {}      # kind -> (generation, func, args, callback)
+        self._generation = {}   # kind -> newest generation submitted
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._condition:
+            self._running = False
+            self._pending.clear()
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def submit(self, kind, func, *args, callback=None):
+        """Queues func(*args); callback(result) runs on the thread calling poll()."""
+        with self._condition:
+            generation = self._generation.get(kind, 0) + 1
+            self._generation[kind] = generation
+            self._pending.pop(kind, None)  # Re-insert so jobs run in submission order
+            self._pending[kind] = (generation, func, args, callback)
+            self._condition.notify()
+        return generation
+
+    def cancel(self, kind):
+        """Drops the pending job of `kind` and the result of a running one."""
+        with self._condition:
+            self._generation[kind] = self._generation.get(kind, 0) + 1
+            self._pending.pop(kind, None)
+
+    def is_current(self, kind, generation):
+        with self._condition:
+            return self._generation.get(kind) == generation
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                kind = next(iter(self._pending))
+                generation, func, args, callback = self._pending.pop(kind)
+            try:
+                result = func(*args)
+            except Exception as e:
+                print(f"Error in background {kind} job: {e}")
+                continue
+            if self.is_current(kind, generation):
+                self.results.put((kind, generation, callback, result))
+
+    def poll(self):
+        """
+        Delivers finished results to their callbacks. Call from the GUI thread.
+
+        Returns:
+            int: Number of callbacks run.
+        """
+        delivered = 0
+        while True:
+            try:
+                kind, generation, callback, result = self.results.get_nowait()
+            except queue.Empty:
+                return delivered
+            # Inputs may have changed again while the result sat in the queue
+            if callback and self.is_current(kind, generation):
+                callback(result)
+                delivered += 1
@@ -0,0 +1,113 @@
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from snapshot import MARKET_PATTERN, MARKET_PATTERN_LENGTH
+
+# VirtualQueryEx constants (winnt.h)
+MEM_COMMIT = 0x1000
+MEM_PRIVATE = 0x20000
+READABLE_PROTECTIONS = {0x02, 0x04, 0x08, 0x20, 0x40, 0x80}  # READONLY ... EXECUTE_WRITECOPY
+
+USER_SPACE_END = 0x7FFFFFFF0000
+CHUNK_SIZE = 4 * 1024 * 1024
+
+Region = namedtuple("Region", ["base", "size"])
+
+
+def list_regions(pm, max_address=USER_SPACE_END):
+    """
+    Lists the committed, readable, private regions of a process.
+
+    Image (DLL/EXE) and mapped-file regions are skipped; Unity allocates the
+    market objects on the private heap.
+
+    Args:
+        pm (pymem.Pymem): An instance of Pymem attached to the process.
+        max_address (int): Stop enumerating at this address.
+
+    Returns:
+        list[Region]: Regions in ascending address order.
+    """
+    if hasattr(pm, "regions"):  # Non-pymem processes (e.g. FakeProcess) list their own
+        return pm.regions()
+
+    import pymem.memory
+
+    regions = []
+    address = 0
+    while address < max_address:
+        mbi = pymem.memory.virtual_query(pm.process_handle, address)
+        base = mbi.BaseAddress or 0
+        next_address = base + mbi.RegionSize
+        if next_address <= address:
+            break
+        # Guard and no-cache pages carry extra flag bits and fail the protection check
+        if mbi.State == MEM_COMMIT and mbi.Type == MEM_PRIVATE and mbi.Protect in READABLE_PROTECTIONS:
+            regions.append(Region(base, mbi.RegionSize))
+        address = next_address
+    return regions
+
+
+def _chunks(regions, chunk_size, overlap):
+    """Splits regions into (start, read_length, keep_length) triples."""
+    for base, size in regions:
+        for offset in range(0, size, chunk_size):
+            keep = min(chunk_size, size - offset)
+            yield base + offset, min(keep + overlap, size - offset), keep
+
+
+def scan(pm, pattern=MARKET_PATTERN, pattern_length=MARKET_PATTERN_LENGTH, regions=None,
+         chunk_size=CHUNK_SIZE, workers=4):
+    """
+    Scans process memory for a byte pattern, chunk by chunk on a thread pool.
+
+    Consecutive chunks overlap by `pattern_length - 1` bytes and a match is
+    only kept by the chunk it starts in, so nothing is missed or reported
+    twice at a boundary.
+
+    Args:
+        pm (pymem.Pymem): An instance of Pymem (or any object with read_bytes).
+        pattern (bytes): Regex pattern, matched with re.DOTALL like pymem does.
+        pattern_length (int): Length of a match, used for the chunk overlap.
+        regions (list[Region] or None): Regions to scan, default list_regions(pm).
+        chunk_size (int): Bytes per read.
+        workers (int): Threads reading and matching chunks.
+
+    Returns:
+        tuple[list[int], dict]: Match addresses in ascending order and scan
+        statistics (regions, chunks, bytes scanned, seconds per stage; read
+        and match times are summed over all threads).
+    """
+    regex = re.compile(pattern, re.DOTALL)
+    stats = {"regions": 0, "chunks": 0, "bytes": 0, "list_time": 0.0,
+             "read_time": 0.0, "match_time": 0.0, "total_time": 0.0}
+    started = time.perf_counter()
+    if regions is None:
+        regions = list_regions(pm)
+    stats["list_time"] = time.perf_counter() - started
+    stats["regions"] = len(regions)
+
+    def scan_chunk(chunk):
+        start, length, keep = chunk
+        t0 = time.perf_counter()
+        try:
+            data = pm.read_bytes(start, length)
+        except Exception:
+            return [], 0, time.perf_counter() - t0, 0.0
+        t1 = time.perf_counter()
+        found = [start + match.start() for match in regex.finditer(data) if match.start() < keep]
+        return found, len(data), t1 - t0, time.perf_counter() - t1
+
+    addresses = []
+    chunks = _chunks(regions, chunk_size, pattern_length - 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for found, size, read_time, match_time in executor.map(scan_chunk, chunks):
+            addresses.extend(found)
+            stats["chunks"] += 1
+            stats["bytes"] += size
+            stats["read_time"] += read_time
+            stats["match_time"] += match_time
+    stats["total_time"] = time.perf_counter() - started
+    return addresses, stats
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+
+from metrics import metrics
+
+RATE_WINDOW = 60.0   # Seconds of reads behind the reads-per-second figure
+
+
+class _Poll:
+    __slots__ = ("interval", "next_due", "last_read", "last_change", "fingerprint")
+
+    def __init__(self, now, interval, fingerprint):
+        self.interval = interval
+        self.next_due = now + interval
+        self.last_read = now
+        self.last_change = now
+        self.fingerprint = fingerprint
+
+
+class PollScheduler:
+    """
+    Gives every market its own poll interval instead of one fixed tick.
+
+    A market whose supplies changed on its last read is polled again after
+    `min_interval`; every read without a change doubles its interval, up to
+    `selected_max_interval` for markets in the selected start/end groups
+    and `max_interval` for the rest. Markets that become selected are read
+    on the next tick if their data is older than `min_interval`. All reads
+    share a budget of `max_reads_per_second` (a token bucket holding
+    `burst_seconds` worth), spent on selected markets first, then on the
+    most overdue ones. Markets due within `slack` seconds join the tick, so
+    drifting schedules share one batched read instead of waking separately.
+
+    due() and observe() run on the thread doing the reads; until_next_due()
+    and report() may be called from another.
+    """
+    def __init__(self, min_interval=2.0, selected_max_interval=5.0, max_interval=60.0,
+                 max_reads_per_second=6.0, burst_seconds=5.0, slack=0.5, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.selected_max_interval = selected_max_interval
+        self.max_interval = max_interval
+        self.max_reads_per_second = max_reads_per_second
+        self.burst = max(1.0, max_reads_per_second * burst_seconds)
+        self.slack = slack
+        self.clock = clock
+        self.stats = {"reads": 0, "deferred": 0}
+        self._polls = {}          # (name, base) -> _Poll
+        self._selected = set()
+        self._tokens = self.burst
+        self._refilled = clock()
+        self._reads = deque()     # (time, markets read) of the last RATE_WINDOW seconds
+        self._started = clock()
+        self._lock = threading.Lock()
+
+    def due(self, markets, selected):
+        """
+        The markets to read now, most urgent first, within the read budget.
+
+        Args:
+            markets (list[Market]): Every market being watched.
+            selected (list[Market]): Markets in the selected start/end groups.
+
+        Returns:
+            list[Market]: Markets to read; pass them to observe() once read.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            selected = {(m.name, m.base) for m in selected}
+            due = []
+            for market in markets:
+                key = (market.name, market.base)
+                poll = self._polls.get(key)
+                if poll is None:
+                    # Just found by a scan, which read its supplies
+                    poll = self._polls[key] = _Poll(now, self.min_interval, market.fingerprint)
+                if key in selected:
+                    if key not in self._selected:
+                        poll.next_due = min(poll.next_due, poll.last_read + self.min_interval)
+                    poll.interval = min(poll.interval, self.selected_max_interval)
+                    poll.next_due = min(poll.next_due, poll.last_read + poll.interval)
+                if poll.next_due <= now + self.slack:
+                    due.append((key not in selected, -(now - poll.next_due) / poll.interval, market))
+            self._selected = selected
+            due.sort(key=lambda entry: entry[:2])
+            allowed = min(len(due), int(self._tokens))
+            self._tokens -= allowed
+            self.stats["deferred"] += len(due) - allowed
+            return [market for _, _, market in due[:allowed]]
+
+    def observe(self, markets):
+        """Updates the intervals of markets just read by update_markets."""
+        with self._lock:
+            now = self.clock()
+            for market in markets:
+                key = (market.name, market.base)
+                poll = self._polls[key]
+                cap = self.selected_max_interval if key in self._selected else self.max_interval
+                if market.fingerprint != poll.fingerprint:
+                    poll.fingerprint = market.fingerprint
+                    poll.last_change = now
+                    poll.interval = self.min_interval
+                else:
+                    poll.interval = min(poll.interval * 2, cap)
+                poll.last_read = now
+                poll.next_due = now + poll.interval
+            self.stats["reads"] += len(markets)
+            self._reads.append((now, len(markets)))
+            while self._reads and now - self._reads[0][0] > RATE_WINDOW:
+                self._reads.popleft()
+            if metrics.enabled:
+                metrics.count("scheduled_reads", len(markets))
+                metrics.gauge("reads_per_second", round(self._rate(now), 3))
+                stalest = 0.0
+                for (name, _), poll in self._polls.items():
+                    metrics.gauge("staleness_seconds", round(now - poll.last_read, 1), market=name)
+                    stalest = max(stalest, now - poll.last_read)
+                metrics.gauge("max_staleness_seconds", round(stalest, 1))
+
+    def until_next_due(self):
+        """Seconds until a tick would read something (0 if one would now)."""
+        with self._lock:
+            now = self.clock()
+            if not self._polls:
+                return 0.0
+            wait = max(0.0, min(poll.next_due for poll in self._polls.values()) - now)
+            self._refill(now)
+            if self._tokens < 1:
+                wait = max(wait, (1 - self._tokens) / self.max_reads_per_second)
+            return wait
+
+    def report(self):
+        """
+        Effective read rate and per-market staleness.
+
+        Returns:
+            dict: "reads", "deferred" (reads postponed by the budget),
+            "reads_per_second" over the last minute, "average_reads_per_second"
+            since the start, and "markets" (name -> interval, staleness and
+            seconds since its supplies last changed, and whether it is selected).
+        """
+        with self._lock:
+            now = self.clock()
+            return {
+                **self.stats,
+                "reads_per_second": round(self._rate(now), 3),
+                "average_reads_per_second": round(self.stats["reads"] / max(now - self._started, 1e-9), 3),
+                "markets": {name: {"interval": poll.interval,
+                                   "staleness": round(now - poll.last_read, 1),
+                                   "unchanged_for": round(now - poll.last_change, 1),
+                                   "selected": (name, base) in self._selected}
+                            for (name, base), poll in self._polls.items()}
+            }
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.max_reads_per_second)
+        self._refilled = now
+
+    def _rate(self, now):
+        span = min(RATE_WINDOW, now - self._started)
+        return sum(count for _, count in self._reads) / span if span > 0 else 0.0
@@ -0,0 +1,404 @@
+import atexit
+import ctypes
+import json
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core import IslandGroups, Market, Product, Products, PLAYER_SETTINGS, SHARED_SETTINGS
+from snapshot import read_supply_block
+
+SHARED_NAME = "sailwind_market_watcher"
+MAGIC = 0x314D485357534157   # b"WASWSHM1" little-endian
+MAX_MARKETS = 256
+META_SIZE = 64 * 1024         # JSON with names, addresses and limits; rewritten only after a scan
+HEADER_SIZE = 64              # 8 uint64: magic, sequence, meta_seq, markets, products, meta_length, capacity, owner pid
+SLOT_HEADER_SIZE = 32         # 4 uint64-sized fields: seq, tick, time (float64), meta_seq
+RETRY_SLEEP = 0.001           # Pause between seqlock retries once yielding wasn't enough
+
+# Header fields (uint64 index)
+_MAGIC, _SEQUENCE, _META_SEQ, _MARKETS, _PRODUCTS, _META_LENGTH, _CAPACITY, _OWNER = range(8)
+
+_published = set()  # Segments created by this process
+
+
+def _size(capacity, products):
+    return HEADER_SIZE + META_SIZE + 2 * (SLOT_HEADER_SIZE + capacity * products * 4)
+
+
+def _backoff(attempt):
+    """Lets the publisher finish a write before a seqlock read is retried."""
+    time.sleep(0 if attempt < 10 else RETRY_SLEEP)
+
+
+def _process_alive(pid):
+    """Whether a process with `pid` is running (one we may not inspect counts as running)."""
+    if os.name == 'nt':
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # ERROR_ACCESS_DENIED
+        try:
+            code = ctypes.c_ulong()
+            return not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) or code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner(name):
+    """PID of the live publisher of segment `name`, or None if it's gone."""
+    try:
+        shm = _attach(name)
+    except FileNotFoundError:
+        return None
+    try:
+        header = struct.unpack_from("<8Q", shm.buf) if shm.size >= HEADER_SIZE else (0,) * 8
+    finally:
+        shm.close()
+    if header[_MAGIC] != MAGIC or not header[_OWNER]:
+        return None
+    return header[_OWNER] if _process_alive(header[_OWNER]) else None
+
+
+class _Layout:
+    """numpy views on the header, metadata and the two slots of a segment."""
+    def __init__(self, buf, capacity, products):
+        self.header = np.ndarray((8,), dtype=np.uint64, buffer=buf)
+        self.meta = buf[HEADER_SIZE:HEADER_SIZE + META_SIZE]
+        self.slots, self.slot_times, self.matrices = [], [], []
+        offset = HEADER_SIZE + META_SIZE
+        for _ in range(2):
+            self.slots.append(np.ndarray((4,), dtype=np.uint64, buffer=buf, offset=offset))
+            self.slot_times.append(np.ndarray((1,), dtype=np.float64, buffer=buf, offset=offset + 16))
+            self.matrices.append(np.ndarray((capacity, products), dtype=np.float32, buffer=buf,
+                                            offset=offset + SLOT_HEADER_SIZE))
+            offset += SLOT_HEADER_SIZE + capacity * products * 4
+
+    def release(self, shm):
+        """Drops the views and unmaps the segment (kept mapped while a caller still holds a view)."""
+        self.meta.release()
+        self.header = self.meta = self.slots = self.slot_times = self.matrices = None
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+class SnapshotPublisher:
+    """
+    Publishes every polled tick into a named shared memory segment.
+
+    One process reads the game; any number of local consumers (see
+    Subscriber) map the segment instead of attaching to the game. The
+    segment holds a header with the tick sequence number, the market
+    metadata (names, addresses, limits, product names) and two slots of
+    the decoded markets x products float32 supply matrix. Ticks go to the
+    slots alternately (double buffer) and every slot and the metadata are
+    guarded by a seqlock (odd while being written), so a reader looking
+    at the newest slot is never disturbed by the next tick and can always
+    detect a torn read.
+    """
+    def __init__(self, name=SHARED_NAME, capacity=MAX_MARKETS):
+        self.name = name
+        self.capacity = capacity
+        self.products = len(Products.NAMES)
+        size = _size(capacity, self.products)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            owner = _owner(name)
+            if owner is not None:
+                raise FileExistsError(f"Shared memory '{name}' is in use by the publisher in process {owner}")
+            # Left behind by a publisher that didn't shut down; take it over
+            stale = shared_memory.SharedMemory(name=name)
+            stale.unlink()
+            stale.close()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _published.add(name)
+        self.layout = _Layout(self.shm.buf, capacity, self.products)
+        self.layout.header[:] = 0
+        self.layout.header[_PRODUCTS] = self.products
+        self.layout.header[_CAPACITY] = capacity
+        self.layout.header[_OWNER] = os.getpid()
+        self.layout.header[_MAGIC] = MAGIC
+        self._layout_key = None
+
+    def publish(self, markets, timestamp=None):
+        """
+        Publishes the current supplies of `markets` as the next tick.
+
+        Returns:
+            int: The tick's sequence number, or 0 if it wasn't published.
+        """
+        if len(markets) > self.capacity:
+            print(f"Error publishing markets: {len(markets)} markets, the segment holds {self.capacity}")
+            return 0
+        layout = self.layout
+        key = tuple((m.name, m.base, m.supply_address, m.limit) for m in markets)
+        if key != self._layout_key:
+            self._write_meta(markets)
+            self._layout_key = key
+
+        sequence = int(layout.header[_SEQUENCE]) + 1
+        slot = sequence % 2
+        layout.slots[slot][0] += 1   # Odd: being written
+        layout.matrices[slot][:len(markets)] = [m.supplies for m in markets]
+        layout.slots[slot][1] = sequence
+        layout.slot_times[slot][0] = time.time() if timestamp is None else timestamp
+        layout.slots[slot][3] = layout.header[_META_SEQ]
+        layout.slots[slot][0] += 1
+        layout.header[_SEQUENCE] = sequence
+        return sequence
+
+    def _write_meta(self, markets):
+        meta = json.dumps({
+            "markets": [m.name for m in markets],
+            "bases": [m.base for m in markets],
+            "supply_addresses": [m.supply_address for m in markets],
+            "indices": [m.index for m in markets],
+            "limits": [float(m.limit) for m in markets],
+            "products": Products.NAMES
+        }, ensure_ascii=False).encode("utf-8")
+        if len(meta) > META_SIZE:
+            raise ValueError(f"Market metadata is {len(meta)} bytes, the segment holds {META_SIZE}")
+        header = self.layout.header
+        header[_META_SEQ] += 1
+        self.layout.meta[:len(meta)] = meta
+        header[_META_LENGTH] = len(meta)
+        header[_MARKETS] = len(markets)
+        header[_META_SEQ] += 1
+
+    def close(self):
+        if self.layout is None:
+            return
+        self.layout.release(self.shm)
+        self.layout = None
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def create_publisher(name=None):
+    """SnapshotPublisher configured from shared_settings, or None if publishing is disabled."""
+    if name is None:
+        if not SHARED_SETTINGS.get("publish", False):
+            return None
+        name = SHARED_SETTINGS.get("name", SHARED_NAME)
+    try:
+        publisher = SnapshotPublisher(name, SHARED_SETTINGS.get("capacity", MAX_MARKETS))
+    except OSError as e:
+        print(f"Error creating shared memory '{name}': {e}")
+        return None
+    print(f"📡 Publishing ticks to shared memory '{name}'")
+    return publisher
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if name in _published:
+            return shm
+        try:
+            # Older versions would unlink the publisher's segment when this consumer exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class Subscriber:
+    """
+    Reads the ticks a SnapshotPublisher puts in shared memory.
+
+    Works as the `pm` of SharedMarket objects: their supply reads
+    (read_supply_block / read_supply_blocks) are served from the newest
+    published tick, so compute_routes, the recorder and the GUI run
+    unchanged without touching the game. view() gives the raw matrix
+    without copying.
+
+    Raises:
+        backends.ProcessNotFound: No publisher is running.
+    """
+    def __init__(self, name=SHARED_NAME, retries=1000):
+        from backends import ProcessNotFound
+        try:
+            self.shm = _attach(name)
+        except FileNotFoundError as e:
+            raise ProcessNotFound(f"No publisher at shared memory '{name}'") from e
+        self.name = name
+        header = np.ndarray((8,), dtype=np.uint64, buffer=self.shm.buf)
+        if int(header[_MAGIC]) != MAGIC:
+            self.shm.close()
+            raise ProcessNotFound(f"Shared memory '{name}' is not a market snapshot")
+        self.layout = _Layout(self.shm.buf, int(header[_CAPACITY]), int(header[_PRODUCTS]))
+        self.retries = retries
+        self.process_id = f"shm:{name}"
+        self.process_handle = None
+        self.meta = None
+        self._meta_seq = None
+        self._rows = {}
+        atexit.register(self.close)
+
+    @property
+    def sequence(self):
+        """Sequence number of the newest tick (0 before the first)."""
+        return int(self.layout.header[_SEQUENCE])
+
+    def wait(self, after, timeout=None, poll_interval=0.01):
+        """
+        Sleeps until a tick newer than `after` is published.
+
+        Returns:
+            int or None: The new sequence number, or None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sequence = self.sequence
+            if sequence > after:
+                return sequence
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def refresh_meta(self):
+        """Re-reads the metadata if the publisher rewrote it; returns it."""
+        header = self.layout.header
+        for attempt in range(self.retries):
+            if attempt:
+                _backoff(attempt)
+            before = int(header[_META_SEQ])
+            if before == self._meta_seq:
+                return self.meta
+            if before % 2:
+                continue
+            raw = bytes(self.layout.meta[:int(header[_META_LENGTH])])
+            if int(header[_META_SEQ]) == before:
+                self.meta = json.loads(raw)
+                self._meta_seq = before
+                self._rows = {address: row for row, address in enumerate(self.meta["supply_addresses"])}
+                return self.meta
+        raise TimeoutError("Publisher kept rewriting the market metadata")
+
+    def view(self):
+        """
+        Zero-copy access to the newest tick.
+
+        Returns:
+            tuple[int, numpy.ndarray, callable] or None: Sequence number,
+            a (markets, products) float32 view into shared memory, and a
+            function returning False once the view may have been
+            overwritten or the publisher re-published its markets (check
+            it after using the data; copy first to keep it). None before
+            the first tick.
+        """
+        for attempt in range(self.retries):
+            if attempt:
+                _backoff(attempt)
+            sequence = self.sequence
+            if not sequence:
+                return None
+            meta = self.refresh_meta()
+            meta_seq = self._meta_seq
+            slot = self.layout.slots[sequence % 2]
+            before = int(slot[0])
+            # Skip a slot being written or written for other markets than `meta` lists
+            if before % 2 or int(slot[3]) != meta_seq:
+                continue
+            # The slot may already hold a newer tick than `sequence`; report its own
+            tick = int(slot[1])
+            matrix = self.layout.matrices[sequence % 2][:len(meta["markets"])]
+            header = self.layout.header
+            return tick, matrix, lambda: (int(slot[0]) == before and int(slot[3]) == meta_seq
+                                          and int(header[_META_SEQ]) == meta_seq)
+        raise TimeoutError("Publisher kept rewriting the tick being read")
+
+    def read(self):
+        """
+        A consistent copy of the newest tick.
+
+        Returns:
+            tuple[int, float, numpy.ndarray] or None: Sequence number,
+            publish time and a (markets, products) float32 copy, or None
+            before the first tick.
+        """
+        for attempt in range(self.retries):
+            if attempt:
+                _backoff(attempt)
+            sequence = self.sequence
+            if not sequence:
+                return None
+            meta = self.refresh_meta()
+            slot = self.layout.slots[sequence % 2]
+            before = int(slot[0])
+            if before % 2:
+                continue
+            matrix = self.layout.matrices[sequence % 2][:len(meta["markets"])].copy()
+            published = float(self.layout.slot_times[sequence % 2][0])
+            if int(slot[0]) == before and int(slot[1]) == sequence and int(slot[3]) == self._meta_seq:
+                return sequence, published, matrix
+        raise TimeoutError("Publisher kept rewriting the tick being read")
+
+    def read_many(self, requests):
+        """Supply reads by published supply address, all from one tick."""
+        tick = self.read()
+        results = []
+        for address, length in requests:
+            row = self._rows.get(address)
+            if tick is None or row is None:
+                results.append(None)
+                continue
+            results.append(tick[2][row].tobytes()[:length])
+        return results
+
+    def read_bytes(self, address, length):
+        data = self.read_many([(address, length)])[0]
+        if data is None:
+            raise ValueError(f"Address {address} is not a published supply block")
+        return data
+
+    def markets(self):
+        """SharedMarket objects for the published markets (empty before the first tick)."""
+        if not self.sequence:
+            return []
+        meta = self.refresh_meta()
+        return [SharedMarket(self, row) for row in range(len(meta["markets"]))]
+
+    def close(self):
+        if self.layout is not None:
+            self.layout.release(self.shm)
+            self.layout = None
+
+
+class SharedMarket(Market):
+    """A Market whose supplies come from a Subscriber instead of the game."""
+    def __init__(self, subscriber, row):
+        meta = subscriber.meta
+        self.pm = subscriber
+        self.base = meta["bases"][row]
+        self.name = meta["markets"][row]
+        self.index = meta["indices"][row]
+        self.group = IslandGroups.get_group(self.name)
+        self.conversion_rate = PLAYER_SETTINGS["conversion_rate"]
+        self.limit = meta["limits"][row]
+        self.supply_address = meta["supply_addresses"][row]
+        self.supplies = read_supply_block(subscriber, self.supply_address, len(Products.NAMES))
+        self.fingerprint = hash(self.supplies.tobytes())
+        self.products = [Product(self, column) for column in range(len(Products.NAMES))]
+
+    def refresh(self):
+        self.supplies = read_supply_block(self.pm, self.supply_address, len(Products.NAMES))
+        self.fingerprint = hash(self.supplies.tobytes())
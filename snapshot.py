@@ -0,0 +1,118 @@
+import struct
+import sys
+from array import array
+
+# =============================================================================
+# Market Memory Layout
+# =============================================================================
+
+# Offsets relative to a market's base address
+SUPPLY_ARRAY_OFFSET = 0x20   # Pointer to the managed float[] of product supplies
+NAME_OBJECT_OFFSET = 0x38    # Pointer to the island object (name string, index)
+LIMIT_OFFSET = 0x4C          # float, minimum supply the market keeps in stock
+SIGNATURE_OFFSET = 0x4E      # Where the scan signature starts
+
+# Offset of the first product's supply inside the float[] object
+SUPPLY_DATA_OFFSET = 0x24
+
+# Bytes found at base + SIGNATURE_OFFSET of every market object
+MARKET_PATTERN = rb"..\x00\x00\x80\x3F\x00\x00.\x42.\x00\x00\x00\x6F\x12\x83\x3A\x00\x00\x80\x3F"
+MARKET_PATTERN_LENGTH = 22
+
+
+def read_market_name(pm, base):
+    """
+    Reads a market's name from its island object (a managed UTF-16 string).
+
+    Args:
+        pm (pymem.Pymem): An instance of Pymem (or any object with read_longlong/read_bytes).
+        base (int): The market's base address.
+
+    Returns:
+        str: The market name, or "Unknown Market" if it can't be read.
+    """
+    try:
+        addr_ptr = pm.read_longlong(base + NAME_OBJECT_OFFSET)
+        addr = pm.read_longlong(addr_ptr + 0x18)
+        length = struct.unpack("<I", pm.read_bytes(addr + 0x10, 4))[0]
+        raw = pm.read_bytes(addr + 0x14, length * 2)
+        return raw[::2][:length].decode('utf-8', errors='ignore')
+    except Exception:
+        return "Unknown Market"
+
+
+def supply_block_address(pm, base):
+    """
+    Resolves the address of a market's contiguous supply array.
+
+    Args:
+        pm (pymem.Pymem): An instance of Pymem (or any object with read_longlong).
+        base (int): The market's base address.
+
+    Returns:
+        int: Address of the first product's supply float.
+    """
+    return pm.read_longlong(base + SUPPLY_ARRAY_OFFSET) + SUPPLY_DATA_OFFSET
+
+
+def _decode_supplies(raw):
+    supplies = array('f')
+    supplies.frombytes(raw)
+    if sys.byteorder != 'little':  # Game memory is always little-endian
+        supplies.byteswap()
+    return supplies
+
+
+def read_supply_blocks(pm, addresses, count, stats=None):
+    """
+    Reads the supply arrays of several markets, batched when the backend can.
+
+    Backends with read_many (see backends.py) fetch every block in one call,
+    a single process_vm_readv syscall on Linux; others get one read_bytes
+    per block.
+
+    Args:
+        pm (pymem.Pymem or MemoryBackend): The attached process.
+        addresses (list[int]): Address of each market's first supply float.
+        count (int): Floats per market.
+        stats (dict or None): If given, "reads" is increased by the read
+            calls issued (a read_many batch counts once) and "bytes" by the
+            bytes read.
+
+    Returns:
+        list[array.array or None]: Supplies per market, None where the read failed.
+    """
+    if not hasattr(pm, "read_many"):
+        supplies = [read_supply_block(pm, address, count) for address in addresses]
+        if stats is not None:
+            stats["reads"] = stats.get("reads", 0) + len(addresses)
+            stats["bytes"] = stats.get("bytes", 0) + 4 * count * sum(s is not None for s in supplies)
+        return supplies
+    blocks = pm.read_many([(address, count * 4) for address in addresses])
+    if stats is not None:
+        stats["reads"] = stats.get("reads", 0) + 1
+        stats["bytes"] = stats.get("bytes", 0) + sum(len(raw) for raw in blocks if raw is not None)
+    failed = sum(raw is None for raw in blocks)
+    if failed:
+        print(f"Error reading memory: {failed} of {len(blocks)} supply blocks unreadable")
+    return [None if raw is None else _decode_supplies(raw) for raw in blocks]
+
+
+def read_supply_block(pm, address, count):
+    """
+    Reads `count` consecutive 4-byte floats with a single read_bytes call.
+
+    Args:
+        pm (pymem.Pymem): An instance of Pymem (or any object with read_bytes).
+        address (int): Address of the first float.
+        count (int): Number of floats to read.
+
+    Returns:
+        array.array or None: The decoded supplies ('f' typecode), or None if an error occurs.
+    """
+    try:
+        raw = pm.read_bytes(address, count * 4)
+    except Exception as e:
+        print(f"Error reading memory: {e}")
+        return None
+    return _decode_supplies(raw)
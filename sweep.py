@@ -0,0 +1,189 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cli import resolve_groups
+from core import IslandGroups, Player, Products, PLAYER_SETTINGS
+from replay import load_session
+from routes import RouteEngine
+
+# Hold sizes from the GUI tooltips: (mass limit, volume limit)
+SHIPS = {"dhow": (1000, 40), "sanbuq": (4000, 120)}
+SETTINGS = ["principal", "conversion_rate", "mass_limit", "volume_limit", "min_profit"]
+
+# One market snapshot: names (M,), limits (M,), supplies (M, products) in Products.NAMES order
+Snapshot = namedtuple("Snapshot", ["market_names", "limits", "supplies"])
+
+# Stand-in for core.Market with just what RouteEngine reads
+_Market = namedtuple("_Market", ["name", "limit", "supplies"])
+
+_worker = {}  # Per-process state set by _init_worker
+
+
+def snapshot_from_markets(markets):
+    """Snapshot of live core.Market objects."""
+    return Snapshot([m.name for m in markets], np.array([m.limit for m in markets], dtype=float),
+                    np.array([m.supplies for m in markets], dtype=np.float32))
+
+
+def snapshot_from_session(session, tick=-1):
+    """Snapshot of one tick of a replay.Session (default the last)."""
+    return Snapshot(list(session.market_names), np.array(session.limits, dtype=float),
+                    np.array(session.supplies[tick], dtype=np.float32))
+
+
+def scenario_grid(principal=None, conversion_rate=None, ships=None, min_profit=None):
+    """
+    Every combination of the given player settings.
+
+    Args:
+        principal (list[float] or None): Principals, default player_settings.
+        conversion_rate (list[float] or None): Currency rates, default player_settings.
+        ships (list[tuple[float, float]] or None): (mass limit, volume limit)
+            pairs, default player_settings; mass and volume belong to one
+            ship, so they are not crossed with each other.
+        min_profit (list[float] or None): Minimum profits, default player_settings.
+
+    Returns:
+        list[dict]: One dict of SETTINGS per scenario.
+    """
+    ships = ships or [(PLAYER_SETTINGS["mass_limit"], PLAYER_SETTINGS["volume_limit"])]
+    return [{"principal": p, "conversion_rate": c, "mass_limit": m, "volume_limit": v, "min_profit": mp}
+            for p, c, (m, v), mp in itertools.product(principal or [PLAYER_SETTINGS["principal"]],
+                                                      conversion_rate or [PLAYER_SETTINGS["conversion_rate"]],
+                                                      ships, min_profit or [PLAYER_SETTINGS["min_profit"]])]
+
+
+def _init_worker(snapshot, starts, ends, top):
+    # Runs once per worker process: the snapshot arrives here, not with every task
+    markets = [_Market(name, limit, supplies)
+               for name, limit, supplies in zip(snapshot.market_names, snapshot.limits, snapshot.supplies)]
+    _worker.update(engine=RouteEngine(Products.DATA), starts=[markets[i] for i in starts],
+                   ends=[markets[i] for i in ends], top=top)
+
+
+def _evaluate(scenario):
+    player = Player()
+    player.update(**scenario)
+    started = time.perf_counter()
+    routes = _worker["engine"].generate(_worker["starts"], _worker["ends"], player)
+    best = sorted(routes, key=lambda route: -route["$Profit"])[:_worker["top"]]
+    return {
+        **scenario,
+        "routes": len(routes),
+        "best_profit": best[0]["$Profit"] if best else None,
+        "best_per_pound": max((route["$/Pound"] for route in routes), default=None),
+        "best_per_item": max((route["$/Item"] for route in routes), default=None),
+        "best_routes": best,
+        "seconds": round(time.perf_counter() - started, 4)
+    }
+
+
+def sweep(snapshot, scenarios, start_groups=None, end_groups=None, workers=None, top=3):
+    """
+    Evaluates the route table of one snapshot for every player scenario.
+
+    Scenarios are spread over a process pool. The snapshot goes to each
+    worker once through the pool initializer; a task only carries its
+    scenario dict and returns a summary, never the full route list.
+
+    Args:
+        snapshot (Snapshot): Market supplies to evaluate.
+        scenarios (list[dict]): Player settings (see scenario_grid).
+        start_groups (list[str] or None): Start island groups, default all.
+        end_groups (list[str] or None): End island groups, default all.
+        workers (int or None): Processes, default os.cpu_count(); 1 runs
+            in this process.
+        top (int): Best routes to include per scenario.
+
+    Returns:
+        list[dict]: Per scenario, in input order: its settings, the number
+        of routes above min_profit, the best $Profit, $/Pound and $/Item,
+        the `top` best routes by $Profit and the evaluation time.
+    """
+    groups = [IslandGroups.get_group(name) for name in snapshot.market_names]
+    starts = [i for i, group in enumerate(groups) if start_groups is None or group in start_groups]
+    ends = [i for i, group in enumerate(groups) if end_groups is None or group in end_groups]
+    workers = min(workers or os.cpu_count() or 1, len(scenarios)) or 1
+    initargs = (snapshot, starts, ends, top)
+    if workers == 1:
+        _init_worker(*initargs)
+        return [_evaluate(scenario) for scenario in scenarios]
+    chunksize = max(1, len(scenarios) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        return list(executor.map(_evaluate, scenarios, chunksize=chunksize))
+
+
+def format_table(rows):
+    """The sweep results as one fixed-width comparison table, best scenario first."""
+    header = (f"{'Principal':>10} {'Rate':>7} {'Mass':>6} {'Volume':>6} {'MinProfit':>9} "
+              f"{'Routes':>7} {'$Profit':>8} {'$/Pound':>8} {'$/Item':>8}  Best route")
+    lines = [header, "-" * len(header)]
+    for row in sorted(rows, key=lambda row: -(row["best_profit"] or 0)):
+        best = row["best_routes"][0] if row["best_routes"] else None
+        route = f"{best['Start Market']} → {best['End Market']} ({best['Product']}, {best['Qnty']})" if best else "-"
+        lines.append(f"{row['principal']:>10.0f} {row['conversion_rate']:>7.2f} {row['mass_limit']:>6.0f} "
+                     f"{row['volume_limit']:>6.0f} {row['min_profit']:>9.0f} {row['routes']:>7} "
+                     f"{row['best_profit'] or 0:>8} {row['best_per_pound'] or 0:>8.1f} "
+                     f"{row['best_per_item'] or 0:>8.1f}  {route}")
+    return "\n".join(lines)
+
+
+def parse_ship(value):
+    if value.lower() in SHIPS:
+        return SHIPS[value.lower()]
+    try:
+        mass, volume = value.lower().split("x")
+        return float(mass), float(volume)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected {' or '.join(SHIPS)} or MASSxVOLUME, got {value!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare player settings (ships, budgets, currencies) "
+                                                 "on one recorded market snapshot.")
+    parser.add_argument("files", nargs="+", help="History files (history/supply-*.bin) or JSON/NDJSON dumps")
+    parser.add_argument("--tick", type=int, default=-1, help="Tick of the recording to use (default: the last)")
+    parser.add_argument("--limit", type=float, help="Market limit for data that doesn't include it")
+    parser.add_argument("--start", nargs="+", default=["all"], metavar="GROUP",
+                        help="Start island groups, or 'all' (default: all)")
+    parser.add_argument("--end", nargs="+", default=["all"], metavar="GROUP",
+                        help="End island groups, or 'all' (default: all)")
+    parser.add_argument("--principal", nargs="+", type=float, help="Principals to compare")
+    parser.add_argument("--conversion-rate", nargs="+", type=float, help="Currency rates to compare")
+    parser.add_argument("--ship", nargs="+", type=parse_ship, metavar="SHIP",
+                        help=f"Holds to compare: {', '.join(SHIPS)} or MASSxVOLUME (e.g. 2500x80)")
+    parser.add_argument("--min-profit", nargs="+", type=float, help="Minimum profits to compare")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--top", type=int, default=3, help="Best routes kept per scenario (default: 3)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON instead of a table")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        snapshot = snapshot_from_session(load_session(args.files, args.limit), args.tick)
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        print(f"Error loading snapshot: {e}", file=sys.stderr)
+        return 1
+    scenarios = scenario_grid(args.principal, args.conversion_rate, args.ship, args.min_profit)
+    started = time.perf_counter()
+    rows = sweep(snapshot, scenarios, resolve_groups(args.start), resolve_groups(args.end), args.workers, args.top)
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        print(format_table(rows))
+        print(f"{len(rows)} scenarios in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
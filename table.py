@@ -0,0 +1,127 @@
+from ranking import TopK
+
+ROUTE_COLUMNS = ["Start Market", "End Market", "Product", "Qnty", "$_Buy", "$_Sell", "$Profit", "$/Pound", "$/Item"]
+
+
+def route_key(route):
+    """Stable row id of a route: (start, end, product)."""
+    return f"{route['Start Market']}|{route['End Market']}|{route['Product']}"
+
+
+def _stable_rows(positions):
+    """
+    Longest increasing subsequence of `positions`, as a set of their indices.
+
+    Rows at these indices are already in the right relative order and never
+    need to be moved.
+    """
+    tails, tail_idx, prev = [], [], [None] * len(positions)
+    for i, pos in enumerate(positions):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < pos:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(tails):
+            tails.append(pos)
+            tail_idx.append(i)
+        else:
+            tails[lo] = pos
+            tail_idx[lo] = i
+        prev[i] = tail_idx[lo - 1] if lo else None
+    stable = set()
+    i = tail_idx[-1] if tail_idx else None
+    while i is not None:
+        stable.add(i)
+        i = prev[i]
+    return stable
+
+
+class RouteTable:
+    """
+    Keeps a ttk.Treeview in sync with a list of routes.
+
+    Rows are keyed by (start, end, product). A refresh deletes rows that
+    disappeared, inserts new ones, rewrites only cells whose values changed,
+    and moves the fewest rows needed to match the new order, so the number of
+    Tk calls follows what changed instead of the table size. The selection and
+    scroll position survive refreshes. Works with any object offering the
+    Treeview methods used here, so it can run without a display.
+    """
+    def __init__(self, tree, columns=ROUTE_COLUMNS, limit=None):
+        self.tree = tree
+        self.columns = columns
+        self.limit = limit  # Render only the best `limit` routes by the active sort column
+        self._values = {}   # iid -> tuple of displayed values
+        self._order = []    # iids in display order
+        self.stats = {"inserted": 0, "updated": 0, "deleted": 0, "moved": 0}
+
+    def render(self, routes, sort_key="$Profit"):
+        """
+        Shows `routes` in the given order.
+
+        With a row limit, the best `limit` routes by `sort_key` are kept
+        (whatever their start market) and shown in the given order.
+
+        Args:
+            routes (list[dict]): Routes in display order.
+            sort_key (str): Column the routes are ranked by.
+
+        Returns:
+            dict: Rows inserted, updated, deleted and moved by this refresh.
+        """
+        if self.limit and len(routes) > self.limit:
+            ranking = TopK(self.limit, [sort_key])
+            ranking.extend(routes)
+            best = {id(route) for route in ranking.ranked(sort_key)}
+            routes = [route for route in routes if id(route) in best]
+        rows = {}
+        for route in routes:
+            rows[route_key(route)] = tuple(route[k] for k in self.columns)
+        desired = list(rows)
+        stats = {"inserted": 0, "updated": 0, "deleted": 0, "moved": 0}
+
+        gone = [iid for iid in self._order if iid not in rows]
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self._values[iid]
+            stats["deleted"] = len(gone)
+            self._order = [iid for iid in self._order if iid in rows]
+
+        for iid, values in rows.items():
+            if iid in self._values and self._values[iid] != values:
+                self.tree.item(iid, values=values)
+                self._values[iid] = values
+                stats["updated"] += 1
+
+        # Existing rows on the longest run already in order stay put; every
+        # other row is detached first. The tree then holds the stable rows in
+        # their final order, so once rows 0..i-1 are placed, row i goes at
+        # index i and no position has to be looked up.
+        position = {iid: i for i, iid in enumerate(desired)}
+        stable = {self._order[i] for i in _stable_rows([position[iid] for iid in self._order])}
+        for iid in self._order:
+            if iid not in stable:
+                self.tree.detach(iid)
+                stats["moved"] += 1
+        for index, iid in enumerate(desired):
+            if iid in stable:
+                continue
+            if iid in self._values:
+                self.tree.move(iid, "", index)
+            else:
+                self.tree.insert("", index, iid=iid, values=rows[iid])
+                self._values[iid] = rows[iid]
+                stats["inserted"] += 1
+        self._order = desired
+
+        self.stats = stats
+        return stats
+
+    def clear(self):
+        self.tree.delete(*self._order)
+        self._values.clear()
+        self._order.clear()
@@ -0,0 +1,150 @@
+import random
+
+import numpy as np
+import pytest
+
+from alerts import AlertEngine, CellRule, RouteRule, parse_rule
+from core import IslandGroups, Market, Player, Products, update_markets
+from fakeproc import FakeProcess, add_market
+from routes import RouteEngine
+from snapshot import supply_block_address
+
+MARKET_NAMES = [name for islands in IslandGroups.GROUPS.values() for name in islands]
+AL_ANKH = IslandGroups.GROUPS["Al'Ankh (Group 1)"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Game:
+    """Markets in a FakeProcess whose supplies a test can set between ticks."""
+    def __init__(self, rng, names=MARKET_NAMES):
+        self.fake = FakeProcess()
+        supplies = lambda: [rng.uniform(0, 80) for _ in Products.NAMES]
+        bases = [add_market(self.fake, name, i, 1.0, supplies()) for i, name in enumerate(names)]
+        self.markets = [Market(self.fake, base) for base in bases]
+        self.player = Player()
+        update_markets(self.markets, self.player.conversion_rate)
+
+    def set_supply(self, market, product, value):
+        market = next(m for m in self.markets if m.name == market)
+        address = supply_block_address(self.fake, market.base) + 4 * Products.COLUMNS[product]
+        self.fake.write_float(address, value)
+
+    def tick(self, engine):
+        update_markets(self.markets, self.player.conversion_rate)
+        return engine.update(self.markets, self.player)
+
+
+def test_parse_route_and_cell_rules():
+    rule = parse_rule("gold from any Al'Ankh market to Fire Fish Lagoon with $profit > 5000")
+    assert isinstance(rule, RouteRule)
+    assert (rule.product, rule.metric, rule.op, rule.threshold) == ("Gold", "$Profit", ">", 5000)
+    lagoon = [name for group in IslandGroups.resolve(["Fire Fish Lagoon"]) for name in IslandGroups.GROUPS[group]]
+    assert rule.starts == frozenset(AL_ANKH) and rule.ends == frozenset(lagoon)
+    assert parse_rule("Gold from Oasis, Chronos to any $Profit > 0").starts == frozenset(["Oasis", "Chronos"])
+    assert parse_rule("Gold from all to any $/Item >= 12.5").starts is None
+
+    rule = parse_rule("Truffles supply at oasis < 2")
+    assert isinstance(rule, CellRule)
+    assert (rule.product, rule.field, rule.market, rule.op, rule.threshold) == ("Truffles", "supply", "Oasis", "<", 2)
+
+
+@pytest.mark.parametrize("text, message", [
+    ("Unobtainium supply at Oasis < 2", "Unknown product"),
+    ("Gold supply at Atlantis < 2", "Unknown market"),
+    ("Gold supply at Oasis", "Can't parse"),
+    ("Gold from Oasis to Chronos with $Loss > 5", "Can't parse"),
+    ("", "Can't parse"),
+])
+def test_parse_errors(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_rule(text)
+
+
+def test_fires_once_across_hysteresis_band_and_rearms():
+    game = Game(random.Random(1))
+    engine = AlertEngine([parse_rule("Gold supply at Oasis < 20")], hysteresis=0.05, cooldown=0, clock=Clock())
+    fired = []
+    # The band is 5% of 20: the rule re-arms at 21 or more
+    for supply in [30, 19, 20.5, 18, 19.9, 20.9, 19, 21, 25, 10]:
+        game.set_supply("Oasis", "Gold", supply)
+        fired.append(len(game.tick(engine)))
+    assert fired == [0, 1, 0, 0, 0, 0, 0, 0, 0, 1]
+    event = engine.drain()[0]
+    assert (event["Market"], event["Product"], event["supply"]) == ("Oasis", "Gold", 19)
+    assert engine.drain() == []
+
+
+def test_cooldown_holds_back_until_it_expires():
+    game = Game(random.Random(2))
+    clock = Clock()
+    engine = AlertEngine([parse_rule("Gold supply at Oasis < 20")], cooldown=300, clock=clock)
+    game.set_supply("Oasis", "Gold", 10)
+    assert len(game.tick(engine)) == 1
+    game.set_supply("Oasis", "Gold", 40)
+    game.tick(engine)
+    game.set_supply("Oasis", "Gold", 10)
+    clock.now += 100
+    assert game.tick(engine) == [] and engine.stats["suppressed"] == 1
+    clock.now += 250
+    # Still holding once the cooldown is over: fires without a new change
+    assert len(game.tick(engine)) == 1
+
+
+def test_global_rate_limit():
+    game = Game(random.Random(3))
+    clock = Clock()
+    rules = [parse_rule(f"{product} supply at Oasis < 1000") for product in Products.NAMES[:4]]
+    engine = AlertEngine(rules, cooldown=0, max_per_minute=3, clock=clock)
+    assert len(game.tick(engine)) == 3
+    assert engine.stats["suppressed"] == 1
+    clock.now += 30
+    assert game.tick(engine) == []
+    clock.now += 31
+    assert len(game.tick(engine)) == 1
+    assert engine.stats["fired"] == 4
+
+
+def full_route_table(game):
+    """Every route of a fresh RouteEngine, unfiltered by min_profit."""
+    player = Player()
+    player.update(game.player.principal, game.player.conversion_rate, game.player.mass_limit,
+                  game.player.volume_limit, -1e18)
+    return RouteEngine(Products.DATA).generate(game.markets, game.markets, player)
+
+
+def best_route_value(routes, rule):
+    values = [route[rule.metric] for route in routes if route["Product"] == rule.product
+              and (rule.starts is None or route["Start Market"] in rule.starts)
+              and (rule.ends is None or route["End Market"] in rule.ends)]
+    return max(values, default=-np.inf)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_matches_full_evaluation(seed):
+    rng = random.Random(seed)
+    names = MARKET_NAMES[:MARKET_NAMES.index("Chronos") + 1]
+    game = Game(rng, names)
+    rules = [parse_rule(text) for text in ["Gold from Al'Ankh to any with $Profit > 1000000000",
+                                           "Salmon from any to Al'Ankh, Chronos $/Pound > 1000000000",
+                                           "Tea from Oasis to Fort Aestrin $/Item > 1000000000",
+                                           "Dates from any to any $Profit > 1000000000"]]
+    engine = AlertEngine(rules, clock=Clock())
+    for tick in range(30):
+        for _ in range(rng.randint(0, 6)):
+            game.set_supply(rng.choice(names), rng.choice(["Gold", "Salmon", "Tea", "Dates", "Lamb"]),
+                            rng.uniform(-5, 120))
+        if tick == 15:
+            game.player.principal = 500   # Settings change: everything is evaluated again
+        game.tick(engine)
+        routes = full_route_table(game)
+        for rule in rules:
+            assert rule.value == best_route_value(routes, rule), (tick, rule.text)
+    # Only the rules behind changed cells were evaluated
+    assert engine.stats["rules_evaluated"] < 30 * len(rules)
@@ -0,0 +1,62 @@
+import ctypes
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import core
+from backends import MemoryReadError, VmReadvBackend
+from fakeproc import FakeProcess, add_market
+from metrics import metrics
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="process_vm_readv is Linux-only")
+
+
+@pytest.fixture
+def own_process():
+    try:
+        backend = VmReadvBackend(os.getpid())
+        buffer = ctypes.create_string_buffer(b"probe")
+        backend.read_bytes(ctypes.addressof(buffer), 5)
+    except (OSError, MemoryReadError) as e:
+        pytest.skip(f"process_vm_readv unavailable: {e}")
+    return backend
+
+
+@linux_only
+def test_read_many_resumes_after_unreadable_range(own_process):
+    buffers = [ctypes.create_string_buffer(bytes([i]) * 64) for i in range(1, 5)]
+    requests = [(ctypes.addressof(b), 64) for b in buffers]
+    requests.insert(2, (8, 64))  # Never mapped
+    results = own_process.read_many(requests)
+    assert results[2] is None
+    assert [r for r in results if r is not None] == [b.raw[:64] for b in buffers]
+
+
+@linux_only
+def test_threads_reading_different_ranges(own_process):
+    buffers = [ctypes.create_string_buffer(bytes([i]) * 4096) for i in range(16)]
+
+    def read(i):
+        # Alternating batches per thread, so each one rebuilds its layout
+        for round in range(200):
+            b = buffers[(i + round) % len(buffers)]
+            expected = b.raw[:4096]
+            assert own_process.read_many([(ctypes.addressof(b), 4096)])[0] == expected
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(read, range(8)))
+    assert own_process.syscalls >= 8 * 200
+
+
+def test_update_markets_counts_batches(monkeypatch):
+    fake = FakeProcess()
+    markets = [core.Market(fake, add_market(fake, f"Market {i}", i, 1.0, [10.0] * len(core.Products.NAMES)))
+               for i in range(29)]
+    monkeypatch.setattr(metrics, "enabled", True)
+    monkeypatch.setattr(metrics, "counters", {})
+    fake.reset_counters()
+    core.update_markets(markets, 34.22)
+    assert metrics.counters["reads"] == fake.reads == 1
+    assert metrics.counters["bytes_read"] == 29 * 4 * len(core.Products.NAMES)
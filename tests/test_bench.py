@@ -0,0 +1,15 @@
+import bench
+import core
+from core import IslandGroups
+
+
+def test_cached_scan_is_measured_at_scale():
+    groups, count = IslandGroups.GROUPS, core.MARKET_COUNT
+    report = bench.run(scale=2, image_mb=1, repeat=1, scan_repeat=1)
+
+    assert report["meta"]["markets"] == 2 * count
+    assert report["results"]["find_markets"]["markets"] == 2 * count
+    assert "find_markets_cached" in report["results"]
+    assert report["meta"]["skipped"] == {}
+    # Globals swapped for the run are restored
+    assert (IslandGroups.GROUPS, core.MARKET_COUNT) == (groups, count)
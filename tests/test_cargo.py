@@ -0,0 +1,92 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+from cargo import CargoOptimizer
+from core import Player, Products
+from pricing import calc_sell_price
+from routes import RouteEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RouteEngine(Products.DATA)
+
+
+def random_pair(rng):
+    """Markets A and B that differ in 1-4 products, so exhaustive search stays small."""
+    traded = rng.sample(range(len(Products.NAMES)), rng.randint(1, 4))
+    a = np.array([rng.uniform(0, 80) for _ in Products.NAMES], dtype=np.float32)
+    b = a.copy()
+    for column in traded:
+        a[column] = rng.choice([rng.uniform(-5, 120), rng.randint(0, 40) + 0.5])
+        b[column] = a[column] + rng.choice([-1, 1]) * rng.uniform(0, 16)
+    return (SimpleNamespace(name="A", limit=rng.choice([1.0, 2.0]), supplies=a),
+            SimpleNamespace(name="B", limit=1.0, supplies=b))
+
+
+def totals(engine, start, end, column, quantity, conversion_rate):
+    """Per-unit buy cost and sell revenue of `quantity` units, from the game formula."""
+    base_price = engine._raw_price[column] * conversion_rate
+    buy = sum(math.ceil(calc_sell_price(base_price, float(start.supplies[column]) - i) * 1.023)
+              for i in range(quantity))
+    sell = sum(calc_sell_price(base_price, float(end.supplies[column]) + i) for i in range(quantity))
+    return buy, sell
+
+
+def exhaustive(engine, start, end, player):
+    """Best profit over every mix of unit counts, or None if there are too many."""
+    amnt = np.maximum(0, np.floor(start.supplies - start.limit + 1))
+    spread = np.floor(np.abs(start.supplies - end.supplies) / 2)
+    caps = np.minimum(np.minimum(amnt, engine.cargo(player)), spread).astype(int)
+    traded = [column for column in range(len(caps)) if caps[column] > 0]
+    if np.prod([caps[column] + 1 for column in traded]) > 200000:
+        return None
+    tables = {column: [totals(engine, start, end, column, q, player.conversion_rate)
+                       for q in range(caps[column] + 1)] for column in traded}
+    best = 0
+    for quantities in itertools.product(*[range(caps[column] + 1) for column in traded]):
+        mass = sum(engine.weights[column] * q for column, q in zip(traded, quantities))
+        volume = sum(engine.volumes[column] * q for column, q in zip(traded, quantities))
+        cost = sum(tables[column][q][0] for column, q in zip(traded, quantities))
+        if mass <= player.mass_limit + 1e-9 and volume <= player.volume_limit + 1e-9 and cost <= player.principal:
+            best = max(best, sum(tables[column][q][1] - tables[column][q][0] for column, q in zip(traded, quantities)))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(150))
+def test_against_exhaustive_search(engine, seed):
+    rng = random.Random(seed)
+    start, end = random_pair(rng)
+    player = Player()
+    player.update(rng.choice([0, 300, 2000, 8000, 1e6]), rng.choice([34.22, 330]), rng.choice([5, 50, 400, 4000]),
+                  rng.choice([1, 5, 40, 120]), -1e9)
+    best = exhaustive(engine, start, end, player)
+    if best is None:
+        pytest.skip("too many cargo mixes to enumerate")
+
+    plans = CargoOptimizer(engine, pair_chunk=3).optimize([start], [end], player)
+    profit = plans[0]["$Profit"] if plans else 0
+    assert profit <= best
+    singles = [route["$Profit"] for route in engine.generate([start], [end], player)]
+    assert profit >= max(singles, default=0)
+    if not plans:
+        return
+
+    plan = plans[0]
+    assert plan["$Bound"] >= best
+    mass = volume = 0
+    for item in plan["Cargo"]:
+        column = Products.COLUMNS[item["Product"]]
+        quantity = int(item["Qnty"].split("/")[0])
+        mass += engine.weights[column] * quantity
+        volume += engine.volumes[column] * quantity
+        assert (item["$_Buy"], item["$_Sell"]) == totals(engine, start, end, column, quantity,
+                                                         player.conversion_rate)
+    assert mass <= player.mass_limit + 1e-6 and volume <= player.volume_limit + 1e-6
+    assert plan["$_Buy"] <= player.principal
+
@@ -0,0 +1,92 @@
+import pytest
+
+import core
+from core import IslandGroups, select_markets
+
+MARKET_NAMES = [name for islands in IslandGroups.GROUPS.values() for name in islands]
+AL_ANKH = "Al'Ankh (Group 1)"
+
+
+class Stub:
+    """Just the name select_markets groups a market by."""
+    def __init__(self, name):
+        self.name = name
+        self.group = None
+
+
+@pytest.fixture
+def markets(monkeypatch):
+    monkeypatch.setattr(core, "selections", {})
+    monkeypatch.setattr(core, "selections_groups", None)
+    return [Stub(name) for name in MARKET_NAMES]
+
+
+def expected(markets, groups):
+    islands = {island for group in groups for island in IslandGroups.GROUPS[group]}
+    return [m for m in markets if m.name in islands]
+
+
+def test_index_matches_config():
+    for group, islands in IslandGroups.GROUPS.items():
+        assert all(IslandGroups.get_group(island) == group for island in islands)
+    assert IslandGroups.get_group("Atlantis") is None
+
+
+def test_index_rebuilt_when_groups_replaced(monkeypatch):
+    monkeypatch.setattr(IslandGroups, "GROUPS", {"East": ["Oasis"], "West": ["Oasis", "Chronos"]})
+    # The first group listing a market wins
+    assert (IslandGroups.get_group("Oasis"), IslandGroups.get_group("Chronos")) == ("East", "West")
+    assert IslandGroups.get_group(MARKET_NAMES[-1]) is None
+    monkeypatch.undo()
+    assert IslandGroups.get_group("Oasis") == AL_ANKH
+
+
+def test_resolve():
+    groups = list(IslandGroups.GROUPS)
+    assert IslandGroups.resolve(["all"]) == IslandGroups.resolve([]) == groups
+    assert IslandGroups.resolve(["al'ankh"]) == [AL_ANKH]
+    assert IslandGroups.resolve([groups[1], "Al'Ankh"]) == [groups[1], AL_ANKH]
+    with pytest.raises(ValueError, match="Atlantis"):
+        IslandGroups.resolve(["Atlantis"])
+
+
+def test_selection_is_memoized(markets):
+    groups = list(IslandGroups.GROUPS)
+    starts, ends = select_markets(markets, [AL_ANKH], groups)
+    assert starts == expected(markets, [AL_ANKH]) and ends == markets
+    again = select_markets(markets, [AL_ANKH], groups)
+    assert again[0] is starts and again[1] is ends
+    assert len(core.selections) == 1
+    # Another selection, or another list of markets, is another entry
+    select_markets(markets, groups, [AL_ANKH])
+    select_markets(markets[:10], [AL_ANKH], groups)
+    assert len(core.selections) == 3
+
+
+def test_memo_cleared_wholesale_at_64_entries(markets):
+    groups = list(IslandGroups.GROUPS)
+    selections = [([groups[i % len(groups)]], [groups[j % len(groups)]], markets[:k])
+                  for i in range(4) for j in range(4) for k in range(5, 10)][:65]
+    for count, (start, end, subset) in enumerate(selections[:64], 1):
+        select_markets(subset, start, end)
+        assert len(core.selections) == count
+    first = core.selections[(tuple(selections[0][2]), tuple(selections[0][0]), tuple(selections[0][1]))]
+
+    start, end, subset = selections[64]
+    select_markets(subset, start, end)
+    assert list(core.selections) == [(tuple(subset), tuple(start), tuple(end))]
+    start, end, subset = selections[0]
+    assert select_markets(subset, start, end) is not first
+    assert select_markets(subset, start, end) == first
+
+
+def test_replaced_groups_invalidate_the_memo(markets, monkeypatch):
+    before = select_markets(markets, ["North"], list(IslandGroups.GROUPS))
+    assert before == ([], markets)
+
+    monkeypatch.setattr(IslandGroups, "GROUPS", {"North": ["Oasis", "Chronos"], "South": MARKET_NAMES})
+    starts, ends = select_markets(markets, ["North"], ["South"])
+    assert [m.name for m in starts] == ["Oasis", "Chronos"]
+    assert {m.name for m in ends} == set(MARKET_NAMES) - {"Oasis", "Chronos"}
+    # The same selection as before the change is evaluated again
+    assert select_markets(markets, ["North"], list(IslandGroups.GROUPS)) == (starts, markets)
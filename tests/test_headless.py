@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+import core
+import headless
+from fakeproc import FakeProcess, add_market, build_process
+from market_cache import MarketCache
+
+
+@pytest.fixture(scope="module")
+def fake():
+    return build_process(image_mb=1, seed=7)[0]
+
+
+@pytest.fixture
+def game(fake, tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "market_cache", MarketCache(str(tmp_path / "market_cache.json")))
+    monkeypatch.setattr(core, "known_markets", {})
+    monkeypatch.setattr(headless, "open_process", lambda process, backend: fake)
+    return fake
+
+
+class Closable:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    stop = close
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_parse_args_defaults():
+    args = headless.parse_args([])
+    assert args.start == ["Al'Ankh"] and args.end == ["all"]
+    assert (args.sort, args.top, args.hops, args.interval) == ("$Profit", 0, 1, 5.0)
+    assert not (args.once or args.mixed or args.per_start or args.adaptive or args.no_history)
+    assert args.publish is None and args.subscribe is None and args.alert == []
+    assert args.principal == core.PLAYER_SETTINGS["principal"]
+
+
+def test_parse_args_options():
+    args = headless.parse_args(["--once", "--start", "Al'Ankh", "Emerald Archipelago", "--end", "all",
+                                "--sort", "$/Pound", "--top", "5", "--per-start", "--hops", "3",
+                                "--principal", "2500", "--alert", "Gold supply at Oasis < 2",
+                                "--alert", "Rum supply at Oasis < 1", "--publish"])
+    assert args.once and args.per_start
+    assert args.start == ["Al'Ankh", "Emerald Archipelago"]
+    assert (args.sort, args.top, args.hops, args.principal) == ("$/Pound", 5, 3, 2500.0)
+    assert args.alert == ["Gold supply at Oasis < 2", "Rum supply at Oasis < 1"]
+    assert args.publish == headless.SHARED_NAME
+    assert headless.player_from_args(args).principal == 2500.0
+
+
+@pytest.mark.parametrize("argv", [["--sort", "Profit"], ["--top", "many"], ["--backend", "nope"]])
+def test_parse_args_rejects(argv):
+    with pytest.raises(SystemExit):
+        headless.parse_args(argv)
+
+
+def test_unknown_group_exits():
+    with pytest.raises(SystemExit, match="Atlantis"):
+        headless.main(["--once", "--start", "Atlantis"])
+
+
+def test_one_tick(game, tmp_path):
+    output = tmp_path / "routes.ndjson"
+    assert headless.main(["--once", "--no-history", "--start", "all", "-o", str(output)]) == 0
+
+    lines = read_lines(output)
+    assert lines
+    assert [line["rank"] for line in lines] == list(range(1, len(lines) + 1))
+    assert {line["tick"] for line in lines} == {0}
+    profits = [line["$Profit"] for line in lines]
+    assert profits == sorted(profits, reverse=True)
+    assert {"Start Market", "End Market", "Product", "Qnty"} <= set(lines[0])
+
+
+@pytest.mark.parametrize("mode", [["--mixed"], ["--hops", "2"]])
+def test_one_tick_other_modes_skip_the_route_table(mode, game, tmp_path, monkeypatch):
+    def compute_routes(*args, **kwargs):
+        raise AssertionError("route table built but not emitted")
+    monkeypatch.setattr(headless, "compute_routes", compute_routes)
+    output = tmp_path / "plans.ndjson"
+    assert headless.main(["--once", "--no-history", "--top", "5", "-o", str(output), *mode]) == 0
+
+    lines = read_lines(output)
+    assert 0 < len(lines) <= 5
+    assert [line["rank"] for line in lines] == list(range(1, len(lines) + 1))
+
+
+def test_missing_markets_still_cleans_up(tmp_path, monkeypatch):
+    partial = FakeProcess(size=0x4000)
+    add_market(partial, "Oasis", 0, 1.0, [10.0] * len(core.Products.NAMES))
+    monkeypatch.setattr(core, "market_cache", MarketCache(str(tmp_path / "market_cache.json")))
+    monkeypatch.setattr(headless, "open_process", lambda process, backend: partial)
+    publisher, metrics_server = Closable(), Closable()
+    monkeypatch.setattr(headless, "create_publisher", lambda name: publisher)
+    monkeypatch.setattr(headless, "start_metrics_server", lambda port: metrics_server)
+
+    assert headless.main(["--once", "--no-history", "-o", str(tmp_path / "routes.ndjson")]) == 1
+    assert publisher.closed and metrics_server.closed
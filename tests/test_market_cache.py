@@ -0,0 +1,76 @@
+import pytest
+
+import core
+import scanner
+from fakeproc import add_market, build_process
+from market_cache import MarketCache
+from snapshot import SIGNATURE_OFFSET
+
+
+@pytest.fixture
+def game():
+    return build_process(image_mb=2, seed=5)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = MarketCache(str(tmp_path / "market_cache.json"))
+    monkeypatch.setattr(core, "market_cache", cache)
+    monkeypatch.setattr(core, "known_markets", {})
+    return cache
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    calls = []
+    scan = scanner.scan
+
+    def counting_scan(pm, *args, **kwargs):
+        calls.append(pm)
+        return scan(pm, *args, **kwargs)
+
+    monkeypatch.setattr(scanner, "scan", counting_scan)
+    return calls
+
+
+def test_missing_or_corrupt_file(tmp_path, game):
+    fake, _ = game
+    assert MarketCache(str(tmp_path / "absent.json")).load(fake) == ([], 0)
+    (tmp_path / "broken.json").write_text("{")
+    assert MarketCache(str(tmp_path / "broken.json")).load(fake) == ([], 0)
+
+
+def test_second_scan_reuses_cached_addresses(game, cache, scans):
+    fake, bases = game
+    markets = core.scan_markets(fake)
+    assert sorted(m.base for m in markets) == sorted(bases)
+    assert len(scans) == 1
+    assert cache.load(fake) == (sorted(bases), 0)
+
+    core.known_markets.clear()  # As after a restart of the watcher
+    markets = core.scan_markets(fake)
+    assert len(scans) == 1
+    assert sorted(m.base for m in markets) == sorted(bases)
+
+
+def test_other_process_is_ignored(game, cache, scans):
+    fake, bases = game
+    core.scan_markets(fake)
+    fake.process_id += 1
+    assert cache.load(fake) == ([], 0)
+
+
+def test_moved_market_is_rescanned(game, cache, scans):
+    fake, bases = game
+    names = {m.base: m.name for m in core.scan_markets(fake)}
+    # The market object at bases[3] was collected and rebuilt elsewhere
+    fake.write_bytes(bases[3] + SIGNATURE_OFFSET + 2, b"\xff" * 4)
+    moved = add_market(fake, names[bases[3]], 3, 1.0, [1.0] * len(core.Products.NAMES))
+
+    valid, stale = cache.load(fake)
+    assert stale == 1 and bases[3] not in valid
+
+    markets = core.scan_markets(fake)
+    assert len(scans) == 2
+    assert moved in [m.base for m in markets] and bases[3] not in [m.base for m in markets]
+    assert cache.load(fake) == (sorted(m.base for m in markets), 0)
@@ -0,0 +1,40 @@
+from fakeproc import FakeProcess
+from memhack import get_address
+
+
+class ModuleProcess(FakeProcess):
+    def __init__(self):
+        super().__init__()
+        self.module = self.alloc(0x100)
+        self.lookups = 0
+
+    def module_base(self, module_name):
+        self.lookups += 1
+        return self.module
+
+
+def build_chain(fake):
+    first, second = fake.alloc(0x40), fake.alloc(0x40)
+    fake.write_longlong(fake.module + 0x10, first)
+    fake.write_longlong(first + 0x8, second)
+    return ("GameAssembly.dll", 0x10, [0x8, 0x20]), second + 0x20
+
+
+def test_walk_follows_moved_pointers():
+    fake = ModuleProcess()
+    chain, expected = build_chain(fake)
+    assert get_address(fake, chain) == expected
+
+    # The object behind the second pointer is reallocated by the game
+    moved = fake.alloc(0x40)
+    first = fake.read_longlong(fake.module + 0x10)
+    fake.write_longlong(first + 0x8, moved)
+    assert get_address(fake, chain) == moved + 0x20
+    assert fake.lookups == 2
+
+
+def test_read_error_returns_none():
+    fake = ModuleProcess()
+    chain, _ = build_chain(fake)
+    fake.write_longlong(fake.module + 0x10, 0x10)  # Dangling pointer
+    assert get_address(fake, chain) is None
@@ -0,0 +1,112 @@
+import re
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import PREFIX, Metrics, MetricsServer, format_stats
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+
+
+def parse(text):
+    """Prometheus text format -> ({(name, labels): value}, {family: type})."""
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, family, kind = line.split(" ")
+            types[family] = kind
+        elif line and not line.startswith("#"):
+            name, labels, value = SAMPLE.match(line).groups()
+            # A sample belongs to a family declared above it (summaries add _sum and _count)
+            assert any(name in (family, f"{family}_sum", f"{family}_count") for family in types), line
+            pairs = LABEL.findall(labels or "")
+            assert ",".join(f'{k}="{v}"' for k, v in pairs) == (labels or "")
+            samples[name, tuple(pairs)] = float(value)
+    return samples, types
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics(enabled=True, window=4)
+    for seconds in (0.004, 0.001, 0.003, 0.002, 0.010):
+        metrics.observe("read", seconds)
+    metrics.count("reads", 29)
+    metrics.count("reads")
+    metrics.gauge("reads_per_second", 5.8)
+    metrics.gauge("staleness_seconds", 3, market="Oasis")
+    metrics.gauge("staleness_seconds", 7.5, market='Chronos "East"')
+    return metrics
+
+
+@pytest.fixture
+def server(metrics):
+    server = MetricsServer(metrics, 0)
+    assert server.start()
+    yield server
+    server.stop()
+
+
+def scrape(server, path="/metrics"):
+    host, port = server.address
+    with urllib.request.urlopen(f"http://{host}:{port}{path}", timeout=5) as response:
+        return response.headers["Content-Type"], response.read().decode("utf-8")
+
+
+def test_scrape_parses(server):
+    content_type, text = scrape(server)
+    assert content_type.startswith("text/plain; version=0.0.4")
+    samples, types = parse(text)
+
+    assert types == {f"{PREFIX}_stage_seconds": "summary", f"{PREFIX}_reads_total": "counter",
+                     f"{PREFIX}_reads_per_second": "gauge", f"{PREFIX}_staleness_seconds": "gauge"}
+    stage = f"{PREFIX}_stage_seconds"
+    # The window keeps the last 4 of 5 samples: 1, 3, 2, 10 ms
+    assert samples[stage, (("stage", "read"), ("quantile", "0.5"))] == 0.003
+    assert samples[stage, (("stage", "read"), ("quantile", "0.95"))] == 0.010
+    assert samples[f"{stage}_sum", (("stage", "read"),)] == 0.02
+    assert samples[f"{stage}_count", (("stage", "read"),)] == 5
+    assert samples[f"{PREFIX}_reads_total", ()] == 30
+    assert samples[f"{PREFIX}_reads_per_second", ()] == 5.8
+    assert samples[f"{PREFIX}_staleness_seconds", (("market", "Oasis"),)] == 3
+    assert samples[f"{PREFIX}_staleness_seconds", (("market", 'Chronos \\"East\\"'),)] == 7.5
+
+
+def test_scrape_sees_updates(server, metrics):
+    metrics.count("reads", 10)
+    samples, _ = parse(scrape(server)[1])
+    assert samples[f"{PREFIX}_reads_total", ()] == 40
+    metrics.reset()
+    samples, _ = parse(scrape(server, "/")[1])
+    assert samples == {}
+
+
+def test_unknown_path(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        scrape(server, "/other")
+    assert error.value.code == 404
+
+
+def test_port_in_use(server, metrics):
+    assert not MetricsServer(metrics, server.address[1]).start()
+
+
+def test_disabled_records_nothing():
+    metrics = Metrics()
+    with metrics.stage("read"):
+        pass
+    metrics.count("reads")
+    metrics.gauge("reads_per_second", 1)
+    assert metrics.snapshot() == {"stages": {}, "counters": {}, "gauges": {}}
+
+
+def test_snapshot_and_stats_panel(metrics):
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["read"] == {"count": 5, "last_ms": 10.0, "p50_ms": 3.0, "p95_ms": 10.0, "total_s": 0.02}
+    assert snapshot["counters"] == {"reads": 30}
+    assert snapshot["gauges"] == {"reads_per_second": 5.8, 'staleness_seconds{market="Oasis"}': 3,
+                                  'staleness_seconds{market="Chronos \\"East\\""}': 7.5}
+    text = format_stats(snapshot)
+    assert "read" in text and "reads=30" in text and "reads_per_second=5.8" in text
+    assert "staleness" not in text
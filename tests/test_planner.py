@@ -0,0 +1,81 @@
+import copy
+import random
+
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+from core import IslandGroups, Player, Products
+from planner import ChainPlanner
+from routes import RouteEngine
+
+MARKET_NAMES = [name for islands in IslandGroups.GROUPS.values() for name in islands]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RouteEngine(Products.DATA)
+
+
+def random_market(rng, name):
+    supplies = [rng.choice([rng.uniform(-10, 150), float(rng.randint(0, 60)), rng.randint(0, 40) + 0.5])
+                for _ in Products.NAMES]
+    return SimpleNamespace(name=name, limit=rng.choice([1.0, 2.0, -2.0]),
+                           supplies=np.array(supplies, dtype=np.float32))
+
+
+def random_player(rng):
+    player = Player()
+    player.update(rng.choice([0, 500, 3000, 20000, 1e6]), rng.choice([34.22, 330]), rng.choice([500, 4000]),
+                  rng.choice([20, 120]), rng.choice([0, 200, -1]))
+    return player
+
+
+def exhaustive(engine, starts, ends, player, hops):
+    """Values of every chain of up to `hops` best single legs, best first."""
+    values = []
+
+    def extend(chain, principal, value, legs):
+        if legs:
+            values.append(value)
+        if legs == hops:
+            return
+        leg_player = copy.copy(player)
+        leg_player.principal = principal
+        for market in ends:
+            if any(market is visited for visited in chain):
+                continue
+            routes = engine.generate([chain[-1]], [market], leg_player)
+            if routes:
+                profit = max(route["$Profit"] for route in routes)
+                extend(chain + [market], principal + profit, value + profit, legs + 1)
+
+    for start in starts:
+        extend([start], player.principal, 0, 0)
+    return sorted(values, reverse=True)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_exhaustive_search(engine, seed):
+    rng = random.Random(seed)
+    count = rng.randint(3, 8)
+    markets = [random_market(rng, name) for name in rng.sample(MARKET_NAMES, count)]
+    player = random_player(rng)
+    starts, ends = markets[:rng.randint(1, count)], markets[rng.randint(0, 2):]
+    hops, top = rng.randint(1, 3), rng.randint(1, 15)
+
+    chains = ChainPlanner(engine, chunk_size=rng.choice([1, 3, 256])).plan(starts, ends, player, hops=hops, top=top)
+    assert [chain["$Profit"] for chain in chains] == exhaustive(engine, starts, ends, player, hops)[:top]
+
+    by_name = {market.name: market for market in markets}
+    for chain in chains:
+        assert chain["$Profit"] == sum(leg["$Profit"] for leg in chain["Legs"])
+        # Each leg is the route the engine gives with the principal carried forward
+        principal = player.principal
+        for leg in chain["Legs"]:
+            leg_player = copy.copy(player)
+            leg_player.principal = principal
+            routes = engine.generate([by_name[leg["Start Market"]]], [by_name[leg["End Market"]]], leg_player)
+            assert leg in routes
+            principal += leg["$Profit"]
+        assert chain["Principal"] == principal
@@ -0,0 +1,91 @@
+import math
+import random
+
+import pytest
+
+from core import Market, Player, Products
+from fakeproc import FakeProcess, add_market
+from pricing import PriceTable, calc_sell_price
+
+
+# The per-unit loops PriceTable replaced, kept as the reference
+
+def old_buy_mult(base_price, supply, quantity):
+    return sum(math.ceil(calc_sell_price(base_price, supply - i) * 1.023) for i in range(quantity))
+
+
+def old_sell_mult(base_price, supply, quantity):
+    return sum(math.ceil(calc_sell_price(base_price, supply + i)) for i in range(quantity))
+
+
+def old_max_principal(base_price, supply, amnt, principal):
+    i = total = 0
+    while i < amnt:
+        total += math.ceil(calc_sell_price(base_price, supply - i) * 1.023)
+        if total > principal:
+            break
+        i += 1
+    return i
+
+
+def random_case(rng):
+    base_price = rng.choice([2.6712, 455.1813, 0.1, 68.0652, 3.7]) * rng.choice([34.22, 311, 82, 330])
+    supply = rng.choice([rng.uniform(-50, 250), rng.randint(-5, 5) + 0.5, 0.5, 1.5, 0.49, 0.51])
+    limit = rng.uniform(-3, 10)
+    amnt = max(0, math.floor(supply - limit + 1))
+    return base_price, supply, amnt
+
+
+def test_coefficient_switches_at_half_supply():
+    # 0.38 above 0.5 and -1.68 at or below it
+    assert calc_sell_price(100, 0.5) == math.ceil(-1.68 * 100 / 10000 * 0.25 - 1.68 * 100 / 50 * 0.5 + 100)
+    assert calc_sell_price(100, 0.51) == math.ceil(0.38 * 100 / 10000 * 0.51 ** 2 - 0.38 * 100 / 50 * 0.51 + 100)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_totals_match_per_unit_loops(seed):
+    rng = random.Random(seed)
+    for _ in range(400):
+        base_price, supply, amnt = random_case(rng)
+        table = PriceTable(base_price, supply, amnt)
+        # Out of order, so lookups into an already grown table are covered too
+        for quantity in [rng.randint(0, 300) for _ in range(3)] + [0, 1]:
+            assert table.buy_total(quantity) == old_buy_mult(base_price, supply, quantity)
+            assert table.sell_total(quantity) == old_sell_mult(base_price, supply, quantity)
+
+
+def test_totals_cross_half_supply():
+    # Selling from 0.5 and buying down through it switches coefficient mid-run
+    for supply in (-2.5, -0.5, 0.0, 0.25, 0.5, 0.75, 1.5, 2.5):
+        table = PriceTable(1234.5, supply, 10)
+        for quantity in range(8):
+            assert table.buy_total(quantity) == old_buy_mult(1234.5, supply, quantity)
+            assert table.sell_total(quantity) == old_sell_mult(1234.5, supply, quantity)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_max_affordable_matches_principal_loop(seed):
+    rng = random.Random(seed)
+    for _ in range(400):
+        base_price, supply, amnt = random_case(rng)
+        table = PriceTable(base_price, supply, amnt)
+        principal = rng.choice([0, -1, 100, 10000, 1e6, rng.uniform(0, 50000)])
+        assert table.max_affordable(principal) == old_max_principal(base_price, supply, amnt, principal)
+        # Reused after growing
+        assert table.max_affordable(principal / 2) == old_max_principal(base_price, supply, amnt, principal / 2)
+
+
+def test_product_uses_price_table():
+    rng = random.Random(7)
+    fake = FakeProcess()
+    supplies = [rng.uniform(-5, 120) for _ in Products.NAMES]
+    market = Market(fake, add_market(fake, "Test Market", 3, 1.0, supplies))
+    market.update_products(34.22)
+    player = Player()
+    player.principal = 25000
+    for product in market.products:
+        supply, base_price = product.supply, product.base_price
+        assert product.calculate_buy_mult(17) == old_buy_mult(base_price, supply, 17)
+        assert product.calculate_sell_mult(17) == old_sell_mult(base_price, supply, 17)
+        assert product.max_quantity(player, "principal") == old_max_principal(
+            base_price, supply, product.amnt, player.principal)
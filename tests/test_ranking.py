@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from core import Products, update_markets
+from ranking import SORT_KEYS, TopK, top_routes
+from routes import RouteCache, RouteEngine
+from test_routes import build_markets, random_player
+
+
+def full_sort(routes, key, k, per_start=False):
+    """What the table showed before TopK: a stable sort of every route, cut at k."""
+    if not per_start:
+        return sorted(routes, key=lambda route: -route[key])[:k]
+    ranked = sorted(routes, key=lambda route: (route["Start Market"], -route[key]))
+    counts, kept = {}, []
+    for route in ranked:
+        counts[route["Start Market"]] = counts.get(route["Start Market"], 0) + 1
+        if counts[route["Start Market"]] <= k:
+            kept.append(route)
+    return kept
+
+
+def tied_routes(rng, count):
+    # Few distinct values, so most routes tie with others on every key
+    return [{"Start Market": f"S{rng.randrange(4)}", "End Market": f"E{i}", "Product": f"P{i}",
+             "$Profit": rng.choice([100, 200, 300]), "$/Pound": rng.choice([0.5, 1.0]),
+             "$/Item": rng.choice([10.0, 20.0, 30.0])} for i in range(count)]
+
+
+@pytest.mark.parametrize("key", SORT_KEYS)
+@pytest.mark.parametrize("k", [1, 3, 10, 500])
+@pytest.mark.parametrize("per_start", [False, True])
+def test_matches_stable_sort_with_ties(key, k, per_start):
+    rng = random.Random(k)
+    routes = tied_routes(rng, 120)
+    assert top_routes(routes, key, k, per_start) == full_sort(routes, key, k, per_start)
+
+
+def test_all_keys_at_once_and_threshold():
+    rng = random.Random(1)
+    routes = tied_routes(rng, 60)
+    ranking = TopK(5)
+    ranking.extend(routes)
+    for key in SORT_KEYS:
+        assert ranking.ranked(key) == full_sort(routes, key, 5)
+        assert ranking.threshold(key) == min(route[key] for route in ranking.ranked(key))
+    assert TopK(5).threshold("$Profit") == float("-inf")
+    assert top_routes([], "$Profit", 5) == []
+
+
+@pytest.mark.parametrize("per_start", [False, True])
+@pytest.mark.parametrize("k", [1, 7, 10000])
+def test_route_cache_rank_matches_full_sort(per_start, k):
+    rng = random.Random(k)
+    engine = RouteEngine(Products.DATA)
+    _, markets = build_markets(rng)
+    player = random_player(rng)
+    update_markets(markets, player.conversion_rate)
+    routes = engine.generate(markets, markets, player)
+    for key in SORT_KEYS:
+        ranking = TopK(k, [key], per_start)
+        RouteCache(engine).rank(markets, markets, player, ranking)
+        assert ranking.ranked(key) == full_sort(routes, key, k, per_start)
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+import pytest
+
+from recorder import SupplyRecorder
+
+MARKETS = ["Oasis", "Fort Aestrin"]
+PRODUCTS = ["Gold", "Salmon", "Dates"]
+
+
+def record(recorder, ticks):
+    recorder.start(MARKETS, PRODUCTS, [1.0, 2.0])
+    for tick in range(ticks):
+        recorder.append(np.full((len(MARKETS), len(PRODUCTS)), tick, dtype=np.float32), timestamp=1000.0 + tick)
+    recorder.close()
+
+
+def test_history_round_trip(tmp_path):
+    recorder = SupplyRecorder(str(tmp_path), batch_size=4)
+    record(recorder, 10)
+    times, supplies = recorder.history("Fort Aestrin", "Dates", since=1003, until=1006)
+    assert list(times) == [1003, 1004, 1005, 1006]
+    assert list(supplies) == [3, 4, 5, 6]
+
+
+@pytest.mark.parametrize("max_files, kept", [(2, 2), (0, 5)])
+def test_rotation(tmp_path, max_files, kept):
+    # Each batch of 4 ticks fills a file
+    recorder = SupplyRecorder(str(tmp_path), batch_size=4, max_file_bytes=200, max_files=max_files)
+    record(recorder, 20)
+    files = recorder.files()
+    assert len(files) == kept
+    assert files[-1].endswith("supply-000005.bin")
+    times, _ = recorder.history("Oasis", "Gold")
+    assert list(times) == [1000.0 + tick for tick in range(20 - 4 * kept, 20)]
+
+
+
+def test_latest(tmp_path):
+    recorder = SupplyRecorder(str(tmp_path), ring_size=4, batch_size=100)
+    assert len(recorder.latest()) == 0
+    assert len(recorder.latest(3)) == 0
+
+    recorder.start(MARKETS, PRODUCTS)
+    assert len(recorder.latest()) == 0
+    for tick in range(6):
+        recorder.append(np.full((len(MARKETS), len(PRODUCTS)), tick, dtype=np.float32), timestamp=1000.0 + tick)
+    assert list(recorder.latest()["time"]) == [1002, 1003, 1004, 1005]
+    assert list(recorder.latest(2)["supply"][:, 1, 2]) == [4, 5]
+
+
+def test_history_includes_unflushed_ticks(tmp_path):
+    recorder = SupplyRecorder(str(tmp_path), batch_size=100)
+    recorder.start(MARKETS, PRODUCTS)
+    recorder.append(np.ones((len(MARKETS), len(PRODUCTS))), timestamp=time.time() + 3600)
+    times, supplies = recorder.history("Oasis", "Gold")
+    assert len(times) == 1 and list(supplies) == [1]
@@ -0,0 +1,88 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+import replay
+from core import IslandGroups, Market, Player, Products, export_markets, update_markets
+from fakeproc import FakeProcess, add_market
+from recorder import SupplyRecorder
+from routes import RouteEngine
+from snapshot import supply_block_address
+
+MARKET_NAMES = [name for islands in IslandGroups.GROUPS.values() for name in islands]
+TICKS = 12
+
+
+@pytest.fixture(scope="module")
+def session_files(tmp_path_factory):
+    """A short session recorded both ways, with the best live route of every tick."""
+    directory = tmp_path_factory.mktemp("replay")
+    rng = random.Random(11)
+    fake = FakeProcess(size=0x20000)
+    bases = [add_market(fake, name, i, rng.choice([0.5, 1.0, 2.0]), [rng.uniform(0, 80) for _ in Products.NAMES])
+             for i, name in enumerate(MARKET_NAMES)]
+    markets = [Market(fake, base) for base in bases]
+    player, engine = Player(), RouteEngine(Products.DATA)
+    recorder = SupplyRecorder(str(directory / "history"), batch_size=5)
+    recorder.start([m.name for m in markets], Products.NAMES, [m.limit for m in markets])
+    dump = directory / "session.ndjson"
+    best = []
+    with open(dump, "w", encoding="utf-8") as file:
+        for tick in range(TICKS):
+            # A few supplies move every tick; some ticks repeat the last one
+            for _ in range(rng.choice([0, 0, 3])):
+                address = supply_block_address(fake, rng.choice(bases)) + 4 * rng.randrange(len(Products.NAMES))
+                fake.write_float(address, rng.uniform(0, 80))
+            update_markets(markets, player.conversion_rate)
+            recorder.append([m.supplies for m in markets], timestamp=1000.0 + tick)
+            file.write(json.dumps(export_markets(markets, 1000.0 + tick)) + "\n")
+            routes = engine.generate(markets, markets, player)
+            best.append(max(route["$Profit"] for route in routes) if routes else None)
+    recorder.close()
+    return recorder.files(), [str(dump)], markets, best
+
+
+def test_history_and_dump_load_the_same_session(session_files):
+    history, dump, markets, _ = session_files
+    recorded, dumped = replay.load_session(history), replay.load_session(dump)
+
+    assert recorded.market_names == dumped.market_names == [m.name for m in markets]
+    assert list(recorded.times) == list(dumped.times) == [1000.0 + tick for tick in range(TICKS)]
+    assert np.array_equal(recorded.limits, [m.limit for m in markets])
+    assert np.array_equal(recorded.limits, dumped.limits)
+    assert np.array_equal(recorded.supplies, dumped.supplies)
+    assert np.array_equal(recorded.supplies[-1], [m.supplies for m in markets])
+
+
+def test_limit_override(session_files):
+    history, _, _, _ = session_files
+    assert set(replay.load_session(history, limit=3.0).limits) == {3.0}
+
+
+def test_backtest_matches_live_routes(session_files):
+    history, _, _, best = session_files
+    report = replay.backtest(replay.load_session(history), Player(), batch_size=4)
+
+    profits = [profit for profit in best if profit is not None]
+    assert report["ticks"] == TICKS
+    assert report["evaluated"] < TICKS  # Repeated ticks are not evaluated again
+    assert report["ticks_with_routes"] == len(profits)
+    assert report["best_profit"]["max"] == pytest.approx(max(profits), abs=1)
+    assert report["best_profit"]["mean"] == pytest.approx(sum(profits) / len(profits), abs=1)
+    assert sum(route["ticks"] for route in report["best_routes"]) <= TICKS
+
+
+def test_main_prints_report(session_files, capsys):
+    history, _, _, _ = session_files
+    assert replay.main([*history, "--start", "Al'Ankh", "--top", "3"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["ticks"] == TICKS
+    assert len(report["best_routes"]) <= 3
+    assert all(route["Start Market"] in IslandGroups.GROUPS["Al'Ankh (Group 1)"] for route in report["best_routes"])
+
+
+def test_main_reports_missing_files(tmp_path, capsys):
+    assert replay.main([str(tmp_path / "absent.ndjson")]) == 1
+    assert "Error loading replay data" in capsys.readouterr().err
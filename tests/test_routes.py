@@ -0,0 +1,154 @@
+import math
+import random
+
+import pytest
+
+import core
+from core import Market, Player, Products, update_markets
+from fakeproc import FakeProcess, add_market
+from pricing import calc_sell_price
+from routes import RouteCache, RouteEngine
+from snapshot import LIMIT_OFFSET, NAME_OBJECT_OFFSET, supply_block_address
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RouteEngine(Products.DATA)
+
+
+def random_supplies(rng):
+    return [rng.choice([rng.uniform(-10, 150), float(rng.randint(0, 60)), rng.randint(0, 40) + 0.5])
+            for _ in Products.NAMES]
+
+
+def build_markets(rng, count=12):
+    fake = FakeProcess()
+    bases = [add_market(fake, f"Market {i}", i, rng.choice([1.0, 2.0, -2.0]), random_supplies(rng))
+             for i in range(count)]
+    return fake, [Market(fake, base) for base in bases]
+
+
+def random_player(rng):
+    player = Player()
+    player.update(rng.choice([500, 3000, 20000, 1e6]), rng.choice([34.22, 330]), rng.choice([500, 4000]),
+                  rng.choice([20, 120]), rng.choice([0, 200, -1]))
+    return player
+
+
+def assert_cache_matches(cache, engine, starts, ends, player):
+    assert cache.generate(starts, ends, player) == engine.generate(starts, ends, player)
+
+
+def test_cache_follows_supply_limit_and_base_changes(engine):
+    rng = random.Random(7)
+    fake, markets = build_markets(rng)
+    starts, ends = markets[:6], markets[3:]
+    player = random_player(rng)
+    cache = RouteCache(engine)
+    assert_cache_matches(cache, engine, starts, ends, player)
+
+    # Unchanged: everything reused
+    assert_cache_matches(cache, engine, starts, ends, player)
+    assert cache.stats["recomputed"] == 0
+
+    # Supplies
+    address = supply_block_address(fake, markets[1].base)
+    for column in rng.sample(range(len(Products.NAMES)), 10):
+        fake.write_float(address + 4 * column, rng.uniform(0, 150))
+    update_markets(markets, 34.22)
+    assert_cache_matches(cache, engine, starts, ends, player)
+    assert cache.stats["recomputed"] == len(ends)
+
+    # Limit, picked up by a re-read like core.reuse_market does
+    fake.write_float(markets[4].base + LIMIT_OFFSET, 25.0)
+    markets[4].refresh()
+    assert_cache_matches(cache, engine, starts, ends, player)
+    assert cache.stats["recomputed"] > 0
+
+    # Another island's market at a recycled base address
+    other = add_market(fake, "Recycled", 40, 1.0, random_supplies(rng))
+    fake.write_longlong(markets[8].base + NAME_OBJECT_OFFSET, fake.read_longlong(other + NAME_OBJECT_OFFSET))
+    assert core.read_market_name(fake, markets[8].base) == "Recycled"
+    markets[8] = Market(fake, markets[8].base)
+    ends = markets[3:]
+    assert_cache_matches(cache, engine, starts, ends, player)
+    assert cache.stats["recomputed"] == len(starts)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cache_over_random_ticks(engine, seed):
+    rng = random.Random(seed)
+    fake, markets = build_markets(rng)
+    player = random_player(rng)
+    cache = RouteCache(engine)
+    for tick in range(15):
+        for market in rng.sample(markets, rng.randint(0, 3)):
+            address = supply_block_address(fake, market.base)
+            fake.write_float(address + 4 * rng.randrange(len(Products.NAMES)), rng.uniform(0, 150))
+        if rng.random() < 0.3:
+            market = rng.choice(markets)
+            fake.write_float(market.base + LIMIT_OFFSET, rng.choice([1.0, 2.0, 10.0]))
+            market.refresh()
+        update_markets(markets, player.conversion_rate)
+        starts = markets[:rng.randint(1, len(markets))]
+        assert_cache_matches(cache, engine, starts, markets, player)
+
+
+def old_trade_metrics(start_market, end_market, column, player):
+    """calculate_trade_metrics as it was before the engine, per-unit price loops included."""
+    start, end = start_market.products[column], end_market.products[column]
+    base_price = start.base_price
+    principal_qty = total = 0
+    while principal_qty < start.amnt:
+        total += math.ceil(calc_sell_price(base_price, start.supply - principal_qty) * 1.023)
+        if total > player.principal:
+            break
+        principal_qty += 1
+    max_qty = min(principal_qty, math.floor(player.mass_limit / start.weight),
+                  math.floor(player.volume_limit / start.volume), math.floor(abs(start.supply - end.supply) / 2))
+    if max_qty == 0:
+        return None
+    total_buy = sum(math.ceil(calc_sell_price(base_price, start.supply - i) * 1.023) for i in range(max_qty))
+    total_sell = sum(math.ceil(calc_sell_price(end.base_price, end.supply + i)) for i in range(max_qty))
+    profit = total_sell - total_buy
+    return {
+        "Start Market": start_market.name,
+        "End Market": end_market.name,
+        "Product": start.name,
+        "Qnty": f"{max_qty}/{start.amnt}",
+        "$_Buy": total_buy,
+        "$_Sell": total_sell,
+        "$Profit": profit,
+        "$/Pound": round(profit / (start.weight * max_qty), 1) if start.weight else 0,
+        "$/Item": round(profit / max_qty, 1)
+    }
+
+
+def old_generate(start_markets, end_markets, player):
+    routes = []
+    for start in start_markets:
+        for end in end_markets:
+            if start is not end:
+                for column in range(len(Products.NAMES)):
+                    route = old_trade_metrics(start, end, column, player)
+                    if route and route["$Profit"] > player.min_profit:
+                        routes.append(route)
+    return routes
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_engine_matches_scalar_loop(engine, seed):
+    rng = random.Random(100 + seed)
+    _, markets = build_markets(rng, count=rng.randint(2, 8))
+    player = random_player(rng)
+    update_markets(markets, player.conversion_rate)
+    starts = rng.sample(markets, rng.randint(1, len(markets)))
+    ends = rng.sample(markets, rng.randint(1, len(markets)))
+    expected = old_generate(starts, ends, player)
+    routes = engine.generate(starts, ends, player)
+    assert [list(route.items()) for route in routes] == [list(route.items()) for route in expected]
+    # The scalar helper the GUI still uses agrees too
+    assert expected == [core.calculate_trade_metrics(s, e, s.products[Products.COLUMNS[r["Product"]]], player)
+                        for r in expected
+                        for s in starts if s.name == r["Start Market"]
+                        for e in ends if e.name == r["End Market"]]
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from sampler import Sampler
+
+
+@pytest.fixture
+def sampler():
+    sampler = Sampler()
+    sampler.start()
+    yield sampler
+    sampler.stop(timeout=5)
+
+
+def wait_for_results(sampler, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while sampler.results.qsize() < count:
+        assert time.monotonic() < deadline, "background job did not finish"
+        time.sleep(0.005)
+
+
+def test_callbacks_run_on_polling_thread(sampler):
+    threads = []
+    sampler.submit("routes", threading.get_ident, callback=threads.append)
+    wait_for_results(sampler, 1)
+    assert threads == []
+    assert sampler.poll() == 1
+    assert threads[0] != threading.get_ident()  # The job ran off this thread
+    assert sampler.poll() == 0
+
+
+def test_newer_job_replaces_pending_one(sampler):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return "blocker"
+
+    delivered = []
+    sampler.submit("scan", blocking, callback=delivered.append)
+    started.wait(5)
+    for i in range(5):
+        sampler.submit("routes", lambda i=i: i, callback=delivered.append)
+    release.set()
+    wait_for_results(sampler, 2)
+    sampler.poll()
+    assert delivered == ["blocker", 4]
+
+
+def test_running_job_result_is_dropped_when_resubmitted(sampler):
+    started, release = threading.Event(), threading.Event()
+
+    def stale():
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    delivered = []
+    sampler.submit("routes", stale, callback=delivered.append)
+    started.wait(5)
+    sampler.submit("routes", lambda: "fresh", callback=delivered.append)
+    release.set()
+    wait_for_results(sampler, 1)
+    sampler.poll()
+    assert delivered == ["fresh"]
+
+
+def test_cancel_and_failing_job(sampler):
+    delivered = []
+    generation = sampler.submit("routes", lambda: 1 / 0, callback=delivered.append)
+    sampler.submit("scan", lambda: "scan", callback=delivered.append)
+    wait_for_results(sampler, 1)
+    sampler.cancel("scan")
+    assert sampler.poll() == 0
+    assert delivered == []
+    assert sampler.is_current("routes", generation)
+
+
+def test_stop_ends_thread():
+    sampler = Sampler()
+    sampler.start()
+    sampler.stop(timeout=5)
+    assert not sampler._thread.is_alive()
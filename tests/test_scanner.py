@@ -0,0 +1,44 @@
+import random
+import re
+
+import pytest
+
+import scanner
+from fakeproc import FakeProcess, build_process
+from snapshot import MARKET_PATTERN, SIGNATURE_OFFSET
+
+
+def naive_scan(fake, pattern=MARKET_PATTERN):
+    # The whole image in one read, like pymem.pattern_scan_all
+    return [fake.base_address + m.start() for m in re.finditer(pattern, bytes(fake.image), re.DOTALL)]
+
+
+def test_finds_every_market():
+    fake, bases = build_process(image_mb=4, seed=3)
+    found, stats = scanner.scan(fake, chunk_size=256 * 1024)
+    assert found == naive_scan(fake)
+    assert set(base + SIGNATURE_OFFSET for base in bases) <= set(found)
+    assert stats["chunks"] == 16 and stats["bytes"] >= len(fake.image)
+
+
+@pytest.mark.parametrize("chunk_size", [64, 100, 4096])
+@pytest.mark.parametrize("workers", [1, 4])
+def test_matches_across_chunk_boundaries(chunk_size, workers):
+    rng = random.Random(chunk_size)
+    fake = FakeProcess(size=8192)
+    pattern = rb"AB.CD"
+    # Every offset around the chunk edges, including matches straddling them
+    edges = [chunk_size - 2, chunk_size - 5, 2 * chunk_size - 1]
+    for offset in list(range(0, 8192 - 5, 37)) + [edge for edge in edges if edge <= 8192 - 5]:
+        fake.write_bytes(fake.base_address + offset, b"AB" + bytes([rng.randrange(256)]) + b"CD")
+    found, _ = scanner.scan(fake, pattern, 5, chunk_size=chunk_size, workers=workers)
+    assert found == naive_scan(fake, pattern)
+    assert len(found) == len(set(found))
+
+
+def test_unreadable_region_is_skipped():
+    fake, _ = build_process(image_mb=1, seed=4)
+    regions = [scanner.Region(fake.base_address - 0x100000, 0x1000)] + fake.regions()
+    found, stats = scanner.scan(fake, regions=regions)
+    assert found == naive_scan(fake)
+    assert stats["regions"] == 2
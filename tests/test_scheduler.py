@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from scheduler import PollScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def market(name):
+    return SimpleNamespace(name=name, base=hash(name), fingerprint=0)
+
+
+def test_unchanged_markets_back_off():
+    clock = Clock()
+    scheduler = PollScheduler(min_interval=2, selected_max_interval=5, max_interval=60, slack=0, clock=clock)
+    markets = [market("A"), market("B")]
+    assert scheduler.due(markets, []) == []
+    intervals = []
+    for _ in range(8):
+        clock.now += scheduler.until_next_due()
+        due = scheduler.due(markets, [])
+        scheduler.observe(due)
+        intervals.append(scheduler.report()["markets"]["A"]["interval"])
+    assert intervals == [4, 8, 16, 32, 60, 60, 60, 60]
+
+
+def test_changed_and_selected_markets_are_read_sooner():
+    clock = Clock()
+    scheduler = PollScheduler(min_interval=2, selected_max_interval=5, max_interval=60, slack=0, clock=clock)
+    quiet, busy = market("Quiet"), market("Busy")
+    scheduler.due([quiet, busy], [])
+    for _ in range(5):
+        clock.now += scheduler.until_next_due()
+        busy.fingerprint += 1
+        scheduler.observe(scheduler.due([quiet, busy], []))
+    report = scheduler.report()["markets"]
+    assert report["Busy"]["interval"] == 2 and report["Quiet"]["interval"] > 5
+
+    # Ticking Quiet's group reads it right away and caps its interval
+    assert scheduler.due([quiet, busy], [quiet]) == [quiet]
+    scheduler.observe([quiet])
+    assert scheduler.report()["markets"]["Quiet"]["interval"] == 5
+
+
+def test_read_budget_defers_reads():
+    clock = Clock()
+    scheduler = PollScheduler(max_reads_per_second=1, burst_seconds=3, clock=clock)
+    markets = [market(str(i)) for i in range(10)]
+    scheduler.due(markets, [])
+    clock.now = 100
+    due = scheduler.due(markets, markets[:2])
+    assert len(due) == 3 and due[:2] == markets[:2]
+    assert scheduler.stats["deferred"] == 7
+    assert scheduler.until_next_due() > 0
+
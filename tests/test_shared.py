@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+import core
+import shared
+from fakeproc import build_process
+from shared import SnapshotPublisher, Subscriber
+
+
+@pytest.fixture
+def name(request):
+    return f"smw_test_{os.getpid()}_{request.node.name}"[:30]
+
+
+class FakeMarket:
+    def __init__(self, index):
+        self.name = f"m{index}"
+        self.base = index
+        self.supply_address = 1000 + index * 4
+        self.limit = 10.0
+        self.index = index
+        self.supplies = np.zeros(len(core.Products.NAMES), np.float32)
+
+
+def test_subscriber_sees_published_markets(name, monkeypatch):
+    monkeypatch.setattr(core, "market_cache", core.MarketCache(os.devnull))
+    fake, _ = build_process(image_mb=1, seed=3)
+    markets = core.scan_markets(fake)
+    publisher = SnapshotPublisher(name)
+    subscriber = Subscriber(name)
+    try:
+        assert subscriber.markets() == []
+        sequence = publisher.publish(markets)
+        sequence_read, _, matrix = subscriber.read()
+        assert sequence_read == sequence == 1
+        assert np.array_equal(matrix, [m.supplies for m in markets])
+
+        shared_markets = core.scan_markets(subscriber)
+        assert [m.name for m in shared_markets] == [m.name for m in markets]
+        core.update_markets(shared_markets, 34.22)
+        assert all(list(a.supplies) == list(b.supplies) for a, b in zip(markets, shared_markets))
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_live_publisher_is_not_taken_over(name):
+    publisher = SnapshotPublisher(name)
+    try:
+        with pytest.raises(FileExistsError, match=str(os.getpid())):
+            SnapshotPublisher(name)
+        assert publisher.publish([FakeMarket(0)]) == 1
+    finally:
+        publisher.close()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows frees a segment when its last handle closes")
+def test_stale_segment_is_taken_over(name):
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    crashed = SnapshotPublisher(name)
+    crashed.layout.header[shared._OWNER] = child.pid  # As if that process had published and died
+    crashed.layout.release(crashed.shm)
+    crashed.layout = None
+
+    publisher = SnapshotPublisher(name)
+    try:
+        assert int(publisher.layout.header[shared._OWNER]) == os.getpid()
+        assert publisher.publish([FakeMarket(0)]) == 1
+    finally:
+        publisher.close()
+
+
+def test_reads_are_never_torn(name):
+    publisher = SnapshotPublisher(name)
+    subscriber = Subscriber(name)
+    markets = [FakeMarket(i) for i in range(29)]
+    done = threading.Event()
+
+    def publish():
+        for tick in range(1, 3001):
+            for market in markets:
+                market.supplies[:] = tick
+            publisher.publish(markets)
+        done.set()
+
+    writer = threading.Thread(target=publish)
+    writer.start()
+    try:
+        last = 0
+        while not done.is_set():
+            tick = subscriber.read()
+            if tick is None:
+                continue
+            sequence, _, matrix = tick
+            assert matrix.min() == matrix.max() == sequence
+            assert sequence >= last
+            last = sequence
+            sequence, view, valid = subscriber.view()
+            copy = view.copy()
+            if valid():
+                assert copy.min() == copy.max() == sequence
+    finally:
+        writer.join()
+        subscriber.close()
+        publisher.close()
+
+
+def test_view_is_invalidated_by_new_markets(name):
+    publisher = SnapshotPublisher(name)
+    subscriber = Subscriber(name, retries=5)
+    try:
+        markets = [FakeMarket(i) for i in range(3)]
+        publisher.publish(markets)
+        sequence, view, valid = subscriber.view()
+        assert sequence == 1 and view.shape[0] == 3 and valid()
+
+        # A re-scan rewrites the metadata; the next tick goes to the other slot
+        rescanned = [FakeMarket(i) for i in range(3, 5)]
+        publisher.publish(rescanned)
+        assert not valid()
+        sequence, view, valid = subscriber.view()
+        assert sequence == 2 and view.shape[0] == 2 and valid()
+
+        # Metadata without a tick of its own yet: the old tick isn't handed out under it
+        publisher._write_meta(markets)
+        assert not valid()
+        with pytest.raises(TimeoutError):
+            subscriber.view()
+        with pytest.raises(TimeoutError):
+            subscriber.read()
+    finally:
+        subscriber.close()
+        publisher.close()
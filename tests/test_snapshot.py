@@ -0,0 +1,58 @@
+import random
+
+from core import Market, Products, update_markets
+from fakeproc import FakeProcess, add_market
+from memhack import read_game_memory
+from snapshot import read_supply_block, read_supply_blocks, supply_block_address
+
+
+def build(count=29, seed=1):
+    rng = random.Random(seed)
+    fake = FakeProcess()
+    bases = [add_market(fake, f"Market {i}", i, 1.0, [rng.uniform(-5, 120) for _ in Products.NAMES])
+             for i in range(count)]
+    return fake, bases
+
+
+def per_product_supplies(fake, base):
+    # What the per-product reads returned before the bulk read
+    address = supply_block_address(fake, base)
+    return [read_game_memory(fake, address + 4 * column, 'float') for column in range(len(Products.NAMES))]
+
+
+def test_bulk_read_matches_per_product_reads():
+    fake, bases = build()
+    for base in bases:
+        address = supply_block_address(fake, base)
+        assert list(read_supply_block(fake, address, len(Products.NAMES))) == per_product_supplies(fake, base)
+
+
+def test_batched_read_matches_single_reads():
+    fake, bases = build()
+    addresses = [supply_block_address(fake, base) for base in bases]
+    fake.reset_counters()
+    blocks = read_supply_blocks(fake, addresses, len(Products.NAMES))
+    assert fake.reads == 1
+    assert [list(block) for block in blocks] == [per_product_supplies(fake, base) for base in bases]
+
+
+def test_unreadable_block_is_none():
+    fake, bases = build(count=2)
+    address = supply_block_address(fake, bases[0])
+    assert read_supply_block(fake, fake.base_address - 0x1000, len(Products.NAMES)) is None
+    blocks = read_supply_blocks(fake, [address, fake.base_address - 0x1000], len(Products.NAMES))
+    assert blocks[0] is not None and blocks[1] is None
+
+
+def test_products_see_refreshed_supplies():
+    fake, bases = build()
+    markets = [Market(fake, base) for base in bases]
+    # New supplies written by the game between ticks
+    address = supply_block_address(fake, bases[3])
+    fake.write_float(address + 4 * 5, 42.5)
+    fake.reset_counters()
+    update_markets(markets, 34.22)
+    assert fake.reads <= len(markets)
+    assert markets[3].products[5].supply == 42.5
+    for market, base in zip(markets, bases):
+        assert [product.supply for product in market.products] == per_product_supplies(fake, base)
@@ -0,0 +1,71 @@
+import argparse
+import json
+import random
+
+import numpy as np
+import pytest
+
+import sweep
+from core import IslandGroups, Player, Products, PLAYER_SETTINGS, export_markets
+from routes import RouteEngine
+
+MARKET_NAMES = [name for islands in IslandGroups.GROUPS.values() for name in islands]
+
+
+class _Market:
+    def __init__(self, name, limit, supplies):
+        self.name, self.limit, self.supplies = name, limit, supplies
+
+    def export(self):
+        return {"name": self.name, "limit": self.limit,
+                "products": dict(zip(Products.NAMES, map(float, self.supplies)))}
+
+
+@pytest.fixture(scope="module")
+def markets():
+    rng = random.Random(13)
+    return [_Market(name, 1.0, np.array([rng.uniform(0, 80) for _ in Products.NAMES], dtype=np.float32))
+            for name in MARKET_NAMES]
+
+
+def test_one_point_grid_is_player_settings():
+    assert sweep.scenario_grid() == [{key: PLAYER_SETTINGS[key] for key in sweep.SETTINGS}]
+    assert len(sweep.scenario_grid(principal=[100, 200], ships=[sweep.SHIPS["dhow"]])) == 2
+
+
+def test_one_point_sweep_matches_route_engine(markets):
+    rows = sweep.sweep(sweep.snapshot_from_markets(markets), sweep.scenario_grid(), workers=4, top=3)
+
+    routes = RouteEngine(Products.DATA).generate(markets, markets, Player())
+    best = sorted(routes, key=lambda route: -route["$Profit"])[:3]
+    assert len(rows) == 1
+    row = rows[0]
+    assert {key: row[key] for key in sweep.SETTINGS} == sweep.scenario_grid()[0]
+    assert row["routes"] == len(routes)
+    assert row["best_routes"] == best
+    assert row["best_profit"] == best[0]["$Profit"]
+    assert row["best_per_pound"] == max(route["$/Pound"] for route in routes)
+    assert row["best_per_item"] == max(route["$/Item"] for route in routes)
+
+
+def test_pool_matches_in_process(markets):
+    snapshot = sweep.snapshot_from_markets(markets)
+    scenarios = sweep.scenario_grid(principal=[500, 5000], ships=list(sweep.SHIPS.values()))
+    strip = lambda rows: [{key: value for key, value in row.items() if key != "seconds"} for row in rows]
+    assert strip(sweep.sweep(snapshot, scenarios, workers=2)) == strip(sweep.sweep(snapshot, scenarios, workers=1))
+
+
+def test_main_one_point_grid(markets, tmp_path, capsys):
+    dump = tmp_path / "snapshot.json"
+    dump.write_text(json.dumps(export_markets(markets, 1000.0)), encoding="utf-8")
+    assert sweep.main([str(dump), "--principal", "2500", "--ship", "dhow", "--workers", "1", "--json"]) == 0
+    rows = json.loads(capsys.readouterr().out)
+    assert len(rows) == 1
+    assert (rows[0]["principal"], rows[0]["mass_limit"], rows[0]["volume_limit"]) == (2500, 1000, 40)
+
+
+def test_parse_ship():
+    assert sweep.parse_ship("Sanbuq") == sweep.SHIPS["sanbuq"]
+    assert sweep.parse_ship("2500x80") == (2500.0, 80.0)
+    with pytest.raises(argparse.ArgumentTypeError, match="MASSxVOLUME"):
+        sweep.parse_ship("big")
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from table import RouteTable, route_key, _stable_rows
+
+
+class FakeTree:
+    """The ttk.Treeview calls RouteTable makes, on a plain list."""
+    def __init__(self):
+        self.children = []
+        self.values = {}
+        self.detached = set()
+        self.calls = 0
+
+    def delete(self, *iids):
+        self.calls += 1
+        for iid in iids:
+            self.children.remove(iid)
+            del self.values[iid]
+
+    def item(self, iid, values):
+        self.calls += 1
+        self.values[iid] = values
+
+    def detach(self, iid):
+        self.calls += 1
+        self.children.remove(iid)
+        self.detached.add(iid)
+
+    def move(self, iid, parent, index):
+        self.calls += 1
+        assert iid in self.detached
+        self.detached.discard(iid)
+        self.children.insert(index, iid)
+
+    def insert(self, parent, index, iid, values):
+        self.calls += 1
+        assert iid not in self.values
+        self.children.insert(index, iid)
+        self.values[iid] = values
+
+
+def make_route(rng, n):
+    return {"Start Market": f"S{n % 7}", "End Market": f"E{n % 5}", "Product": f"P{n}", "Qnty": "1/2",
+            "$_Buy": 1, "$_Sell": 2, "$Profit": rng.randint(0, 5), "$/Pound": 0.1, "$/Item": 1.0}
+
+
+def by_start(routes, key="$Profit"):
+    return sorted(routes, key=lambda route: (route["Start Market"], -route[key]))
+
+
+def test_stable_rows_is_longest_increasing_run():
+    positions = [3, 0, 1, 5, 2, 4]
+    stable = _stable_rows(positions)
+    assert [positions[i] for i in sorted(stable)] == [0, 1, 2, 4]
+    assert _stable_rows([]) == set()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_refreshes_match_full_rebuild(seed):
+    rng = random.Random(seed)
+    tree = FakeTree()
+    table = RouteTable(tree)
+    routes = [make_route(rng, n) for n in range(300)]
+    for step in range(200):
+        routes = [r for r in routes if rng.random() > 0.02]
+        routes += [make_route(rng, rng.randint(0, 2000)) for _ in range(rng.randint(0, 5))]
+        seen = set()
+        routes = [r for r in routes if not (r["Product"] in seen or seen.add(r["Product"]))]
+        for route in rng.sample(routes, min(5, len(routes))):
+            route["$Profit"] = rng.randint(0, 50)
+        if step % 50 == 0:
+            rng.shuffle(routes)
+        else:
+            routes = by_start(routes)
+        table.render(routes)
+        assert tree.children == [route_key(r) for r in routes]
+        assert all(tree.values[route_key(r)] == tuple(r[k] for k in table.columns) for r in routes)
+        assert not tree.detached
+
+
+def test_unchanged_refresh_makes_no_calls():
+    rng = random.Random(1)
+    tree = FakeTree()
+    table = RouteTable(tree)
+    routes = by_start([make_route(rng, n) for n in range(100)])
+    table.render(routes)
+    tree.calls = 0
+    assert table.render(routes) == {"inserted": 0, "updated": 0, "deleted": 0, "moved": 0}
+    assert tree.calls == 0
+
+
+def test_single_move():
+    rng = random.Random(2)
+    tree = FakeTree()
+    table = RouteTable(tree)
+    routes = [make_route(rng, n) for n in range(50)]
+    table.render(routes)
+    routes.insert(10, routes.pop(40))
+    assert table.render(routes)["moved"] == 1
+    assert tree.children == [route_key(r) for r in routes]
+
+
+@pytest.mark.parametrize("key", ["$Profit", "$/Item"])
+def test_limit_keeps_best_routes_across_start_markets(key):
+    rng = random.Random(3)
+    tree = FakeTree()
+    table = RouteTable(tree, limit=10)
+    routes = [make_route(rng, n) for n in range(200)]
+    for route in routes:
+        route[key] = rng.uniform(0, 1000)
+    routes = by_start(routes, key)
+    # Markets late in the alphabet hold the best routes, not the first rows
+    best = sorted(routes, key=lambda route: -route[key])[:10]
+    table.render(routes, key)
+    assert tree.children == [route_key(r) for r in routes if r in best]